@@ -1,20 +1,43 @@
 import logging
 import sys
-from typing import Any
-
-import confight
-from pydantic_core import ValidationError
-from textual.app import App
+from typing import TYPE_CHECKING, Any
 
 from luz_metronomo.cli_options import CliOptions
-from luz_metronomo.configuration import Configuration
 from luz_metronomo.default import Default
 from luz_metronomo.logger import Logger
-from luz_metronomo.textual import LuzMetronomoApp
+
+# NOTE: Heavy modules are imported on the paths that need them, to keep the CLI responsive
+if TYPE_CHECKING:
+    from textual.app import App
+
+    from luz_metronomo.configuration import Configuration
 
 logger = logging.getLogger(Default.PROGRAM_NAME)
 
 
+def print_startup_profile(command: str | None) -> int:
+    from luz_metronomo.util.startup import (
+        STARTUP_MODULES,
+        StartupProfile,
+        check_startup_budget,
+        format_startup_profile,
+        profile_startup,
+    )
+
+    try:
+        profile: StartupProfile = profile_startup(STARTUP_MODULES[command])
+    except Exception:
+        logger.exception("Unable to profile the startup", extra={"command": command})
+        return 1
+
+    print(format_startup_profile(profile))
+
+    violations: list[str] = check_startup_budget(command, profile)
+    for violation in violations:
+        logger.error("Startup over budget: %s", violation)
+    return 1 if violations else 0
+
+
 def main(av: list[str]) -> int:
     cli_options = CliOptions(av[1:])
 
@@ -29,6 +52,35 @@ def main(av: list[str]) -> int:
     logger.debug("Debug messages enabled")
     logger.debug("Options namespace: %s", cli_options)
 
+    if cli_options.startup_profile:
+        return print_startup_profile(cli_options.command)
+
+    if cli_options.command == "serve":
+        # NOTE: The stand-in server doesn't depend on the configuration
+        from luz_metronomo.server import Faults, serve
+
+        return serve(
+            cli_options.host,
+            cli_options.port,
+            Faults(
+                latency=cli_options.latency,
+                latency_jitter=cli_options.latency_jitter,
+                error_rate=cli_options.error_rate,
+                truncate_rate=cli_options.truncate_rate,
+                throttle_rate=cli_options.throttle_rate,
+                drip_rate=cli_options.drip_rate,
+            ),
+            replay_directory=cli_options.replay_directory,
+            replay_only=cli_options.replay_only,
+            seed=cli_options.seed,
+            validators=cli_options.validators,
+        )
+
+    import confight
+    from pydantic_core import ValidationError
+
+    from luz_metronomo.configuration import Configuration
+
     configuration_data: dict[str, Any] | None = None
     try:
         if cli_options.configuration is not None:
@@ -51,11 +103,145 @@ def main(av: list[str]) -> int:
             "Unable to load the configuration object", extra={"data": configuration_data}
         )
         return 1
+    if cli_options.time_trunc is not None:
+        from luz_metronomo.entity.time_trunc import TimeTrunc
+
+        configuration.api.time_trunc = TimeTrunc(cli_options.time_trunc)
     logger.debug("Configuration: %s", configuration)
 
-    app: App = None
     try:
-        app = LuzMetronomoApp(configuration)
+        return run_command(cli_options, configuration)
+    finally:
+        if (path_metrics := configuration.luz_metronomo.metrics_file) is not None:
+            from luz_metronomo.metrics import METRICS
+
+            METRICS.write_prometheus(path_metrics)
+
+
+def run_command(cli_options: CliOptions, configuration: "Configuration") -> int:
+    if cli_options.command == "plan" and cli_options.date_to is None:
+        cli_options.date_to = cli_options.date_from
+    if (
+        cli_options.command in ("export", "backfill", "stats", "plan")
+        and cli_options.date_to < cli_options.date_from
+    ):
+        logger.error("The end of the date range precedes its beginning")
+        return 1
+
+    # NOTE: Days are Spanish ones, even on hosts set to another timezone (e.g. UTC servers)
+    if cli_options.command in ("export", "stats", "plan"):
+        from luz_metronomo.util.timezone import spanish_day_range
+
+        date_from, date_to = spanish_day_range(
+            cli_options.date_from.date(), cli_options.date_to.date()
+        )
+
+    if cli_options.command == "backfill":
+        from luz_metronomo.backfill import backfill_price_store
+
+        try:
+            return backfill_price_store(
+                configuration, cli_options.date_from.date(), cli_options.date_to.date()
+            )
+        except KeyboardInterrupt:
+            logger.info(
+                "Interrupt caught, quitting (the backfill resumes from there when run again)"
+            )
+        except Exception:
+            logger.exception("An unknown error occurred")
+            return 1
+
+        return 0
+
+    if cli_options.command == "export":
+        # NOTE: Only import what's needed, the user interface is not
+        from luz_metronomo.entity.export_format import ExportFormat
+        from luz_metronomo.export import export_price_lists
+
+        try:
+            return export_price_lists(
+                configuration,
+                date_from,
+                date_to,
+                ExportFormat(cli_options.format),
+                cli_options.output,
+                from_store=cli_options.from_store,
+                hourly=cli_options.hourly,
+            )
+        except KeyboardInterrupt:
+            logger.info("Interrupt caught, quitting")
+        except Exception:
+            logger.exception("An unknown error occurred")
+            return 1
+
+        return 0
+
+    if cli_options.command == "stats":
+        from luz_metronomo.entity.statistics_grouping import StatisticsGrouping
+        from luz_metronomo.report import report_statistics
+
+        try:
+            return report_statistics(
+                configuration,
+                date_from,
+                date_to,
+                [
+                    StatisticsGrouping(grouping)
+                    for grouping in cli_options.group_by or [StatisticsGrouping.Period.value]
+                ],
+                json_lines=cli_options.json,
+                from_store=cli_options.from_store,
+            )
+        except KeyboardInterrupt:
+            logger.info("Interrupt caught, quitting")
+        except Exception:
+            logger.exception("An unknown error occurred")
+            return 1
+
+        return 0
+
+    if cli_options.command == "plan":
+        from pydantic_core import ValidationError
+
+        from luz_metronomo.configuration import PlannedLoad
+        from luz_metronomo.plan import plan_loads
+
+        try:
+            planned_loads: list[PlannedLoad] = configuration.planner.loads
+            if cli_options.loads:
+                planned_loads = [PlannedLoad.model_validate(load) for load in cli_options.loads]
+        except ValidationError:
+            logger.exception("Invalid load description", extra={"loads": cli_options.loads})
+            return 1
+
+        try:
+            return plan_loads(
+                configuration,
+                date_from,
+                date_to,
+                planned_loads,
+                (
+                    cli_options.max_power
+                    if cli_options.max_power is not None
+                    else configuration.planner.max_power
+                ),
+                cli_options.price_list or configuration.planner.price_list,
+                json_lines=cli_options.json,
+                from_store=cli_options.from_store,
+            )
+        except KeyboardInterrupt:
+            logger.info("Interrupt caught, quitting")
+        except Exception:
+            logger.exception("An unknown error occurred")
+            return 1
+
+        return 0
+
+    from luz_metronomo.textual import LuzMetronomoApp
+
+    app: "App | None" = None
+    try:
+        app = LuzMetronomoApp(configuration, date_from=cli_options.date, days=cli_options.days)
         return app.run()
     except KeyboardInterrupt:
         logger.info("Interrupt caught, quitting")
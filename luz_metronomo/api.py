@@ -1,10 +1,16 @@
 import json
 import logging
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Any
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import partial
+from itertools import pairwise
+from pathlib import Path
+from typing import Any, NamedTuple
 
-import urllib3
+from urllib3 import HTTPConnectionPool, PoolManager
 from urllib3.exceptions import (
     HTTPError,
     LocationValueError,
@@ -14,13 +20,22 @@ from urllib3.exceptions import (
     TimeoutError,
 )
 from urllib3.response import BaseHTTPResponse
-from urllib3.util import Retry, Timeout
+from urllib3.util import Retry, Timeout, make_headers
 
 from luz_metronomo.default import Default
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.validators import Validators
+from luz_metronomo.metrics import METRICS
 from luz_metronomo.util.timezone import GMT_PLUS_2
 
 logger = logging.getLogger(Default.PROGRAM_NAME)
 
+# NOTE: Granularities supported by the endpoint, as values of the `time_trunc` field
+TIME_TRUNC_INTERVALS: dict[str, timedelta] = {
+    "hour": timedelta(hours=1),
+    "quarter-hour": timedelta(minutes=15),
+}
+
 
 def normalise_datetime_field(datetime: datetime) -> str:
     """
@@ -30,23 +45,102 @@ def normalise_datetime_field(datetime: datetime) -> str:
     return datetime.astimezone(GMT_PLUS_2).replace(microsecond=0, tzinfo=None).isoformat()
 
 
+def recording_name(start_date: str, end_date: str, time_trunc: str) -> str:
+    """
+    Name of the file in which the response to a request is recorded, from its (normalised) fields.
+    """
+    return f"{start_date}_{end_date}_{time_trunc}.json".replace(":", "-")
+
+
+def record_response(directory: Path, name: str, raw_response: bytes):
+    """
+    Save the raw body of a response, for the stand-in server to replay it.
+    """
+    path: Path = directory / name
+    path_tmp: Path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}")
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        path_tmp.write_bytes(raw_response)
+        os.replace(path_tmp, path)
+    except OSError:
+        logger.exception("Unable to record the response", extra={"path": path})
+        path_tmp.unlink(missing_ok=True)
+        return
+    logger.debug("Recorded response: %s", path)
+
+
 class ApiError(Exception): ...
 
 
-# TODO: Document.
+class _PriceRow(NamedTuple):
+    """
+    Price point decoded from a response, before it is stored in the columns of its list.
+    """
+
+    timestamp: int
+    offset: int
+    value: float
+
+
 @dataclass
 class Api:
+    """
+    Client for the API, meant to be long-lived so that connections to the server are reused
+    between requests.
+    """
+
     url: str
     retry: Retry | None = None
     timeout: Timeout | None = None
+    time_trunc: str = "hour"
+    pool_manager: PoolManager | None = None
+    compression: bool = True
+    chunk_size: int = 64 * 1024
+    # NOTE: Directory in which successful responses are recorded, to be replayed later on
+    record_directory: Path | None = None
+    headers: dict[str, str] = field(init=False)
 
     def __post_init__(self):
         if self.retry is None:
             self.retry = Retry()
         if self.timeout is None:
             self.timeout = Timeout()
+        if self.pool_manager is None:
+            self.pool_manager = PoolManager()
+        # NOTE: Brotli is only advertised when the relevant module is installed
+        self.headers = make_headers(keep_alive=True, accept_encoding=self.compression)
+
+    @property
+    def interval(self) -> int:
+        """
+        Amount of seconds between two points of the lists returned for the granularity requested.
+        """
+        return int(TIME_TRUNC_INTERVALS[self.time_trunc].total_seconds())
 
-    def get(self, date_from: datetime, date_to: datetime) -> dict[str, Any]:
+    def close(self):
+        """
+        Close all the connections kept alive in the pool.
+        """
+        assert self.pool_manager is not None
+        self.pool_manager.clear()
+
+    def fetch(self, date_from: datetime, date_to: datetime) -> bytes:
+        """
+        Query the API for the given date range, and return the raw body of the response.
+        """
+        raw_response, _ = self.fetch_conditional(date_from, date_to)
+        assert raw_response is not None
+        return raw_response
+
+    def fetch_conditional(
+        self, date_from: datetime, date_to: datetime, validators: Validators = Validators()
+    ) -> tuple[bytes | None, Validators]:
+        """
+        Query the API for the given date range, unless the response identified by the given
+        validators is still current.
+
+        Return the raw body of the response (`None` if it was not modified), and its validators.
+        """
         try:
             # NOTE: The endpoint only supports YYYY-MM-DDT00:00:00, GMT+2 without
             # timezone information in the string
@@ -55,12 +149,37 @@ class Api:
             fields: dict[str, Any] = {
                 "start_date": start_date_spain,
                 "end_date": end_date_spain,
-                "time_trunc": "hour",
+                "time_trunc": self.time_trunc,
             }
             logger.debug("Api request: %s (fields: %s)", self.url, fields)
-            http_response: BaseHTTPResponse = urllib3.request(
-                "GET", self.url, retries=self.retry, timeout=self.timeout, fields=fields
+            assert self.pool_manager is not None
+            # NOTE: Connections opened by the request (e.g. DNS resolution and TLS handshake)
+            # show in the time it takes to receive the headers
+            pool: HTTPConnectionPool = self.pool_manager.connection_from_url(self.url)
+            num_connections: int = pool.num_connections
+            time_start: float = time.perf_counter()
+            http_response: BaseHTTPResponse = self.pool_manager.request(
+                "GET",
+                self.url,
+                fields=fields,
+                headers=self.headers | validators.request_headers(),
+                retries=self.retry,
+                timeout=self.timeout,
+                preload_content=False,
             )
+            time_headers: float = time.perf_counter()
+            response_validators = Validators(
+                etag=http_response.headers.get("ETag"),
+                last_modified=http_response.headers.get("Last-Modified"),
+            )
+            try:
+                # NOTE: The body is decompressed on the fly, chunk by chunk
+                raw_response: bytes = b"".join(
+                    http_response.stream(self.chunk_size, decode_content=True)
+                )
+            finally:
+                http_response.release_conn()
+            time_end: float = time.perf_counter()
         except (
             HTTPError,
             TimeoutError,
@@ -69,19 +188,141 @@ class Api:
             NewConnectionError,
             ProtocolError,
         ) as e:
+            METRICS.count("api_errors", error=e.__class__.__name__)
             raise ApiError from e
 
-        text_response: str = http_response.data.decode("utf-8")
+        connection: str = "new" if pool.num_connections > num_connections else "reused"
+        METRICS.record("api_fetch_headers", time_headers - time_start, connection=connection)
+        METRICS.record("api_fetch_body", time_end - time_headers)
+        METRICS.count("api_requests", status=http_response.status)
+        if http_response.retries is not None:
+            for history in http_response.retries.history:
+                reason: object = history.status or (
+                    history.error and history.error.__class__.__name__
+                )
+                METRICS.count("api_retries", reason=reason)
+        # NOTE: Amount of bytes read from the socket, before decompression
+        METRICS.count("api_bytes_received", http_response.tell(), encoding="wire")
+        METRICS.count("api_bytes_received", len(raw_response), encoding="identity")
+
+        logger.debug(
+            "Api response: %s (status: %s, encoding: %s, size: %d, headers: %.3fs, body: %.3fs)",
+            self.url,
+            http_response.status,
+            http_response.headers.get("Content-Encoding", "identity"),
+            len(raw_response),
+            time_headers - time_start,
+            time_end - time_start,
+        )
 
-        logger.debug("Response from the API: %s", text_response)
+        if http_response.status == 304:
+            # NOTE: The server may omit the validators that didn't change
+            return None, Validators(
+                etag=response_validators.etag or validators.etag,
+                last_modified=response_validators.last_modified or validators.last_modified,
+            )
 
+        if self.record_directory is not None and http_response.status == 200:
+            record_response(
+                self.record_directory,
+                recording_name(start_date_spain, end_date_spain, self.time_trunc),
+                raw_response,
+            )
+
+        return raw_response, response_validators
+
+    def get(self, date_from: datetime, date_to: datetime) -> list[PriceList]:
+        with METRICS.span("api_get"):
+            return decode_price_lists(self.fetch(date_from, date_to), self.interval)
+
+
+def _decode_object(the_object: dict[str, Any], interval: int | None = None) -> Any:
+    """
+    Convert the objects of a response as soon as they are decoded, innermost first, so that price
+    lists are built without keeping an intermediate tree around.
+
+    The points of the lists last `interval` seconds, inferred from their gaps if not given.
+    """
+    # NOTE: An item of `included[].attributes.values`, kept as a `(timestamp, offset, value)` row
+    if "datetime" in the_object and "value" in the_object:
+        value: Any = the_object["value"]
+        the_datetime: Any = the_object["datetime"]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ApiError(f"Invalid price value: {value!r}")
+        if not isinstance(the_datetime, str):
+            raise ApiError(f"Invalid price datetime: {the_datetime!r}")
         try:
-            json_response: dict[str, Any] = json.loads(text_response)
-        except (json.JSONDecodeError, UnicodeDecodeError) as e:
-            raise ApiError from e
+            price_datetime: datetime = datetime.fromisoformat(the_datetime)
+        except ValueError as e:
+            raise ApiError(f"Invalid price datetime: {the_datetime!r}") from e
+        if (utc_offset := price_datetime.utcoffset()) is None:
+            raise ApiError(f"Price datetime without timezone: {the_datetime!r}")
+        return _PriceRow(int(price_datetime.timestamp()), int(utc_offset.total_seconds()), value)
+
+    # NOTE: An item of `included[].attributes`
+    if "values" in the_object:
+        title: Any = the_object.get("title")
+        last_update: Any = the_object.get("last-update")
+        rows: Any = the_object["values"]
+        if not isinstance(title, str):
+            raise ApiError(f"Invalid price list title: {title!r}")
+        if not isinstance(last_update, str):
+            raise ApiError(f"Invalid price list last update: {last_update!r}")
+        if not isinstance(rows, list) or not all(isinstance(row, _PriceRow) for row in rows):
+            raise ApiError(f"Invalid price list values: {title}")
+        try:
+            last_update_datetime: datetime = datetime.fromisoformat(last_update)
+        except ValueError as e:
+            raise ApiError(f"Invalid price list last update: {last_update!r}") from e
+        # NOTE: The values are usually ordered already, in which case sorting is skipped
+        if not all(previous.timestamp <= current.timestamp for previous, current in pairwise(rows)):
+            rows.sort()
+        try:
+            return PriceList.from_columns(
+                title=title,
+                last_update=last_update_datetime,
+                timestamps=(row.timestamp for row in rows),
+                offsets=(row.offset for row in rows),
+                values=(row.value for row in rows),
+                interval=interval,
+            )
+        # NOTE: E.g. values too large to be stored in the columns
+        except (ValueError, OverflowError) as e:
+            raise ApiError(f"Invalid price list values: {title} ({e})") from e
+
+    return the_object
+
+
+def decode_price_lists(raw_response: bytes, interval: int | None = None) -> list[PriceList]:
+    """
+    Decode the raw body of a response returned by the API into the price lists it holds.
+
+    Passing the interval of the granularity requested (see `Api.interval`) keeps lists of a single
+    point, or with gaps, from being given the wrong one.
+    """
+    logger.debug("Decoding response from the API (size: %d)", len(raw_response))
+
+    try:
+        with METRICS.span("api_decode"):
+            json_response: Any = json.loads(
+                raw_response, object_hook=partial(_decode_object, interval=interval)
+            )
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ApiError from e
+
+    if not isinstance(json_response, dict):
+        raise ApiError("Invalid JSON response")
+    if "errors" in json_response:
+        raise ApiError(f"Error response: {json_response['errors']!r}")
+
+    included: Any = json_response.get("included")
+    if not isinstance(included, list):
+        raise ApiError("Invalid JSON response: missing price lists")
 
-        # TODO: Use a validation schema
-        if not json_response:
-            raise ApiError("Invalid JSON response")
+    price_lists: list[PriceList] = []
+    for item in included:
+        if not isinstance(item, dict) or not isinstance(item.get("attributes"), PriceList):
+            raise ApiError("Invalid JSON response: invalid price list")
+        price_lists.append(item["attributes"])
 
-        return json_response
+    return price_lists
@@ -0,0 +1,498 @@
+import asyncio
+import logging
+import random
+import ssl
+import time
+import zlib
+from collections.abc import AsyncIterator
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from luz_metronomo.api import (
+    TIME_TRUNC_INTERVALS,
+    ApiError,
+    decode_price_lists,
+    normalise_datetime_field,
+    record_response,
+    recording_name,
+)
+from luz_metronomo.default import Default
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.validators import Validators
+from luz_metronomo.metrics import METRICS
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+REDIRECT_STATUSES: frozenset[int] = frozenset((301, 302, 303, 307, 308))
+# NOTE: Responses that never have a body, whatever their headers
+BODYLESS_STATUSES: frozenset[int] = frozenset((204, 304))
+
+# NOTE: Maximum size of the status line and of each header line of a response
+MAX_LINE_SIZE: int = 64 * 1024
+MAX_HEADERS: int = 100
+
+# NOTE: Same as `urllib3.Retry.DEFAULT_ALLOWED_METHODS`
+IDEMPOTENT_METHODS: frozenset[str] = frozenset(("DELETE", "GET", "HEAD", "OPTIONS", "PUT", "TRACE"))
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:
+    brotli = None
+
+
+@dataclass
+class AsyncRetry:
+    """
+    Retry policy of the asynchronous client, which mirrors that of `urllib3.Retry`.
+    """
+
+    # NOTE: When set, the total takes precedence over the other counts
+    total: int | None = 3
+    connect: int = 0
+    read: int = 0
+    status: int = 3
+    other: int = 0
+    redirect: int = 3
+    status_forcelist: frozenset[int] = frozenset()
+    # NOTE: Methods whose read and status failures are retried, `None` to retry any method
+    allowed_methods: frozenset[str] | None = IDEMPOTENT_METHODS
+    backoff_factor: float = 0.0
+    backoff_max: float = 0.0
+    backoff_jitter: float = 0.0
+
+    def allows(self, kind: str, history: list[str], method: str = "GET") -> bool:
+        """
+        Whether another attempt is allowed after a failure of the given kind (`connect`, `read`,
+        `status` or `other`) of a request with the given method, given the kinds of the previous
+        failures.
+
+        As with `urllib3`, read and status failures are only retried for the allowed methods, as
+        the request may have been processed by the server already.
+        """
+        if (
+            kind in ("read", "status")
+            and self.allowed_methods is not None
+            and method.upper() not in self.allowed_methods
+        ):
+            return False
+        if self.total is not None:
+            return len(history) < self.total
+        return history.count(kind) < getattr(self, kind)
+
+    def backoff(self, attempts: int) -> float:
+        """
+        Amount of seconds to wait before the next attempt, after the given amount of failures.
+        """
+        if attempts <= 1 or self.backoff_factor <= 0.0:
+            return 0.0
+        backoff: float = self.backoff_factor * 2 ** (attempts - 1)
+        if self.backoff_max > 0.0:
+            backoff = min(backoff, self.backoff_max)
+        if self.backoff_jitter > 0.0:
+            backoff += random.uniform(0.0, self.backoff_jitter)
+        return backoff
+
+
+@dataclass
+class AsyncTimeout:
+    # NOTE: Maximum duration of an attempt, takes precedence over the other durations
+    total: float | None = 3.0
+    connect: float | None = None
+    read: float | None = None
+
+
+class _RetryableError(Exception):
+    def __init__(self, kind: str, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.kind: str = kind
+        self.retry_after: float | None = retry_after
+
+
+@dataclass
+class _Connection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+
+    def close(self):
+        self.writer.close()
+
+
+@dataclass
+class _Response:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+
+def _retry_after(headers: dict[str, str]) -> float | None:
+    try:
+        return max(0.0, float(headers["retry-after"]))
+    except (KeyError, ValueError):
+        return None
+
+
+@dataclass
+class AsyncApi:
+    """
+    Client for the API that runs on an event loop, meant to be long-lived so that connections to
+    the server are reused between requests.
+
+    Cancelling a request closes its connection right away, so that nothing keeps being
+    downloaded, and at most `max_connections` requests are sent concurrently.
+    """
+
+    url: str
+    retry: AsyncRetry = field(default_factory=AsyncRetry)
+    timeout: AsyncTimeout = field(default_factory=AsyncTimeout)
+    time_trunc: str = "hour"
+    max_connections: int = 4
+    compression: bool = True
+    chunk_size: int = 64 * 1024
+    # NOTE: Directory in which successful responses are recorded, to be replayed later on
+    record_directory: Path | None = None
+    _idle: dict[tuple[str, str, int], list[_Connection]] = field(init=False, default_factory=dict)
+    _semaphore: asyncio.Semaphore | None = field(init=False, default=None)
+    _ssl_context: ssl.SSLContext | None = field(init=False, default=None)
+
+    @property
+    def interval(self) -> int:
+        """
+        Amount of seconds between two points of the lists returned for the granularity requested.
+        """
+        return int(TIME_TRUNC_INTERVALS[self.time_trunc].total_seconds())
+
+    def _accept_encoding(self) -> str:
+        if not self.compression:
+            return "identity"
+        return "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+
+    async def close(self):
+        """
+        Close all the connections kept alive.
+        """
+        connections: list[_Connection] = [
+            connection for connections in self._idle.values() for connection in connections
+        ]
+        self._idle.clear()
+        for connection in connections:
+            connection.close()
+        for connection in connections:
+            try:
+                await connection.writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _open(self, scheme: str, host: str, port: int) -> tuple[_Connection, bool]:
+        """
+        Return an idle connection to the given server, or a new one, and whether it is new.
+        """
+        idle: list[_Connection] = self._idle.get((scheme, host, port), [])
+        while idle:
+            connection: _Connection = idle.pop()
+            if not connection.reader.at_eof() and not connection.writer.is_closing():
+                return connection, False
+            connection.close()
+
+        ssl_context: ssl.SSLContext | None = None
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            ssl_context = self._ssl_context
+        try:
+            async with asyncio.timeout(self.timeout.connect):
+                reader, writer = await asyncio.open_connection(
+                    host, port, ssl=ssl_context, limit=MAX_LINE_SIZE
+                )
+        except (OSError, TimeoutError) as e:
+            raise _RetryableError("connect", f"Unable to connect to {host}:{port}: {e!r}") from e
+        return _Connection(reader, writer), True
+
+    def _release(self, key: tuple[str, str, int], connection: _Connection):
+        idle: list[_Connection] = self._idle.setdefault(key, [])
+        if len(idle) < self.max_connections:
+            idle.append(connection)
+        else:
+            connection.close()
+
+    async def _read_headers(self, reader: asyncio.StreamReader) -> tuple[str, int, dict[str, str]]:
+        status_line: bytes = await reader.readline()
+        if not status_line:
+            raise _RetryableError("read", "Connection closed before the response")
+        try:
+            version, status, *_ = status_line.decode("latin-1").split(" ", 2)
+            status_code: int = int(status)
+        except ValueError as e:
+            raise _RetryableError("other", f"Invalid status line: {status_line!r}") from e
+
+        headers: dict[str, str] = {}
+        for _ in range(MAX_HEADERS):
+            line: bytes = await reader.readline()
+            if line in (b"\r\n", b"\n"):
+                return version, status_code, headers
+            if not line:
+                raise _RetryableError("read", "Connection closed within the headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            value = value.strip()
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+        raise _RetryableError("other", "Too many headers in the response")
+
+    async def _iter_body(
+        self, reader: asyncio.StreamReader, status: int, headers: dict[str, str]
+    ) -> AsyncIterator[bytes]:
+        if status in BODYLESS_STATUSES:
+            return
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                size_line: bytes = await reader.readline()
+                try:
+                    size: int = int(size_line.split(b";", 1)[0].strip(), 16)
+                except ValueError as e:
+                    raise _RetryableError("read", f"Invalid chunk size: {size_line!r}") from e
+                if size == 0:
+                    # NOTE: Skip the trailers
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                yield await reader.readexactly(size)
+                await reader.readexactly(2)
+        elif (content_length := headers.get("content-length")) is not None:
+            remaining: int = int(content_length)
+            while remaining > 0:
+                chunk: bytes = await reader.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b"", remaining)
+                remaining -= len(chunk)
+                yield chunk
+        else:
+            while chunk := await reader.read(self.chunk_size):
+                yield chunk
+
+    def _decoder(self, headers: dict[str, str]) -> Any:
+        encoding: str = headers.get("content-encoding", "identity").lower()
+        if encoding in ("gzip", "x-gzip", "deflate"):
+            # NOTE: Detects both gzip and zlib headers
+            return zlib.decompressobj(zlib.MAX_WBITS | 32)
+        if encoding == "br" and brotli is not None:
+            return brotli.Decompressor()
+        if encoding != "identity":
+            raise _RetryableError("other", f"Unsupported content encoding: {encoding}")
+        return None
+
+    async def _request(self, url: str, headers_extra: dict[str, str]) -> _Response:
+        """
+        Send a single request, reusing an idle connection when possible.
+        """
+        parts = urlsplit(url)
+        scheme: str = parts.scheme
+        host: str = parts.hostname or ""
+        port: int = parts.port or (443 if scheme == "https" else 80)
+        key: tuple[str, str, int] = (scheme, host, port)
+        target: str = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        host_header: str = parts.netloc.rpartition("@")[2]
+
+        connection, new_connection = await self._open(scheme, host, port)
+        released: bool = False
+        try:
+            time_start: float = time.perf_counter()
+            connection.writer.write(
+                (
+                    f"GET {target} HTTP/1.1\r\n"
+                    f"Host: {host_header}\r\n"
+                    f"Accept: application/json\r\n"
+                    f"Accept-Encoding: {self._accept_encoding()}\r\n"
+                    f"Connection: keep-alive\r\n"
+                    f"User-Agent: {Default.PROGRAM_NAME}\r\n"
+                    + "".join(f"{name}: {value}\r\n" for name, value in headers_extra.items())
+                    + "\r\n"
+                ).encode("latin-1")
+            )
+            try:
+                async with asyncio.timeout(self.timeout.read):
+                    await connection.writer.drain()
+                    version, status, headers = await self._read_headers(connection.reader)
+                time_headers: float = time.perf_counter()
+
+                decoder: Any = self._decoder(headers)
+                chunks: list[bytes] = []
+                size_wire: int = 0
+                # NOTE: The body is closed right away when the request is cancelled or fails
+                async with aclosing(self._iter_body(connection.reader, status, headers)) as body:
+                    while True:
+                        async with asyncio.timeout(self.timeout.read):
+                            chunk: bytes | None = await anext(body, None)
+                        if chunk is None:
+                            break
+                        size_wire += len(chunk)
+                        chunks.append(decoder.decompress(chunk) if decoder is not None else chunk)
+                if decoder is not None and hasattr(decoder, "flush"):
+                    chunks.append(decoder.flush())
+            except (OSError, ValueError, asyncio.IncompleteReadError, zlib.error) as e:
+                raise _RetryableError("read", f"Unable to read the response: {e!r}") from e
+            except TimeoutError as e:
+                raise _RetryableError("read", "Timed out reading the response") from e
+            time_end: float = time.perf_counter()
+
+            keep_alive: bool = (
+                version == "HTTP/1.1"
+                and "close" not in headers.get("connection", "").lower()
+                and (
+                    "content-length" in headers
+                    or "transfer-encoding" in headers
+                    or status in BODYLESS_STATUSES
+                )
+            )
+            if keep_alive:
+                self._release(key, connection)
+                released = True
+        finally:
+            # NOTE: Closing the connection of a cancelled request interrupts the download
+            if not released:
+                connection.close()
+
+        raw_response: bytes = b"".join(chunks)
+        METRICS.record(
+            "api_fetch_headers",
+            time_headers - time_start,
+            connection="new" if new_connection else "reused",
+        )
+        METRICS.record("api_fetch_body", time_end - time_headers)
+        METRICS.count("api_requests", status=status)
+        METRICS.count("api_bytes_received", size_wire, encoding="wire")
+        METRICS.count("api_bytes_received", len(raw_response), encoding="identity")
+        return _Response(status, headers, raw_response)
+
+    async def _request_with_retries(self, url: str, headers: dict[str, str]) -> _Response:
+        history: list[str] = []
+        redirects: int = 0
+        while True:
+            try:
+                async with asyncio.timeout(self.timeout.total):
+                    response: _Response = await self._request(url, headers)
+                if response.status in self.retry.status_forcelist:
+                    raise _RetryableError(
+                        "status",
+                        f"Status of the response: {response.status}",
+                        retry_after=_retry_after(response.headers),
+                    )
+            except TimeoutError as e:
+                error: _RetryableError = _RetryableError("read", "Timed out")
+                error.__cause__ = e
+            except _RetryableError as e:
+                error = e
+            else:
+                if response.status in REDIRECT_STATUSES and "location" in response.headers:
+                    if redirects >= self.retry.redirect:
+                        raise ApiError(f"Too many redirections: {url}")
+                    redirects += 1
+                    url = urljoin(url, response.headers["location"])
+                    continue
+                return response
+
+            if not self.retry.allows(error.kind, history, "GET"):
+                METRICS.count("api_errors", error=error.kind)
+                raise ApiError(str(error)) from error
+            history.append(error.kind)
+            METRICS.count("api_retries", reason=error.kind)
+            backoff: float = self.retry.backoff(len(history))
+            if error.retry_after is not None:
+                backoff = max(backoff, error.retry_after)
+            logger.debug("Retrying request (%s), in %.3fs: %s", error, backoff, url)
+            await asyncio.sleep(backoff)
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        # NOTE: Created lazily, to be bound to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        async with self._semaphore:
+            yield
+
+    async def fetch(
+        self, date_from: datetime, date_to: datetime, deadline: float | None = None
+    ) -> bytes:
+        """
+        Query the API for the given date range, and return the raw body of the response.
+
+        The deadline, in seconds, bounds the whole request, retries included.
+        """
+        raw_response, _ = await self.fetch_conditional(date_from, date_to, deadline=deadline)
+        assert raw_response is not None
+        return raw_response
+
+    async def fetch_conditional(
+        self,
+        date_from: datetime,
+        date_to: datetime,
+        validators: Validators = Validators(),
+        deadline: float | None = None,
+    ) -> tuple[bytes | None, Validators]:
+        """
+        Query the API for the given date range, unless the response identified by the given
+        validators is still current.
+
+        Return the raw body of the response (`None` if it was not modified), and its validators.
+        """
+        start_date_spain: str = normalise_datetime_field(date_from)
+        end_date_spain: str = normalise_datetime_field(date_to)
+        fields: dict[str, Any] = {
+            "start_date": start_date_spain,
+            "end_date": end_date_spain,
+            "time_trunc": self.time_trunc,
+        }
+        parts = urlsplit(self.url)
+        query: str = "&".join(filter(None, (parts.query, urlencode(fields))))
+        url: str = parts._replace(query=query).geturl()
+        logger.debug("Api request (async): %s", url)
+
+        try:
+            async with self._slot(), asyncio.timeout(deadline):
+                response: _Response = await self._request_with_retries(
+                    url, validators.request_headers()
+                )
+        except TimeoutError as e:
+            METRICS.count("api_errors", error="deadline")
+            raise ApiError(f"Deadline exceeded: {url}") from e
+        except asyncio.CancelledError:
+            METRICS.count("api_cancelled")
+            raise
+
+        logger.debug(
+            "Api response (async): %s (status: %s, encoding: %s, size: %d)",
+            url,
+            response.status,
+            response.headers.get("content-encoding", "identity"),
+            len(response.body),
+        )
+
+        response_validators = Validators(
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        )
+        if response.status == 304:
+            # NOTE: The server may omit the validators that didn't change
+            return None, Validators(
+                etag=response_validators.etag or validators.etag,
+                last_modified=response_validators.last_modified or validators.last_modified,
+            )
+
+        if self.record_directory is not None and response.status == 200:
+            await asyncio.to_thread(
+                record_response,
+                self.record_directory,
+                recording_name(start_date_spain, end_date_spain, self.time_trunc),
+                response.body,
+            )
+
+        return response.body, response_validators
+
+    async def get(
+        self, date_from: datetime, date_to: datetime, deadline: float | None = None
+    ) -> list[PriceList]:
+        with METRICS.span("api_get"):
+            raw_response: bytes = await self.fetch(date_from, date_to, deadline)
+            return await asyncio.to_thread(decode_price_lists, raw_response, self.interval)
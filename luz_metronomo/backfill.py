@@ -0,0 +1,107 @@
+"""
+Fill the gaps of the price store over a date range, without starting the user interface.
+
+Days for which complete lists are stored already are skipped, and the lists are stored as soon as
+each chunk is fetched: an interrupted backfill resumes where it stopped when run again.
+"""
+
+import logging
+import sys
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+
+from luz_metronomo.configuration import Configuration
+from luz_metronomo.default import Default
+from luz_metronomo.store import PriceStore, StoreError
+from luz_metronomo.util.api import IncompleteFetchError, iter_price_list_chunks
+from luz_metronomo.util.configuration import api_object, cache_object, store_object
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN, spanish_day_range
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+
+def gap_ranges(days: list[date], chunk_days: int) -> Iterator[tuple[datetime, datetime]]:
+    """
+    Group the given (sorted) days into ranges of consecutive days that last at most `chunk_days`.
+    """
+    index: int = 0
+    while index < len(days):
+        last: int = index
+        while (
+            last + 1 < len(days)
+            and last + 1 - index < chunk_days
+            and days[last + 1] - days[last] == timedelta(days=1)
+        ):
+            last += 1
+        yield spanish_day_range(days[index], days[last])
+        index = last + 1
+
+
+def backfill_price_store(configuration: Configuration, day_from: date, day_to: date) -> int:
+    """
+    Fetch the days of the given (inclusive) range that are missing from the store.
+    """
+    store: PriceStore | None = store_object(configuration.store)
+    if store is None:
+        logger.error("The price store is disabled (`store.enable`)")
+        return 1
+
+    # NOTE: Prices are published one day in advance at most
+    day_last: date = datetime.now(TIMEZONE_SPAIN).date() + timedelta(days=1)
+    if day_to > day_last:
+        logger.warning("Prices are not published past %s, the range is shortened", day_last)
+        day_to = day_last
+
+    api = api_object(configuration.api)
+    interval: int = api.interval
+    try:
+        missing_days: list[date] = store.missing_days(day_from, day_to, interval)
+        amount_days: int = (day_to - day_from).days + 1
+        logger.info(
+            "Backfilling %d day(s) out of %d: %s - %s",
+            len(missing_days),
+            amount_days,
+            day_from,
+            day_to,
+        )
+
+        amount_done: int = amount_days - len(missing_days)
+        try:
+            for chunk_from, chunk_to, _ in iter_price_list_chunks(
+                configuration.api,
+                gap_ranges(missing_days, configuration.api.range.chunk_days),
+                api=api,
+                cache=cache_object(configuration.api.cache),
+                store=store,
+            ):
+                missing_chunk: list[date] = store.missing_days(
+                    chunk_from.date(), chunk_to.date(), interval
+                )
+                amount_done += (chunk_to.date() - chunk_from.date()).days + 1 - len(missing_chunk)
+                print(
+                    f"Backfilled {chunk_from.date()} - {chunk_to.date()}:"
+                    f" {amount_done}/{amount_days} days stored",
+                    file=sys.stderr,
+                    flush=True,
+                )
+        except IncompleteFetchError:
+            # NOTE: The days of the ranges that failed are reported as missing below
+            pass
+
+        missing_days = store.missing_days(day_from, day_to, interval)
+    except StoreError:
+        logger.exception("Unable to backfill the price store", extra={"path": store.path})
+        return 1
+    finally:
+        api.close()
+        store.close()
+
+    if missing_days:
+        logger.warning(
+            "%d day(s) could not be backfilled, run the command again to retry: %s",
+            len(missing_days),
+            ", ".join(day.isoformat() for day in missing_days[:10])
+            + (", …" if len(missing_days) > 10 else ""),
+        )
+        return 1
+    return 0
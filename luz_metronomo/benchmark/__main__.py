@@ -0,0 +1,113 @@
+"""
+Benchmark the processing stages of the price lists, from fetching them to plotting them.
+
+    python -m luz_metronomo.benchmark run -o results.json
+    python -m luz_metronomo.benchmark compare baseline.json results.json --threshold 0.1
+"""
+
+import sys
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+
+from luz_metronomo.benchmark.dataset import DATASETS, Dataset
+from luz_metronomo.benchmark.report import (
+    Comparison,
+    compare_reports,
+    format_comparison,
+    format_measurement,
+    load_report,
+    save_report,
+)
+from luz_metronomo.benchmark.runner import STAGES, Stage, run_benchmarks
+from luz_metronomo.cli_options import positive_int
+from luz_metronomo.default import Default
+
+
+def parse_options(args: list[str]) -> Namespace:
+    parser = ArgumentParser(
+        prog=f"{Default.PROGRAM_NAME}-benchmark",
+        description="Benchmark the processing stages of the price lists",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_run = subparsers.add_parser("run", help="Run the benchmarks")
+    parser_run.add_argument(
+        "-d",
+        "--dataset",
+        action="append",
+        choices=[dataset.name for dataset in DATASETS],
+        help="Dataset to process, may be repeated (default: all)",
+    )
+    parser_run.add_argument(
+        "-s",
+        "--stage",
+        action="append",
+        choices=[stage.name for stage in STAGES],
+        help="Stage to run, may be repeated (default: all)",
+    )
+    parser_run.add_argument(
+        "-r",
+        "--rounds",
+        type=positive_int,
+        default=5,
+        help="Amount of timed rounds of each stage (default: %(default)s)",
+    )
+    parser_run.add_argument("-o", "--output", type=Path, help="Path to the report to write")
+
+    parser_compare = subparsers.add_parser("compare", help="Compare two reports")
+    parser_compare.add_argument("baseline", type=Path, help="Path to the reference report")
+    parser_compare.add_argument("current", type=Path, help="Path to the report to check")
+    parser_compare.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown of a median duration considered a regression"
+        " (default: %(default)s)",
+    )
+
+    return parser.parse_args(args)
+
+
+def run(options: Namespace) -> int:
+    datasets: list[Dataset] = [
+        dataset for dataset in DATASETS if not options.dataset or dataset.name in options.dataset
+    ]
+    stages: list[Stage] = [
+        stage for stage in STAGES if not options.stage or stage.name in options.stage
+    ]
+    measurements = run_benchmarks(
+        datasets,
+        stages,
+        options.rounds,
+        callback=lambda measurement: print(format_measurement(measurement), flush=True),
+    )
+    if options.output is not None:
+        save_report(options.output, measurements, options.rounds)
+    return 0
+
+
+def compare(options: Namespace) -> int:
+    comparisons: list[Comparison] = compare_reports(
+        load_report(options.baseline), load_report(options.current)
+    )
+    for comparison in comparisons:
+        print(format_comparison(comparison, options.threshold))
+    regressions: int = sum(
+        1 for comparison in comparisons if comparison.ratio > 1 + options.threshold
+    )
+    if regressions:
+        print(f"{regressions} regression(s) over the {options.threshold:.0%} threshold")
+        return 1
+    return 0
+
+
+def main(av: list[str]) -> int:
+    options: Namespace = parse_options(av[1:])
+    if options.command == "compare":
+        return compare(options)
+    return run(options)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
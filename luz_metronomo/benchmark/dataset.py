@@ -0,0 +1,50 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from luz_metronomo.util.payload import synthesise_raw_payload
+from luz_metronomo.util.timezone import GMT_PLUS_2
+
+# NOTE: Fixed, so that payloads are identical between runs, and long enough to span a leap day
+# and both changes of daylight saving time
+DATASET_DATE_FROM: datetime = datetime(2024, 1, 1, tzinfo=GMT_PLUS_2)
+DATASET_LAST_UPDATE: datetime = datetime(2023, 12, 31, 20, 15, tzinfo=GMT_PLUS_2)
+
+
+@dataclass
+class Dataset:
+    name: str
+    days: int
+    interval: timedelta
+    raw: bytes = field(default=b"", repr=False)
+
+    @property
+    def date_from(self) -> datetime:
+        return DATASET_DATE_FROM
+
+    @property
+    def date_to(self) -> datetime:
+        return DATASET_DATE_FROM + timedelta(days=self.days, minutes=-1)
+
+    @property
+    def time_trunc(self) -> str:
+        return "hour" if self.interval >= timedelta(hours=1) else "quarter-hour"
+
+    def load(self) -> "Dataset":
+        """
+        Build the payload of the dataset, which the API would return for its date range.
+        """
+        if not self.raw:
+            self.raw = synthesise_raw_payload(
+                self.date_from, self.date_to, self.interval, DATASET_LAST_UPDATE
+            )
+        return self
+
+
+DATASETS: tuple[Dataset, ...] = (
+    Dataset("day-hourly", 1, timedelta(hours=1)),
+    Dataset("day-quarter-hourly", 1, timedelta(minutes=15)),
+    Dataset("month-hourly", 31, timedelta(hours=1)),
+    Dataset("month-quarter-hourly", 31, timedelta(minutes=15)),
+    Dataset("year-hourly", 366, timedelta(hours=1)),
+    Dataset("year-quarter-hourly", 366, timedelta(minutes=15)),
+)
@@ -0,0 +1,94 @@
+import json
+import platform
+import sys
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from luz_metronomo.benchmark.runner import Measurement
+
+REPORT_VERSION: int = 1
+
+
+def save_report(path: Path, measurements: list[Measurement], rounds: int):
+    report: dict[str, Any] = {
+        "version": REPORT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "rounds": rounds,
+        "measurements": [
+            asdict(measurement)
+            | {"median": measurement.median, "throughput": measurement.throughput}
+            for measurement in measurements
+        ],
+    }
+    path.write_text(json.dumps(report, indent=2))
+
+
+def load_report(path: Path) -> list[Measurement]:
+    report: Any = json.loads(path.read_text())
+    if not isinstance(report, dict) or report.get("version") != REPORT_VERSION:
+        raise ValueError(f"Unsupported benchmark report: {path}")
+    return [
+        Measurement(
+            dataset=measurement["dataset"],
+            stage=measurement["stage"],
+            times=measurement["times"],
+            items=measurement["items"],
+            size=measurement["size"],
+            memory_peak=measurement["memory_peak"],
+            memory_retained=measurement["memory_retained"],
+        )
+        for measurement in report["measurements"]
+    ]
+
+
+def format_measurement(measurement: Measurement) -> str:
+    size: str = ""
+    if measurement.size is not None and measurement.median:
+        size = f" {measurement.size / measurement.median / 2**20:9.1f} MiB/s"
+    return (
+        f"{measurement.key:<32} {measurement.median * 1000:10.3f}ms"
+        f" (best {measurement.best * 1000:10.3f}ms)"
+        f" {measurement.throughput:14,.0f} items/s"
+        f" {measurement.memory_peak / 2**10:10,.0f} KiB peak{size}"
+    )
+
+
+@dataclass
+class Comparison:
+    key: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+
+def compare_reports(baseline: list[Measurement], current: list[Measurement]) -> list[Comparison]:
+    """
+    Compare the median durations of the measurements that both reports hold.
+    """
+    baseline_medians: dict[str, float] = {
+        measurement.key: measurement.median for measurement in baseline
+    }
+    return [
+        Comparison(measurement.key, baseline_medians[measurement.key], measurement.median)
+        for measurement in current
+        if measurement.key in baseline_medians
+    ]
+
+
+def format_comparison(comparison: Comparison, threshold: float) -> str:
+    status: str = ""
+    if comparison.ratio > 1 + threshold:
+        status = "REGRESSION"
+    elif comparison.ratio < 1 - threshold:
+        status = "improvement"
+    return (
+        f"{comparison.key:<32} {comparison.baseline * 1000:10.3f}ms"
+        f" -> {comparison.current * 1000:10.3f}ms ({comparison.ratio - 1:+7.1%}) {status}"
+    )
@@ -0,0 +1,262 @@
+import gzip
+import statistics
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from urllib3 import PoolManager, Retry
+
+from luz_metronomo.api import Api, decode_price_lists
+from luz_metronomo.benchmark.dataset import Dataset
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.tariff import TariffCalendar
+from luz_metronomo.util.api import find_price_point_by_datetime, merge_price_lists
+
+# NOTE: Size of the plot rendered by the graph stage, that of a large terminal
+GRAPH_WIDTH: int = 160
+GRAPH_HEIGHT: int = 40
+
+
+@dataclass
+class Measurement:
+    dataset: str
+    stage: str
+    # NOTE: Durations of each round, in seconds
+    times: list[float]
+    # NOTE: Amount of items (points, lookups…) processed by a single round
+    items: int
+    # NOTE: Amount of bytes processed by a single round, when relevant
+    size: int | None = None
+    # NOTE: Peak and retained memory allocated during a single round, in bytes
+    memory_peak: int = 0
+    memory_retained: int = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.dataset}/{self.stage}"
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    @property
+    def best(self) -> float:
+        return min(self.times)
+
+    @property
+    def throughput(self) -> float:
+        """
+        Items processed per second, in the median round.
+        """
+        return self.items / self.median if self.median else 0.0
+
+
+@dataclass
+class Stage:
+    """
+    Step of the processing of a dataset, built from its payload and run once per round.
+    """
+
+    name: str
+    # NOTE: Return the function to time, and the amount of items and bytes it processes
+    setup: Callable[[Dataset, "Context"], tuple[Callable[[], object], int, int | None]]
+
+
+@dataclass
+class Context:
+    url: str
+    pool_manager: PoolManager = field(default_factory=lambda: PoolManager(maxsize=1))
+
+
+def _payload_handler(dataset: Dataset) -> type[BaseHTTPRequestHandler]:
+    raw_gzip: bytes = gzip.compress(dataset.raw, compresslevel=6)
+
+    class PayloadHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # NOTE: Otherwise small responses are held back by delayed acknowledgements
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            body: bytes = dataset.raw
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = raw_gzip
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return PayloadHandler
+
+
+@contextmanager
+def serve_dataset(dataset: Dataset) -> Iterator[str]:
+    """
+    Serve the payload of the dataset over HTTP on the loopback interface, and yield its URL.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _payload_handler(dataset))
+    thread = threading.Thread(target=server.serve_forever, name="benchmark-server", daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _setup_fetch(dataset: Dataset, context: Context):
+    api = Api(
+        context.url,
+        retry=Retry(0),
+        time_trunc=dataset.time_trunc,
+        pool_manager=context.pool_manager,
+    )
+    price_lists: list[PriceList] = decode_price_lists(dataset.raw)
+    return (
+        (lambda: api.fetch(dataset.date_from, dataset.date_to)),
+        sum(len(price_list) for price_list in price_lists),
+        len(dataset.raw),
+    )
+
+
+def _setup_decode(dataset: Dataset, context: Context):
+    price_lists: list[PriceList] = decode_price_lists(dataset.raw)
+    return (
+        (lambda: decode_price_lists(dataset.raw)),
+        sum(len(price_list) for price_list in price_lists),
+        len(dataset.raw),
+    )
+
+
+def _setup_merge(dataset: Dataset, context: Context):
+    price_lists: list[PriceList] = decode_price_lists(dataset.raw)
+    return (
+        (lambda: merge_price_lists(price_lists, dataset.date_from, dataset.date_to)),
+        sum(len(price_list) for price_list in price_lists),
+        None,
+    )
+
+
+def _setup_index(dataset: Dataset, context: Context):
+    price_list: PriceList = decode_price_lists(dataset.raw)[0]
+    # NOTE: Look up the middle of every point, as the rulers of the graph do with the current time
+    half_interval: timedelta = dataset.interval / 2
+    datetimes: list[datetime] = [
+        price_point.datetime + half_interval for price_point in price_list.price_points
+    ]
+
+    def index():
+        for the_datetime in datetimes:
+            find_price_point_by_datetime(price_list, the_datetime)
+
+    return index, len(datetimes), None
+
+
+def _setup_tariff(dataset: Dataset, context: Context):
+    price_list: PriceList = decode_price_lists(dataset.raw)[0]
+    # NOTE: A new calendar every round, so that the types of days are not memoised already
+    return (
+        (lambda: TariffCalendar().classify(price_list.timestamps, price_list.offsets)),
+        len(price_list),
+        None,
+    )
+
+
+def _setup_graph(dataset: Dataset, context: Context):
+    # NOTE: The user interface is only imported when graphs are benchmarked
+    from textual._context import active_app
+    from textual.app import App
+
+    from luz_metronomo.textual import PriceListGraph
+
+    # NOTE: Widgets expect an application, which doesn't need to run to plot a graph
+    active_app.set(App())
+    price_list: PriceList = decode_price_lists(dataset.raw)[0]
+    graph = PriceListGraph(price_list, "braille", (255, 0, 0), None, None)
+
+    def render():
+        graph._set_price_list(price_list)
+        graph._draw()
+        graph.plt.plotsize(GRAPH_WIDTH, GRAPH_HEIGHT)
+        return graph.plt.build()
+
+    return render, len(price_list), None
+
+
+STAGES: tuple[Stage, ...] = (
+    Stage("fetch", _setup_fetch),
+    Stage("decode", _setup_decode),
+    Stage("merge", _setup_merge),
+    Stage("index", _setup_index),
+    Stage("tariff", _setup_tariff),
+    Stage("graph", _setup_graph),
+)
+
+
+def measure_memory(function: Callable[[], object]) -> tuple[int, int]:
+    """
+    Return the peak and retained amount of memory allocated by a single call of the function.
+
+    Tracing slows allocations down significantly, so this is measured apart from the timings.
+    """
+    tracemalloc.start()
+    try:
+        result: object = function()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak, retained
+
+
+def run_stage(dataset: Dataset, stage: Stage, context: Context, rounds: int) -> Measurement:
+    function, items, size = stage.setup(dataset, context)
+    # NOTE: Warm up caches, connections and lazy imports
+    function()
+    times: list[float] = []
+    for _ in range(rounds):
+        time_start: float = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - time_start)
+    memory_peak, memory_retained = measure_memory(function)
+    return Measurement(
+        dataset=dataset.name,
+        stage=stage.name,
+        times=times,
+        items=items,
+        size=size,
+        memory_peak=memory_peak,
+        memory_retained=memory_retained,
+    )
+
+
+def run_benchmarks(
+    datasets: list[Dataset],
+    stages: list[Stage],
+    rounds: int,
+    callback: Callable[[Measurement], None] | None = None,
+) -> list[Measurement]:
+    """
+    Run every stage on every dataset, with the given amount of timed rounds.
+    """
+    measurements: list[Measurement] = []
+    for dataset in datasets:
+        dataset.load()
+        with serve_dataset(dataset) as url:
+            context = Context(url)
+            for stage in stages:
+                measurement: Measurement = run_stage(dataset, stage, context, rounds)
+                measurements.append(measurement)
+                if callback is not None:
+                    callback(measurement)
+            context.pool_manager.clear()
+    return measurements
@@ -0,0 +1,262 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from luz_metronomo.default import Default
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.validators import Validators
+from luz_metronomo.util.timezone import GMT_PLUS_2
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    """
+    Identify a single request sent to the API.
+
+    The dates are expected to be normalised the same way they are sent to the endpoint.
+    """
+
+    url: str
+    date_from: str
+    date_to: str
+    time_trunc: str
+
+    def digest(self) -> str:
+        return hashlib.sha256(
+            "\0".join((self.url, self.date_from, self.date_to, self.time_trunc)).encode("utf-8")
+        ).hexdigest()
+
+    def is_settled(self, now: datetime | None = None) -> bool:
+        """
+        Whether the range ends before the current day, in which case the prices it holds will
+        never change again.
+        """
+        if now is None:
+            now = datetime.now(GMT_PLUS_2)
+        today: datetime = now.astimezone(GMT_PLUS_2).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        return datetime.fromisoformat(self.date_to).replace(tzinfo=GMT_PLUS_2) < today
+
+
+def response_digest(raw_response: bytes) -> str:
+    return hashlib.sha256(raw_response).hexdigest()
+
+
+@dataclass
+class StaleEntry:
+    """
+    Response held by the cache regardless of its freshness, to be revalidated.
+    """
+
+    # NOTE: Set when the entry is held in memory, otherwise the raw response is
+    price_lists: list[PriceList] | None
+    raw_response: bytes | None
+    validators: Validators
+
+
+class PriceCache:
+    """
+    Two-tier cache of API responses: a bounded in-memory LRU of parsed price lists, backed by a
+    bounded on-disk store of raw responses.
+
+    Responses that cover past days are kept until evicted, the others expire after `ttl` seconds.
+    Expired responses are kept along with their validators, so that they can be revalidated
+    instead of downloaded again (see `get_stale` and `touch`).
+    """
+
+    def __init__(self, memory_size: int, disk_size: int, ttl: float, path: Path | None = None):
+        self.memory_size: int = memory_size
+        self.disk_size: int = disk_size
+        self.ttl: float = ttl
+        self.path: Path | None = path if disk_size > 0 else None
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[CacheKey, tuple[float, list[PriceList], Validators]] = (
+            OrderedDict()
+        )
+
+    def _is_fresh(self, key: CacheKey, timestamp: float) -> bool:
+        return key.is_settled() or time.time() - timestamp < self.ttl
+
+    def _path_entry(self, key: CacheKey) -> Path:
+        assert self.path is not None
+        return self.path / f"{key.digest()}.json"
+
+    @staticmethod
+    def _path_validators(path_entry: Path) -> Path:
+        return path_entry.with_suffix(".validators")
+
+    def get(self, key: CacheKey) -> list[PriceList] | None:
+        """
+        Return the price lists held in memory for the given key, if any and still fresh.
+        """
+        with self._lock:
+            if (entry := self._memory.get(key)) is None:
+                return None
+            timestamp, price_lists, _ = entry
+            if not self._is_fresh(key, timestamp):
+                logger.debug("Memory cache entry expired: %s", key)
+                return None
+            self._memory.move_to_end(key)
+            return price_lists
+
+    def set(
+        self, key: CacheKey, price_lists: list[PriceList], validators: Validators = Validators()
+    ):
+        with self._lock:
+            self._memory[key] = (time.time(), price_lists, validators)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                evicted_key, _ = self._memory.popitem(last=False)
+                logger.debug("Memory cache entry evicted: %s", evicted_key)
+
+    def get_raw(self, key: CacheKey) -> bytes | None:
+        """
+        Return the raw response stored on disk for the given key, if any and still fresh.
+        """
+        if self.path is None:
+            return None
+
+        path_entry: Path = self._path_entry(key)
+        try:
+            timestamp: float = path_entry.stat().st_mtime
+            if not self._is_fresh(key, timestamp):
+                logger.debug("Disk cache entry expired: %s", key)
+                return None
+            raw_response: bytes = path_entry.read_bytes()
+            # NOTE: Only the access time is bumped, the modification time is used for expiry
+            os.utime(path_entry, (time.time(), timestamp))
+        except FileNotFoundError:
+            return None
+        except OSError:
+            logger.exception("Unable to read disk cache entry", extra={"path": path_entry})
+            return None
+
+        return raw_response
+
+    def set_raw(self, key: CacheKey, raw_response: bytes, validators: Validators = Validators()):
+        if self.path is None:
+            return
+
+        path_entry: Path = self._path_entry(key)
+        path_entry_tmp: Path = path_entry.with_suffix(f".{os.getpid()}.{threading.get_ident()}")
+        path_validators: Path = self._path_validators(path_entry)
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            # NOTE: Former validators are removed first, never to be paired with a new response
+            path_validators.unlink(missing_ok=True)
+            path_entry_tmp.write_bytes(raw_response)
+            os.replace(path_entry_tmp, path_entry)
+            if validators.etag is not None or validators.last_modified is not None:
+                path_validators.write_text(
+                    json.dumps({"etag": validators.etag, "last-modified": validators.last_modified})
+                )
+        except OSError:
+            logger.exception("Unable to write disk cache entry", extra={"path": path_entry})
+            path_entry_tmp.unlink(missing_ok=True)
+            return
+
+        self._evict_disk()
+
+    def get_stale(self, key: CacheKey) -> StaleEntry | None:
+        """
+        Return the response held for the given key whether it is fresh or not, along with its
+        validators.
+        """
+        with self._lock:
+            if (entry := self._memory.get(key)) is not None:
+                _, price_lists, validators = entry
+                return StaleEntry(price_lists, None, validators)
+
+        if self.path is None:
+            return None
+
+        path_entry: Path = self._path_entry(key)
+        try:
+            raw_response: bytes = path_entry.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            logger.exception("Unable to read disk cache entry", extra={"path": path_entry})
+            return None
+
+        return StaleEntry(
+            None,
+            raw_response,
+            replace(self._read_validators(path_entry), digest=response_digest(raw_response)),
+        )
+
+    def get_validators(self, key: CacheKey) -> Validators:
+        """
+        Return the validators of the response held on disk for the given key, if any.
+        """
+        if self.path is None:
+            return Validators()
+        return self._read_validators(self._path_entry(key))
+
+    def _read_validators(self, path_entry: Path) -> Validators:
+        path_validators: Path = self._path_validators(path_entry)
+        try:
+            validators_data: Any = json.loads(path_validators.read_text())
+            return Validators(
+                etag=validators_data.get("etag"),
+                last_modified=validators_data.get("last-modified"),
+            )
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError):
+            logger.warning("Ignoring invalid disk cache validators: %s", path_validators)
+        return Validators()
+
+    def touch(self, key: CacheKey):
+        """
+        Mark the response held for the given key as fresh again, once revalidated.
+        """
+        now: float = time.time()
+        with self._lock:
+            if (entry := self._memory.get(key)) is not None:
+                self._memory[key] = (now, *entry[1:])
+                self._memory.move_to_end(key)
+
+        if self.path is not None:
+            try:
+                os.utime(self._path_entry(key), (now, now))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                logger.exception("Unable to touch disk cache entry", extra={"key": key})
+
+    def discard(self, key: CacheKey):
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.path is not None:
+            path_entry: Path = self._path_entry(key)
+            path_entry.unlink(missing_ok=True)
+            self._path_validators(path_entry).unlink(missing_ok=True)
+
+    def _evict_disk(self):
+        assert self.path is not None
+        try:
+            # NOTE: Least recently used entries are evicted first
+            path_entries: list[tuple[float, Path]] = sorted(
+                (path_entry.stat().st_atime, path_entry) for path_entry in self.path.glob("*.json")
+            )
+        except OSError:
+            logger.exception("Unable to list disk cache entries", extra={"path": self.path})
+            return
+
+        for _, path_entry in path_entries[: max(0, len(path_entries) - self.disk_size)]:
+            logger.debug("Disk cache entry evicted: %s", path_entry)
+            path_entry.unlink(missing_ok=True)
+            self._path_validators(path_entry).unlink(missing_ok=True)
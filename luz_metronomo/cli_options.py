@@ -1,6 +1,62 @@
-from argparse import ArgumentParser, Namespace
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from datetime import datetime
+from pathlib import Path
 
 from luz_metronomo.default import Default
+from luz_metronomo.entity.export_format import ExportFormat
+from luz_metronomo.entity.statistics_grouping import StatisticsGrouping
+from luz_metronomo.entity.time_trunc import TimeTrunc
+
+
+def positive_int(value: str) -> int:
+    try:
+        the_value: int = int(value)
+    except ValueError as e:
+        raise ArgumentTypeError(f"invalid integer value: {value!r}") from e
+    if the_value <= 0:
+        raise ArgumentTypeError(f"not a strictly positive integer: {value!r}")
+    return the_value
+
+
+def non_negative_float(value: str) -> float:
+    try:
+        the_value: float = float(value)
+    except ValueError as e:
+        raise ArgumentTypeError(f"invalid number: {value!r}") from e
+    if not the_value >= 0.0:
+        raise ArgumentTypeError(f"not a positive number: {value!r}")
+    return the_value
+
+
+def probability(value: str) -> float:
+    the_value: float = non_negative_float(value)
+    if the_value > 1.0:
+        raise ArgumentTypeError(f"not a probability between 0 and 1: {value!r}")
+    return the_value
+
+
+def date_ymd(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError as e:
+        raise ArgumentTypeError(f"invalid date (expected YYYY-MM-DD): {value!r}") from e
+
+
+def load_spec(value: str) -> dict[str, str | bool]:
+    """
+    Parse the description of a load as comma separated `key=value` pairs, with the keys of the
+    `planner.loads` configuration, e.g. `name=dishwasher,duration=2,power=1.8,exclusive`.
+    """
+    spec: dict[str, str | bool] = {}
+    for pair in value.split(","):
+        key, separator, field_value = pair.partition("=")
+        if not key.strip():
+            raise ArgumentTypeError(f"invalid load description: {value!r}")
+        if not separator or field_value.lower() in ("true", "false"):
+            spec[key.strip()] = not separator or field_value.lower() == "true"
+        else:
+            spec[key.strip()] = field_value.strip()
+    return spec
 
 
 class CliOptions(Namespace):
@@ -17,6 +73,232 @@ class CliOptions(Namespace):
         parser.add_argument(
             "-v", "--verbose", action="store_true", help="Display informational messages"
         )
+        parser.add_argument(
+            "--startup-profile",
+            action="store_true",
+            help="Display how long importing the modules of the command takes, and exit",
+        )
         parser.add_argument("-c", "--configuration", help="Path to the configuration file to load")
+        parser.add_argument(
+            "--date",
+            type=date_ymd,
+            help="First day of the date range to display (YYYY-MM-DD, default: today)",
+        )
+        parser.add_argument(
+            "--days",
+            type=positive_int,
+            default=1,
+            help="Amount of days in the date range to display (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--time-trunc",
+            choices=[time_trunc.value for time_trunc in TimeTrunc],
+            help="Granularity of the prices to request (default: `api.time-trunc`)",
+        )
+
+        subparsers = parser.add_subparsers(dest="command", title="commands")
+
+        parser_export = subparsers.add_parser(
+            "export", help="Export the price lists of a date range, without user interface"
+        )
+        parser_export.add_argument(
+            "--date-from",
+            type=date_ymd,
+            required=True,
+            help="First day of the date range to export (YYYY-MM-DD)",
+        )
+        parser_export.add_argument(
+            "--date-to",
+            type=date_ymd,
+            required=True,
+            help="Last day of the date range to export (YYYY-MM-DD)",
+        )
+        parser_export.add_argument(
+            "-f",
+            "--format",
+            choices=[export_format.value for export_format in ExportFormat],
+            default=ExportFormat.Csv.value,
+            help="Format of the exported data (default: %(default)s)",
+        )
+        parser_export.add_argument(
+            "-o",
+            "--output",
+            default="-",
+            help="Path to the file to write, `-` for the standard output (default: %(default)s)",
+        )
+        parser_export.add_argument(
+            "--from-store",
+            action="store_true",
+            help="Read the price lists from the local store (see the `backfill` command) instead of"
+            " fetching them",
+        )
+        parser_export.add_argument(
+            "--hourly",
+            action="store_true",
+            help="Export the hourly means of the prices (e.g. of quarter-hour ones)",
+        )
+
+        parser_backfill = subparsers.add_parser(
+            "backfill", help="Fetch the days of a date range that are missing from the local store"
+        )
+        parser_backfill.add_argument(
+            "--date-from",
+            type=date_ymd,
+            required=True,
+            help="First day of the date range to backfill (YYYY-MM-DD)",
+        )
+        parser_backfill.add_argument(
+            "--date-to",
+            type=date_ymd,
+            required=True,
+            help="Last day of the date range to backfill (YYYY-MM-DD)",
+        )
+
+        parser_stats = subparsers.add_parser(
+            "stats", help="Report statistics of the price lists of a date range"
+        )
+        parser_stats.add_argument(
+            "--date-from",
+            type=date_ymd,
+            required=True,
+            help="First day of the date range to summarise (YYYY-MM-DD)",
+        )
+        parser_stats.add_argument(
+            "--date-to",
+            type=date_ymd,
+            required=True,
+            help="Last day of the date range to summarise (YYYY-MM-DD)",
+        )
+        parser_stats.add_argument(
+            "-g",
+            "--group-by",
+            action="append",
+            choices=[grouping.value for grouping in StatisticsGrouping],
+            help="Also report the statistics of each group of points, can be repeated"
+            " (default: period)",
+        )
+        parser_stats.add_argument(
+            "--json",
+            action="store_true",
+            help="Write a JSON object per line instead of a table per list",
+        )
+        parser_stats.add_argument(
+            "--from-store",
+            action="store_true",
+            help="Read the price lists from the local store (see the `backfill` command) instead of"
+            " fetching them",
+        )
+
+        parser_plan = subparsers.add_parser(
+            "plan", help="Schedule loads at the lowest cost over the prices of a date range"
+        )
+        parser_plan.add_argument(
+            "--date-from",
+            type=date_ymd,
+            required=True,
+            help="First day of the date range to plan over (YYYY-MM-DD)",
+        )
+        parser_plan.add_argument(
+            "--date-to",
+            type=date_ymd,
+            help="Last day of the date range to plan over (YYYY-MM-DD, default: `--date-from`)",
+        )
+        parser_plan.add_argument(
+            "-l",
+            "--load",
+            dest="loads",
+            action="append",
+            type=load_spec,
+            help="Load to plan instead of the configured ones (`planner.loads`), as comma"
+            " separated `key=value` pairs, e.g. `name=dishwasher,duration=2,power=1.8`, can be"
+            " repeated",
+        )
+        parser_plan.add_argument(
+            "--max-power",
+            type=non_negative_float,
+            help="Maximum total power (in kW) of the loads running at the same time"
+            " (default: `planner.max-power`)",
+        )
+        parser_plan.add_argument(
+            "--price-list",
+            help="Title of the price list to plan over (default: `planner.price-list`)",
+        )
+        parser_plan.add_argument(
+            "--json",
+            action="store_true",
+            help="Write a JSON object per planned load instead of a table",
+        )
+        parser_plan.add_argument(
+            "--from-store",
+            action="store_true",
+            help="Read the price lists from the local store (see the `backfill` command) instead of"
+            " fetching them",
+        )
+
+        parser_serve = subparsers.add_parser(
+            "serve", help="Run a local stand-in for the API, with optional fault injection"
+        )
+        parser_serve.add_argument(
+            "--host", default="127.0.0.1", help="Address to listen on (default: %(default)s)"
+        )
+        parser_serve.add_argument(
+            "--port", type=int, default=8080, help="Port to listen on (default: %(default)s)"
+        )
+        parser_serve.add_argument(
+            "--replay-directory",
+            type=Path,
+            help="Directory of responses recorded by the client (`api.record-directory`) to replay",
+        )
+        parser_serve.add_argument(
+            "--replay-only",
+            action="store_true",
+            help="Respond with an error to requests that weren't recorded, instead of synthesising"
+            " a response",
+        )
+        parser_serve.add_argument(
+            "--latency",
+            type=non_negative_float,
+            default=0.0,
+            help="Seconds to wait before responding (default: %(default)s)",
+        )
+        parser_serve.add_argument(
+            "--latency-jitter",
+            type=non_negative_float,
+            default=0.0,
+            help="Upper bound of a random amount of seconds added to the latency"
+            " (default: %(default)s)",
+        )
+        parser_serve.add_argument(
+            "--error-rate",
+            type=probability,
+            default=0.0,
+            help="Probability of responding with a server error (default: %(default)s)",
+        )
+        parser_serve.add_argument(
+            "--truncate-rate",
+            type=probability,
+            default=0.0,
+            help="Probability of closing the connection halfway through a body"
+            " (default: %(default)s)",
+        )
+        parser_serve.add_argument(
+            "--throttle-rate",
+            type=non_negative_float,
+            help="Requests per second over which requests are rejected with a 429 status",
+        )
+        parser_serve.add_argument(
+            "--drip-rate",
+            type=positive_int,
+            help="Bytes per second at which bodies are written",
+        )
+        parser_serve.add_argument(
+            "--seed", type=int, help="Seed of the random faults, to reproduce a run"
+        )
+        parser_serve.add_argument(
+            "--no-validators",
+            dest="validators",
+            action="store_false",
+            help="Send no `ETag` and `Last-Modified` headers, and ignore conditional requests",
+        )
 
         parser.parse_args(args, self)
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from concurrent.futures import Future
+from typing import Any, TypeVar
+
+from luz_metronomo.default import Default
+from luz_metronomo.metrics import METRICS
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+T = TypeVar("T")
+
+# NOTE: Result of a request whose caller was cancelled or failed, which the callers waiting for it
+# have to send again themselves
+_ABANDONED: Any = object()
+
+
+class RequestCoalescer:
+    """
+    Share a request between all the callers that need it while it is in flight, so that at most
+    one request per key is sent at any time.
+
+    Callers may run in threads (e.g. prefetching) as well as on an event loop (e.g. the user
+    interface), and wait for each other's requests either way.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: dict[Hashable, Future] = {}
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        """
+        Return the future of the request in flight for the given key, and whether the caller has
+        to send it.
+        """
+        with self._lock:
+            if (future := self._in_flight.get(key)) is not None:
+                METRICS.count("requests_coalesced")
+                logger.debug("Waiting for the request in flight: %s", key)
+                return future, False
+            future = self._in_flight[key] = Future()
+            # NOTE: Running futures can't be cancelled by the callers waiting for them
+            future.set_running_or_notify_cancel()
+            return future, True
+
+    def _leave(self, key: Hashable, future: Future, result: Any):
+        with self._lock:
+            del self._in_flight[key]
+        future.set_result(result)
+
+    def run(self, key: Hashable, function: Callable[[], T]) -> T:
+        while True:
+            future, owner = self._join(key)
+            if not owner:
+                if (result := future.result()) is not _ABANDONED:
+                    return result
+                continue
+
+            result = _ABANDONED
+            try:
+                result = function()
+                return result
+            finally:
+                self._leave(key, future, result)
+
+    async def run_async(self, key: Hashable, function: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            future, owner = self._join(key)
+            if not owner:
+                if (result := await asyncio.wrap_future(future)) is not _ABANDONED:
+                    return result
+                continue
+
+            result = _ABANDONED
+            try:
+                result = await function()
+                return result
+            finally:
+                self._leave(key, future, result)
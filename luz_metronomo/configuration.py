@@ -1,20 +1,24 @@
+from datetime import date, time
+from pathlib import Path
+
 from pydantic import (
     AnyHttpUrl,
     BaseModel,
     Field,
     NonNegativeFloat,
     NonNegativeInt,
+    PositiveFloat,
     PositiveInt,
     StrictBool,
     StrictStr,
     field_validator,
 )
-from textual.constants import DEVTOOLS_HOST, DEVTOOLS_PORT
 from urllib3.util import Retry as UrllibRetry
 
 from luz_metronomo.default import Default
 from luz_metronomo.entity.datetime_format import DatetimeFormat
 from luz_metronomo.entity.textual_theme import TextualTheme
+from luz_metronomo.entity.time_trunc import TimeTrunc
 from luz_metronomo.util.enum import name_to_enum
 
 
@@ -26,16 +30,16 @@ class DevelopmentServer(BaseModel):
         The development server may be provided by a different package, which must be installed prior to enabling this option.
     """,
     )
-    host: StrictStr = Field(
-        default=DEVTOOLS_HOST,
+    host: StrictStr | None = Field(
+        default=None,
         description="""
-        Hostname on which the development server is running.
+        Hostname on which the development server is running (default: Textual's default).
     """,
     )
-    port: PositiveInt = Field(
-        default=DEVTOOLS_PORT,
+    port: PositiveInt | None = Field(
+        default=None,
         description="""
-        Port on which the development server is running.
+        Port on which the development server is running (default: Textual's default).
     """,
     )
 
@@ -45,6 +49,77 @@ class LuzMetronomo(BaseModel):
     development_server: DevelopmentServer = Field(
         default_factory=DevelopmentServer, alias="development-server"
     )
+    metrics_file: Path | None = Field(
+        default=None,
+        alias="metrics-file",
+        description="""
+        Path to a file to which timings and counters are written, in the Prometheus text format (e.g. for the textfile collector of the node exporter).
+        The file is written on exit, and regularly while the user interface is running.
+        Set to `None` (or remove from configuration completely) to disable writing metrics.
+    """,
+    )
+    metrics_interval: PositiveFloat = Field(
+        default=15.0,
+        alias="metrics-interval",
+        description="""
+        Amount of seconds between two writes of the metrics file, while the user interface is running.
+    """,
+    )
+
+
+class Backoff(BaseModel):
+    factor: NonNegativeFloat = Field(
+        default=1.0,
+        description="""
+        A backoff factor to apply between attempts after the second try.
+        Formula: {backoff factor} * (2 ** ({number of previous retries})).
+        Disable with a value of `0.0`.
+    """,
+    )
+    max: NonNegativeFloat = Field(
+        default=0.0,
+        description="""
+        Amount of seconds not to exceed when waiting between retries (with backoff).
+        Disable with a value of `0.0`.
+    """,
+    )
+    jitter: NonNegativeFloat = Field(
+        default=1.0,
+        description="""
+        Amount of seconds that will be the upper range for random jitter applied to pauses between retries (with backoff).
+        Formula: random.uniform(0, {backoff jitter})
+        Disable with a value of `0.0`.
+    """,
+    )
+
+
+class Refresh(BaseModel):
+    poll: StrictBool = Field(
+        default=True,
+        description="""
+        Whether to poll for the prices of the following day around the time they are published, and refresh the displayed lists once they are.
+    """,
+    )
+    publication_time: time = Field(
+        default=time(20, 15),
+        alias="publication-time",
+        description="""
+        Local (Spanish) time at which the prices of the following day are usually published.
+    """,
+    )
+    publication_window: PositiveFloat = Field(
+        default=7200.0,
+        alias="publication-window",
+        description="""
+        Amount of seconds after `publication-time` during which the prices of the following day are polled for, until they are published.
+    """,
+    )
+    backoff: Backoff = Field(
+        default=Backoff(factor=60.0, max=900.0, jitter=30.0),
+        description="""
+        Pauses between two attempts at polling for the prices of the following day.
+    """,
+    )
 
 
 # FIXME: Document.
@@ -91,38 +166,40 @@ class UserInterface(BaseModel):
         alias="dark-plot-theme",
     )
 
-    @field_validator("dark_theme", "light_theme")
-    @classmethod
-    def validate_theme(cls, value: str | TextualTheme) -> TextualTheme:
-        if isinstance(value, str):
-            return name_to_enum(value, TextualTheme, case_insensitive=True)
-        return value
-
-
-class Backoff(BaseModel):
-    factor: NonNegativeFloat = Field(
-        default=1.0,
+    prefetch_days: NonNegativeInt = Field(
+        default=1,
+        alias="prefetch-days",
         description="""
-        A backoff factor to apply between attempts after the second try.
-        Formula: {backoff factor} * (2 ** ({number of previous retries})).
-        Disable with a value of `0.0`.
+        Amount of days before and after the displayed date range to fetch in the background, so that moving to them is instant.
+        The following day is also prefetched, once published.
+        Set to `0` to disable prefetching.
+        Ignored if the API cache is disabled.
     """,
     )
-    max: NonNegativeFloat = Field(
-        default=0.0,
+    prefetch_queue_size: PositiveInt = Field(
+        default=8,
+        alias="prefetch-queue-size",
         description="""
-        Amount of seconds not to exceed when waiting between retries (with backoff).
-        Disable with a value of `0.0`.
+        Maximum amount of date ranges waiting to be prefetched.
     """,
     )
-    jitter: NonNegativeFloat = Field(
-        default=1.0,
+
+    follow_today: StrictBool = Field(
+        default=True,
+        alias="follow-today",
         description="""
-        Amount of seconds that will be the upper range for random jitter applied to pauses between retries (with backoff).
-        Formula: random.uniform(0, {backoff jitter})
-        Disable with a value of `0.0`.
+        Whether to move the displayed date range to the following day at midnight, when it starts on the current day.
+        Can be toggled from the user interface.
     """,
     )
+    refresh: Refresh = Field(default_factory=Refresh)
+
+    @field_validator("dark_theme", "light_theme")
+    @classmethod
+    def validate_theme(cls, value: str | TextualTheme) -> TextualTheme:
+        if isinstance(value, str):
+            return name_to_enum(value, TextualTheme, case_insensitive=True)
+        return value
 
 
 class Retry(BaseModel):
@@ -220,6 +297,86 @@ class Timeout(BaseModel):
     )
 
 
+class Pool(BaseModel):
+    num_pools: PositiveInt = Field(
+        default=2,
+        alias="num-pools",
+        description="""
+        Maximum amount of connection pools (one per host) to keep around.
+    """,
+    )
+    maxsize: PositiveInt = Field(
+        default=4,
+        description="""
+        Maximum amount of connections to a single host kept alive for reuse.
+    """,
+    )
+    block: StrictBool = Field(
+        default=False,
+        description="""
+        Whether to wait for a connection to be released when `maxsize` connections are in use.
+        Otherwise, additional connections are opened but not kept alive once released.
+    """,
+    )
+
+
+class Range(BaseModel):
+    chunk_days: PositiveInt = Field(
+        default=7,
+        alias="chunk-days",
+        description="""
+        Maximum amount of days requested from the API at once.
+        Longer date ranges are split into several requests.
+    """,
+    )
+    max_workers: PositiveInt = Field(
+        default=4,
+        alias="max-workers",
+        description="""
+        Maximum amount of requests sent concurrently when fetching a long date range.
+    """,
+    )
+
+
+class Cache(BaseModel):
+    enable: StrictBool = Field(
+        default=True,
+        description="""
+        Whether to cache the responses returned by the API.
+    """,
+    )
+    memory_size: PositiveInt = Field(
+        default=64,
+        alias="memory-size",
+        description="""
+        Maximum amount of responses to keep in memory, once parsed.
+        The least recently used responses are evicted first.
+    """,
+    )
+    disk_size: NonNegativeInt = Field(
+        default=1024,
+        alias="disk-size",
+        description="""
+        Maximum amount of raw responses to keep on disk.
+        The least recently used responses are evicted first.
+        Set to `0` to disable the on-disk cache.
+    """,
+    )
+    ttl: NonNegativeFloat = Field(
+        default=900.0,
+        description="""
+        Amount of seconds after which a response that covers the current day (or a later one) has to be fetched again.
+        Responses that only cover past days never expire.
+    """,
+    )
+    path: Path = Field(
+        default=Default.PATH_DIR_USER_CACHE / "api",
+        description="""
+        Path to the directory in which raw responses are stored.
+    """,
+    )
+
+
 # FIXME: Document.
 class Api(BaseModel):
     # TODO: Customise request methods, parameters, formats…
@@ -228,6 +385,39 @@ class Api(BaseModel):
     )
     retry: Retry = Retry()
     timeout: Timeout = Timeout()
+    pool: Pool = Pool()
+    deadline: PositiveFloat | None = Field(
+        default=None,
+        description="""
+        Maximum amount of time (in seconds) that fetching the prices over a date range may take in the terminal interface, retries included.
+        Unlike the timeouts, which apply to each attempt, it bounds a fetch that keeps being retried.
+        Set to `None` (or remove from configuration completely) to only rely on the timeouts and retry counts.
+    """,
+    )
+    compression: StrictBool = Field(
+        default=True,
+        description="""
+        Whether to request compressed responses (gzip, deflate, and brotli when the module is installed).
+    """,
+    )
+    time_trunc: TimeTrunc = Field(
+        default=TimeTrunc.Hour,
+        alias="time-trunc",
+        description="""
+        Granularity of the prices requested from the API, one of `hour` or `quarter-hour` (which the market has been settled at since October 2025).
+        Hourly means of quarter-hour prices can be displayed without requesting them again.
+    """,
+    )
+    range: Range = Range()
+    cache: Cache = Cache()
+    record_directory: Path | None = Field(
+        default=None,
+        alias="record-directory",
+        description="""
+        Path to a directory in which to record the responses returned by the API, so that the stand-in server (`serve` command) can replay them.
+        Set to `None` (or remove from configuration completely) to disable recording.
+    """,
+    )
     datetime_format: DatetimeFormat = Field(
         default=DatetimeFormat.Iso,
     )
@@ -235,7 +425,107 @@ class Api(BaseModel):
     # FIXME: field_validator for `datetime_format`
 
 
+class Store(BaseModel):
+    enable: StrictBool = Field(
+        default=True,
+        description="""
+        Whether to keep the history of the price lists fetched from the API in a local database.
+    """,
+    )
+    path: Path = Field(
+        default=Default.PATH_DIR_USER_DATA / "prices.sqlite3",
+        description="""
+        Path to the SQLite database in which the price lists are stored.
+    """,
+    )
+    geography: StrictStr = Field(
+        default="peninsular",
+        description="""
+        Name of the geographical area that the prices returned by the API (`api.url`) apply to, stored along with them.
+    """,
+    )
+
+
+class Tariff(BaseModel):
+    national_holidays: StrictBool = Field(
+        default=True,
+        alias="national-holidays",
+        description="""
+        Whether to consider non-movable national holidays as “valle” all day long, like weekends.
+    """,
+    )
+    holidays: list[date] = Field(
+        default_factory=list,
+        description="""
+        Additional days (e.g. regional holidays) to consider as “valle” all day long, like weekends.
+    """,
+    )
+
+
+class PlannedLoad(BaseModel):
+    name: StrictStr = Field(
+        description="""
+        Name of the load, e.g. the appliance.
+    """,
+    )
+    duration: PositiveFloat = Field(
+        description="""
+        Amount of hours the load runs for, without interruption.
+    """,
+    )
+    power: PositiveFloat = Field(
+        description="""
+        Power (in kW) drawn by the load while it runs.
+    """,
+    )
+    earliest_start: time | None = Field(
+        default=None,
+        alias="earliest-start",
+        description="""
+        Local (Spanish) time on the first day of the planned range before which the load can't start, if any.
+    """,
+    )
+    deadline: time | None = Field(
+        default=None,
+        description="""
+        Local (Spanish) time by which the load must be done, if any, on the first day of the planned range (or the following one when earlier than `earliest-start`).
+    """,
+    )
+    exclusive: StrictBool = Field(
+        default=False,
+        description="""
+        Whether the load must not run at the same time as any other exclusive load, e.g. because they share a circuit.
+    """,
+    )
+
+
+class Planner(BaseModel):
+    loads: list[PlannedLoad] = Field(
+        default_factory=list,
+        description="""
+        Loads to schedule at the lowest cost, each once over the planned range.
+    """,
+    )
+    max_power: PositiveFloat | None = Field(
+        default=None,
+        alias="max-power",
+        description="""
+        Maximum total power (in kW) of the loads running at the same time, e.g. the contracted power, if any.
+    """,
+    )
+    price_list: StrictStr | None = Field(
+        default=None,
+        alias="price-list",
+        description="""
+        Title of the price list to plan the loads over, the first list returned by the API if unset.
+    """,
+    )
+
+
 class Configuration(BaseModel):
     luz_metronomo: LuzMetronomo = Field(default_factory=LuzMetronomo, alias="luz-metronomo")
     user_interface: UserInterface = Field(default_factory=UserInterface, alias="user-interface")
     api: Api = Field(default_factory=Api)
+    tariff: Tariff = Field(default_factory=Tariff)
+    store: Store = Field(default_factory=Store)
+    planner: Planner = Field(default_factory=Planner)
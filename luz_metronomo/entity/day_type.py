@@ -0,0 +1,7 @@
+from enum import IntEnum
+
+
+class DayType(IntEnum):
+    Workday = 0
+    # NOTE: Weekends and national holidays
+    Holiday = 1
@@ -0,0 +1,7 @@
+from enum import StrEnum, auto
+
+
+class ExportFormat(StrEnum):
+    Csv = auto()
+    JsonLines = auto()
+    Columnar = auto()
@@ -1,11 +1,242 @@
-from dataclasses import dataclass
-from datetime import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import groupby, pairwise
+from math import fsum
+from typing import overload
 
 from luz_metronomo.entity.price_point import PricePoint
 
 
-@dataclass
+@lru_cache(maxsize=None)
+def _offset_timezone(offset: int) -> timezone:
+    return timezone(timedelta(seconds=offset))
+
+
+def _column(typecode: str, values: Iterable | memoryview) -> memoryview:
+    if isinstance(values, memoryview):
+        return values.toreadonly()
+    return memoryview(array(typecode, values)).toreadonly()
+
+
+class PricePoints(Sequence[PricePoint]):
+    """
+    Read-only view over the price points of a list, which are only instantiated when accessed.
+    """
+
+    __slots__ = ("_price_list",)
+
+    def __init__(self, price_list: "PriceList"):
+        self._price_list = price_list
+
+    def __len__(self) -> int:
+        return len(self._price_list.values)
+
+    @overload
+    def __getitem__(self, index: int) -> PricePoint: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "PricePoints": ...
+
+    def __getitem__(self, index: int | slice) -> "PricePoint | PricePoints":
+        if isinstance(index, slice):
+            return self._price_list[index].price_points
+        return PricePoint(
+            value=self._price_list.values[index], datetime=self._price_list.datetime_at(index)
+        )
+
+    def __iter__(self) -> Iterator[PricePoint]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self)!r})"
+
+
 class PriceList:
+    """
+    Price points of a single list, stored in columns: epoch timestamps (in seconds), UTC offsets
+    (in seconds) and values are kept in contiguous buffers that are shared between slices.
+
+    The points are expected to be sorted by timestamp, which makes the timestamps column an index
+    for lookups by datetime. Each point is considered to last `interval` seconds, which defaults to
+    the smallest gap between two consecutive points (or one hour).
+    """
+
+    DEFAULT_INTERVAL: int = 3600
+
+    __slots__ = ("title", "last_update", "timestamps", "offsets", "values", "interval")
+
     title: str
     last_update: datetime
-    price_points: list[PricePoint]
+    timestamps: memoryview
+    offsets: memoryview
+    values: memoryview
+    interval: int
+
+    def __init__(self, title: str, last_update: datetime, price_points: Iterable[PricePoint] = ()):
+        timestamps: array = array("q")
+        offsets: array = array("i")
+        values: array = array("d")
+        for price_point in price_points:
+            timestamps.append(int(price_point.datetime.timestamp()))
+            utc_offset: timedelta | None = price_point.datetime.utcoffset()
+            offsets.append(int(utc_offset.total_seconds()) if utc_offset is not None else 0)
+            values.append(price_point.value)
+        self._set_columns(title, last_update, timestamps, offsets, values)
+
+    def _set_columns(
+        self,
+        title: str,
+        last_update: datetime,
+        timestamps: Iterable[int] | memoryview,
+        offsets: Iterable[int] | memoryview,
+        values: Iterable[float] | memoryview,
+        interval: int | None = None,
+    ):
+        self.title = title
+        self.last_update = last_update
+        self.timestamps = _column("q", timestamps)
+        self.offsets = _column("i", offsets)
+        self.values = _column("d", values)
+        if not len(self.timestamps) == len(self.offsets) == len(self.values):
+            raise ValueError("Columns of a price list must have the same length")
+        if interval is None:
+            interval = min(
+                (
+                    current - previous
+                    for previous, current in pairwise(self.timestamps)
+                    if current > previous
+                ),
+                default=PriceList.DEFAULT_INTERVAL,
+            )
+        self.interval = interval
+
+    @classmethod
+    def from_columns(
+        cls,
+        title: str,
+        last_update: datetime,
+        timestamps: Iterable[int] | memoryview,
+        offsets: Iterable[int] | memoryview,
+        values: Iterable[float] | memoryview,
+        interval: int | None = None,
+    ) -> "PriceList":
+        """
+        Build a list from its columns, which are not copied when passed as memory views.
+        """
+        price_list: PriceList = cls.__new__(cls)
+        price_list._set_columns(title, last_update, timestamps, offsets, values, interval)
+        return price_list
+
+    @property
+    def price_points(self) -> PricePoints:
+        return PricePoints(self)
+
+    def datetime_at(self, index: int) -> datetime:
+        return datetime.fromtimestamp(self.timestamps[index], _offset_timezone(self.offsets[index]))
+
+    def index_of(self, the_datetime: datetime) -> int | None:
+        """
+        Return the index of the point that starts exactly at the given datetime, if any.
+        """
+        timestamp: float = the_datetime.timestamp()
+        index: int = bisect_left(self.timestamps, timestamp)
+        if index < len(self.timestamps) and self.timestamps[index] == timestamp:
+            return index
+        return None
+
+    def index_at(self, the_datetime: datetime, interval: timedelta | None = None) -> int | None:
+        """
+        Return the index of the point whose interval contains the given datetime, if any.
+        """
+        timestamp: float = the_datetime.timestamp()
+        index: int = bisect_right(self.timestamps, timestamp) - 1
+        if index < 0:
+            return None
+        duration: float = interval.total_seconds() if interval is not None else self.interval
+        if timestamp < self.timestamps[index] + duration:
+            return index
+        return None
+
+    def price_point_at(
+        self, the_datetime: datetime, interval: timedelta | None = None
+    ) -> PricePoint | None:
+        """
+        Return the point whose interval contains the given datetime, if any.
+        """
+        if (index := self.index_at(the_datetime, interval)) is None:
+            return None
+        return self.price_points[index]
+
+    def between(self, date_from: datetime, date_to: datetime) -> "PriceList":
+        """
+        Return the points that fall within the given (inclusive) date range, without copying them.
+        """
+        index_from: int = bisect_left(self.timestamps, date_from.timestamp())
+        index_to: int = bisect_right(self.timestamps, date_to.timestamp())
+        return self[index_from:index_to]
+
+    def roll_up(self, interval: int) -> "PriceList":
+        """
+        Return the mean of the values over consecutive periods of `interval` seconds, aligned on
+        local time (e.g. hourly prices out of quarter-hour ones).
+
+        Lists whose points already last at least `interval` seconds are returned as they are.
+        """
+        if interval <= self.interval:
+            return self
+
+        timestamps: array = array("q")
+        offsets: array = array("i")
+        values: array = array("d")
+        # NOTE: The offset is part of the key, so that the repeated hour when clocks are set back
+        # doesn't merge two periods into one
+        for (local_period, offset), indices in groupby(
+            range(len(self)),
+            key=lambda index: (
+                (self.timestamps[index] + self.offsets[index]) // interval,
+                self.offsets[index],
+            ),
+        ):
+            period_values: list[float] = [self.values[index] for index in indices]
+            timestamps.append(local_period * interval - offset)
+            offsets.append(offset)
+            values.append(fsum(period_values) / len(period_values))
+        return PriceList.from_columns(
+            self.title, self.last_update, timestamps, offsets, values, interval
+        )
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: slice) -> "PriceList":
+        if not isinstance(index, slice):
+            raise TypeError("Price lists can only be sliced, use `price_points` to get a point")
+        return PriceList.from_columns(
+            self.title,
+            self.last_update,
+            self.timestamps[index],
+            self.offsets[index],
+            self.values[index],
+            self.interval,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PriceList):
+            return NotImplemented
+        return (
+            self.title == other.title
+            and self.last_update == other.last_update
+            and self.timestamps == other.timestamps
+            and self.offsets == other.offsets
+            and self.values == other.values
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(title={self.title!r}, last_update={self.last_update!r},"
+            f" price_points={self.price_points!r})"
+        )
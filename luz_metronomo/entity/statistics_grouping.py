@@ -0,0 +1,8 @@
+from enum import StrEnum, auto
+
+
+class StatisticsGrouping(StrEnum):
+    Period = auto()
+    Day = auto()
+    Week = auto()
+    Month = auto()
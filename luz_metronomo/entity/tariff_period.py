@@ -0,0 +1,7 @@
+from enum import IntEnum
+
+
+class TariffPeriod(IntEnum):
+    Valle = 0
+    Llano = 1
+    Punta = 2
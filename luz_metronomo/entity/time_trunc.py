@@ -0,0 +1,6 @@
+from enum import StrEnum
+
+
+class TimeTrunc(StrEnum):
+    Hour = "hour"
+    QuarterHour = "quarter-hour"
@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Validators:
+    """
+    Identify a version of a response, to check whether it changed since it was fetched.
+    """
+
+    # NOTE: Values of the `ETag` and `Last-Modified` headers, when the server provides them
+    etag: str | None = None
+    last_modified: str | None = None
+    # NOTE: Digest of the raw response, compared when the server provides no validator
+    digest: str | None = None
+
+    def request_headers(self) -> dict[str, str]:
+        """
+        Headers of a conditional request, which the server may answer with `304 Not Modified`.
+        """
+        headers: dict[str, str] = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
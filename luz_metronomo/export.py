@@ -0,0 +1,220 @@
+"""
+Export price lists without starting the user interface.
+
+The columnar format is a stream of little-endian blocks, preceded by the `LZMC` magic bytes and a
+version byte. Each block holds the points of a single list:
+
+- title length (unsigned 16 bits), title (UTF-8)
+- amount of points (unsigned 32 bits)
+- timestamps (signed 64 bits, seconds since the epoch)
+- UTC offsets (signed 32 bits, seconds)
+- values (64 bits floats)
+"""
+
+import csv
+import json
+import logging
+import struct
+import sys
+from array import array
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import IO, BinaryIO, TextIO
+
+from luz_metronomo.configuration import Configuration
+from luz_metronomo.default import Default
+from luz_metronomo.entity.export_format import ExportFormat
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.store import PriceStore, StoreError
+from luz_metronomo.tariff import SECONDS_PER_HOUR
+from luz_metronomo.util.api import (
+    IncompleteFetchError,
+    iter_price_lists,
+    split_date_range,
+)
+from luz_metronomo.util.configuration import api_object, cache_object, store_object
+from luz_metronomo.util.output import discard_standard_output
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+COLUMNAR_MAGIC: bytes = b"LZMC"
+COLUMNAR_VERSION: int = 1
+
+
+class Exporter:
+    def write(self, price_list: PriceList): ...
+
+    def flush(self): ...
+
+
+class CsvExporter(Exporter):
+    def __init__(self, output: TextIO):
+        self._output: TextIO = output
+        self._writer = csv.writer(output)
+        self._writer.writerow(("title", "datetime", "value"))
+
+    def write(self, price_list: PriceList):
+        self._writer.writerows(
+            (price_list.title, price_point.datetime.isoformat(), price_point.value)
+            for price_point in price_list.price_points
+        )
+
+    def flush(self):
+        self._output.flush()
+
+
+class JsonLinesExporter(Exporter):
+    def __init__(self, output: TextIO):
+        self._output: TextIO = output
+
+    def write(self, price_list: PriceList):
+        self._output.writelines(
+            json.dumps(
+                {
+                    "title": price_list.title,
+                    "datetime": price_point.datetime.isoformat(),
+                    "value": price_point.value,
+                }
+            )
+            + "\n"
+            for price_point in price_list.price_points
+        )
+
+    def flush(self):
+        self._output.flush()
+
+
+class ColumnarExporter(Exporter):
+    def __init__(self, output: BinaryIO):
+        self._output: BinaryIO = output
+        self._output.write(COLUMNAR_MAGIC + struct.pack("<B", COLUMNAR_VERSION))
+
+    def write(self, price_list: PriceList):
+        title: bytes = price_list.title.encode("utf-8")
+        self._output.write(struct.pack("<H", len(title)) + title)
+        self._output.write(struct.pack("<I", len(price_list)))
+        for typecode, column in (
+            ("q", price_list.timestamps),
+            ("i", price_list.offsets),
+            ("d", price_list.values),
+        ):
+            if sys.byteorder == "little":
+                self._output.write(column)
+            else:
+                column_le: array = array(typecode, column)
+                column_le.byteswap()
+                self._output.write(column_le)
+
+    def flush(self):
+        self._output.flush()
+
+
+@contextmanager
+def open_output(path: str, binary: bool) -> Iterator[IO]:
+    """
+    Open the given path for writing, `-` meaning the standard output.
+    """
+    if path == "-":
+        yield sys.stdout.buffer if binary else sys.stdout
+        return
+
+    with open(path, "wb") if binary else open(path, "w", newline="") as output:
+        yield output
+
+
+def exporter_object(export_format: ExportFormat, output: IO) -> Exporter:
+    match export_format:
+        case ExportFormat.Csv:
+            return CsvExporter(output)
+
+        case ExportFormat.JsonLines:
+            return JsonLinesExporter(output)
+
+        case ExportFormat.Columnar:
+            return ColumnarExporter(output)
+
+    raise ValueError(f"Unsupported export format: {export_format.value}")
+
+
+def iter_stored_price_lists(
+    configuration: Configuration,
+    store: PriceStore,
+    date_from: datetime,
+    date_to: datetime,
+    interval: int,
+) -> Iterator[list[PriceList]]:
+    """
+    Read the price lists over the given (inclusive) date range from the store, one chunk at a
+    time.
+    """
+    for chunk_from, chunk_to in split_date_range(
+        date_from, date_to, timedelta(days=configuration.api.range.chunk_days)
+    ):
+        yield store.read(chunk_from, chunk_to, interval)
+
+
+def export_price_lists(
+    configuration: Configuration,
+    date_from: datetime,
+    date_to: datetime,
+    export_format: ExportFormat,
+    path_output: str,
+    from_store: bool = False,
+    hourly: bool = False,
+) -> int:
+    """
+    Fetch the price lists over the given (inclusive) date range (or read them from the store),
+    and write them out one chunk at a time, as they are or as their hourly means.
+    """
+    store: PriceStore | None = store_object(configuration.store)
+    if from_store and store is None:
+        logger.error("The price store is disabled (`store.enable`)")
+        return 1
+    api = api_object(configuration.api)
+    cache = cache_object(configuration.api.cache)
+
+    chunks: Iterator[list[PriceList]]
+    if from_store:
+        assert store is not None
+        chunks = iter_stored_price_lists(configuration, store, date_from, date_to, api.interval)
+    else:
+        chunks = iter_price_lists(
+            configuration.api, date_from, date_to, api=api, cache=cache, store=store
+        )
+
+    amount_points: int = 0
+    try:
+        with open_output(path_output, export_format == ExportFormat.Columnar) as output:
+            exporter: Exporter = exporter_object(export_format, output)
+            for price_lists in chunks:
+                for price_list in price_lists:
+                    if hourly:
+                        price_list = price_list.roll_up(SECONDS_PER_HOUR)
+                    exporter.write(price_list)
+                    amount_points += len(price_list)
+                exporter.flush()
+    except BrokenPipeError:
+        # NOTE: The reader stopped reading (e.g. `| head`), which is not worth reporting
+        logger.debug("Output closed, stopping the export")
+        if path_output == "-":
+            discard_standard_output()
+        return 1
+    except OSError:
+        logger.exception("Unable to write the price lists", extra={"path": path_output})
+        return 1
+    except StoreError:
+        logger.exception("Unable to read the price lists from the store")
+        return 1
+    except IncompleteFetchError as e:
+        # NOTE: The other chunks are written out, running the command again fills the gaps
+        logger.info("Exported %d price points", amount_points)
+        logger.error("%s, the export is incomplete", e)
+        return 1
+    finally:
+        api.close()
+        if store is not None:
+            store.close()
+
+    logger.info("Exported %d price points", amount_points)
+    return 0
@@ -0,0 +1,173 @@
+"""
+Lightweight instrumentation: named spans (timed sections) and counters, kept in memory.
+
+Spans and counters may carry labels, e.g. `METRICS.count("api_requests", status="200")`, and are
+exported in the Prometheus text format.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from luz_metronomo.default import Default
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+# NOTE: Prefix of the names of all the exported metrics
+METRICS_NAMESPACE: str = "luz_metronomo"
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, object]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+def format_counter_value(value: float) -> str:
+    """
+    Format the value of a counter exactly, e.g. amounts of bytes past a million.
+    """
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+@dataclass
+class SpanSummary:
+    """
+    Durations of a span, in seconds.
+    """
+
+    count: int = 0
+    total: float = 0.0
+    maximum: float = 0.0
+    last: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.maximum = max(self.maximum, duration)
+        self.last = duration
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans: dict[tuple[str, Labels], SpanSummary] = {}
+        self._counters: dict[tuple[str, Labels], float] = {}
+
+    def count(self, name: str, value: float = 1, **labels: object):
+        """
+        Increase the counter with the given name and labels.
+        """
+        key: tuple[str, Labels] = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def record(self, name: str, duration: float, **labels: object):
+        """
+        Record a single duration (in seconds) of the span with the given name and labels.
+        """
+        key: tuple[str, Labels] = (name, _labels(labels))
+        with self._lock:
+            if (summary := self._spans.get(key)) is None:
+                summary = self._spans[key] = SpanSummary()
+            summary.add(duration)
+
+    @contextmanager
+    def span(self, name: str, **labels: object) -> Iterator[None]:
+        """
+        Time the enclosed block, whether it raises or not.
+        """
+        time_start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - time_start, **labels)
+
+    def spans(self) -> list[tuple[str, Labels, SpanSummary]]:
+        with self._lock:
+            return [
+                (name, labels, SpanSummary(**vars(summary)))
+                for (name, labels), summary in sorted(self._spans.items())
+            ]
+
+    def counters(self) -> list[tuple[str, Labels, float]]:
+        with self._lock:
+            return [
+                (name, labels, value) for (name, labels), value in sorted(self._counters.items())
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    def to_prometheus(self) -> str:
+        """
+        Format all the metrics in the Prometheus text exposition format.
+        """
+        lines: list[str] = []
+        name_previous: str | None = None
+        for name, labels, summary in self.spans():
+            metric: str = f"{METRICS_NAMESPACE}_{name}_seconds"
+            if name != name_previous:
+                lines.append(f"# TYPE {metric} summary")
+                name_previous = name
+            lines.append(f"{metric}_count{_format_labels(labels)} {summary.count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {summary.total:.6f}")
+
+        name_previous = None
+        for name, labels, summary in self.spans():
+            metric = f"{METRICS_NAMESPACE}_{name}_seconds_max"
+            if name != name_previous:
+                lines.append(f"# TYPE {metric} gauge")
+                name_previous = name
+            lines.append(f"{metric}{_format_labels(labels)} {summary.maximum:.6f}")
+
+        name_previous = None
+        for name, labels, value in self.counters():
+            metric = f"{METRICS_NAMESPACE}_{name}_total"
+            if name != name_previous:
+                lines.append(f"# TYPE {metric} counter")
+                name_previous = name
+            lines.append(f"{metric}{_format_labels(labels)} {format_counter_value(value)}")
+
+        return "".join(f"{line}\n" for line in lines)
+
+    def write_prometheus(self, path: Path):
+        """
+        Write all the metrics to the given file atomically, e.g. for the textfile collector of the
+        Prometheus node exporter.
+        """
+        path_tmp: Path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path_tmp.write_text(self.to_prometheus())
+            os.replace(path_tmp, path)
+        except OSError:
+            logger.exception("Unable to write the metrics file", extra={"path": path})
+            path_tmp.unlink(missing_ok=True)
+
+
+# NOTE: Shared by the whole program, like loggers are
+METRICS = Metrics()
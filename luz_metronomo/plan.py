@@ -0,0 +1,142 @@
+"""
+Plan loads over the prices of a date range, without starting the user interface.
+"""
+
+import json
+import logging
+import sys
+from datetime import datetime
+
+from luz_metronomo.configuration import Configuration, PlannedLoad
+from luz_metronomo.default import Default
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.planner import Load, LoadPlanner, Plan, select_price_list
+from luz_metronomo.store import PriceStore, StoreError
+from luz_metronomo.util.api import IncompleteFetchError, get_price_lists
+from luz_metronomo.util.configuration import (
+    api_object,
+    cache_object,
+    load_object,
+    store_object,
+    tariff_calendar_object,
+)
+from luz_metronomo.util.output import discard_standard_output
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+
+def format_plan(price_list: PriceList, plan: Plan) -> str:
+    time_format: str = "%Y-%m-%d %H:%M"
+    rows: list[tuple[str, ...]] = [("load", "from", "to", "power", "mean rate", "cost")]
+    rows.extend(
+        (
+            placement.load.name,
+            placement.date_from.strftime(time_format),
+            placement.date_to.strftime(time_format),
+            f"{placement.load.power:.2f}",
+            f"{placement.mean_price:.2f}",
+            f"{placement.cost:.2f}",
+        )
+        for placement in plan.placements
+    )
+    widths: list[int] = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    lines: list[str] = [f"Plan over: {price_list.title}"]
+    lines.extend(
+        "  ".join(
+            cell.ljust(width) if column < 3 else cell.rjust(width)
+            for column, (cell, width) in enumerate(zip(row, widths))
+        )
+        for row in rows
+    )
+    lines.append(f"Total cost: {plan.cost:.2f}€ (lower bound: {plan.lower_bound:.2f}€)")
+    return "\n".join(lines)
+
+
+def plan_loads(
+    configuration: Configuration,
+    date_from: datetime,
+    date_to: datetime,
+    planned_loads: list[PlannedLoad],
+    max_power: float | None,
+    title: str | None,
+    json_lines: bool = False,
+    from_store: bool = False,
+) -> int:
+    """
+    Fetch the price lists over the given (inclusive) date range (or read them from the store),
+    and write out the cheapest schedule of the given loads over one of them.
+    """
+    if not planned_loads:
+        logger.error("No loads to plan (`planner.loads` or `--load`)")
+        return 1
+
+    store: PriceStore | None = store_object(configuration.store)
+    if from_store and store is None:
+        logger.error("The price store is disabled (`store.enable`)")
+        return 1
+    api = api_object(configuration.api)
+    cache = cache_object(configuration.api.cache)
+
+    try:
+        price_lists: list[PriceList]
+        if from_store:
+            assert store is not None
+            price_lists = store.read(date_from, date_to, api.interval)
+        else:
+            price_lists = list(
+                get_price_lists(
+                    configuration.api, date_from, date_to, api=api, cache=cache, store=store
+                )
+            )
+    except StoreError:
+        logger.exception("Unable to read the price lists from the store")
+        return 1
+    except IncompleteFetchError as e:
+        logger.error("%s, the plan would be partial", e)
+        return 1
+    finally:
+        api.close()
+        if store is not None:
+            store.close()
+
+    if (price_list := select_price_list(price_lists, title)) is None or not len(price_list):
+        logger.error("No prices to plan over: %s", title or "any list")
+        return 1
+
+    loads: list[Load] = [load_object(load, date_from.date()) for load in planned_loads]
+    planner = LoadPlanner(price_list, tariff_calendar_object(configuration.tariff), max_power)
+    plan: Plan = planner.plan(loads)
+
+    try:
+        if json_lines:
+            for placement in plan.placements:
+                print(
+                    json.dumps(
+                        {
+                            "title": price_list.title,
+                            "load": placement.load.name,
+                            "from": placement.date_from.isoformat(),
+                            "to": placement.date_to.isoformat(),
+                            "power": placement.load.power,
+                            "mean_rate": placement.mean_price,
+                            "cost": placement.cost,
+                        }
+                    )
+                )
+        else:
+            print(format_plan(price_list, plan))
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # NOTE: The reader stopped reading (e.g. `| head`), which is not worth reporting
+        logger.debug("Output closed, stopping the plan")
+        discard_standard_output()
+        return 1
+
+    if plan.unplaced:
+        logger.warning(
+            "No feasible window for %d load(s): %s",
+            len(plan.unplaced),
+            ", ".join(load.name for load in plan.unplaced),
+        )
+        return 1
+    return 0
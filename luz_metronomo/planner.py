@@ -0,0 +1,269 @@
+"""
+Schedule several loads (e.g. appliances) over a price list, at the lowest total cost.
+
+Each load runs once, without interruption, for a given duration at a given power, between an
+optional earliest start and deadline. Loads marked as exclusive never run at the same time as each
+other, and the total power of the loads running at any time can be capped.
+
+The schedule is built greedily, the most constrained loads first, each placed in its cheapest
+feasible window. Loads are then moved one (or two) at a time to their cheapest feasible windows
+given the others, until no move lowers the cost. The cost of every load in its cheapest window regardless of
+the others bounds the optimal cost from below, which tells how far from optimal a plan can be.
+
+Loads are charged for their actual duration: when it isn't a multiple of the interval of the list,
+only the fraction of the last point that is used is. That point is still reserved as a whole for
+the load, when checking the power cap and exclusive loads.
+"""
+
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import combinations
+
+from luz_metronomo.default import Default
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.tariff import TariffCalendar
+from luz_metronomo.window import WindowFinder
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+# NOTE: Amount of passes over the loads after which the improvement of a plan stops anyway
+MAX_IMPROVEMENT_ROUNDS: int = 16
+
+# NOTE: Smallest saving (in euros) for which a load is moved
+MIN_SAVING: float = 1e-9
+
+
+@dataclass(frozen=True, slots=True)
+class Load:
+    name: str
+    duration: timedelta
+    # NOTE: Power drawn while running, in kW
+    power: float
+    earliest_start: datetime | None = None
+    deadline: datetime | None = None
+    exclusive: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class Placement:
+    load: Load
+    # NOTE: Indices of the first point of the window, and past its last one
+    index_from: int
+    index_to: int
+    date_from: datetime
+    # NOTE: End of the duration of the load, within the last point of the window
+    date_to: datetime
+    # NOTE: Mean price over the duration of the load, in the unit of the list (€/MWh)
+    mean_price: float
+    # NOTE: In euros
+    cost: float
+
+
+@dataclass
+class Plan:
+    placements: list[Placement] = field(default_factory=list)
+    # NOTE: Loads for which no feasible window was found
+    unplaced: list[Load] = field(default_factory=list)
+    # NOTE: Cost of the placed loads each in its cheapest window, regardless of the others
+    lower_bound: float = 0.0
+
+    @property
+    def cost(self) -> float:
+        return sum(placement.cost for placement in self.placements)
+
+
+def select_price_list(price_lists: Iterable[PriceList], title: str | None) -> PriceList | None:
+    """
+    Return the list with the given title, or the first one if no title is given.
+    """
+    for price_list in price_lists:
+        if title is None or price_list.title == title:
+            return price_list
+    return None
+
+
+@dataclass
+class _Candidates:
+    load: Load
+    length: int
+    # NOTE: Amount of points used by the load, the last one being possibly only partly used
+    points: float
+    # NOTE: Sums of the values of the windows of the duration of the load, by index of their start
+    sums: list[float]
+    # NOTE: Valid starts, cheapest first
+    starts: list[int]
+
+
+class LoadPlanner:
+    """
+    Plan loads over a price list, whose values are prices in €/MWh.
+    """
+
+    def __init__(
+        self,
+        price_list: PriceList,
+        tariff_calendar: TariffCalendar,
+        max_power: float | None = None,
+    ):
+        self._price_list: PriceList = price_list
+        self._window_finder = WindowFinder(price_list, tariff_calendar)
+        self._max_power: float | None = max_power
+        # NOTE: Euros per (€/MWh of a point) and per kW
+        self._cost_factor: float = price_list.interval / 3600 / 1000
+
+    def _candidates(self, load: Load, not_before: datetime | None) -> _Candidates:
+        date_from: datetime | None = load.earliest_start
+        if not_before is not None and (date_from is None or date_from < not_before):
+            date_from = not_before
+        length, sums, starts = self._window_finder.candidates(
+            load.duration, None, date_from, load.deadline
+        )
+        if self._max_power is not None and load.power > self._max_power:
+            starts = []
+        starts.sort(key=sums.__getitem__)
+        return _Candidates(
+            load=load,
+            length=length,
+            points=self._window_finder.extent(load.duration)[1],
+            sums=sums,
+            starts=starts,
+        )
+
+    def _placement(self, candidates: _Candidates, index: int) -> Placement:
+        load: Load = candidates.load
+        total: float = candidates.sums[index]
+        return Placement(
+            load=load,
+            index_from=index,
+            index_to=index + candidates.length,
+            date_from=self._price_list.datetime_at(index),
+            date_to=self._price_list.datetime_at(index + candidates.length - 1)
+            + timedelta(
+                seconds=self._price_list.interval * (candidates.points - candidates.length + 1)
+            ),
+            mean_price=total / candidates.points,
+            cost=total * load.power * self._cost_factor,
+        )
+
+    def plan(self, loads: Iterable[Load], not_before: datetime | None = None) -> Plan:
+        """
+        Plan the given loads, none of which starts before `not_before` (if given).
+        """
+        amount_points: int = len(self._price_list)
+        # NOTE: Power drawn by the placed loads, and whether an exclusive load runs, per point
+        power: list[float] = [0.0] * amount_points
+        exclusive: bytearray = bytearray(amount_points)
+
+        def fits(candidates: _Candidates, index: int) -> bool:
+            index_to: int = index + candidates.length
+            if candidates.load.exclusive and exclusive.find(1, index, index_to) != -1:
+                return False
+            return (
+                self._max_power is None
+                or max(power[index:index_to]) + candidates.load.power <= self._max_power
+            )
+
+        def occupy(candidates: _Candidates, index: int, sign: int):
+            index_to: int = index + candidates.length
+            for point in range(index, index_to):
+                power[point] += sign * candidates.load.power
+            if candidates.load.exclusive:
+                exclusive[index:index_to] = bytes([sign > 0]) * candidates.length
+
+        def cheapest_fit(candidates: _Candidates) -> int | None:
+            return next((index for index in candidates.starts if fits(candidates, index)), None)
+
+        def cost(candidates: _Candidates, index: int) -> float:
+            return candidates.sums[index] * candidates.load.power
+
+        def improve_pairs() -> bool:
+            """
+            Move two loads at once when neither can be moved on its own, e.g. when each is in
+            the way of the other.
+            """
+            for key_first, key_second in combinations(list(placed), 2):
+                first, index_first = placed[key_first]
+                second, index_second = placed[key_second]
+                cost_current: float = cost(first, index_first) + cost(second, index_second)
+                occupy(first, index_first, -1)
+                occupy(second, index_second, -1)
+                best: tuple[float, int, int] | None = None
+                for one, other in ((first, second), (second, first)):
+                    if (index_one := cheapest_fit(one)) is None:
+                        continue
+                    occupy(one, index_one, 1)
+                    index_other: int | None = cheapest_fit(other)
+                    occupy(one, index_one, -1)
+                    if index_other is None:
+                        continue
+                    cost_moved: float = cost(one, index_one) + cost(other, index_other)
+                    if cost_moved < cost_current - MIN_SAVING and (
+                        best is None or cost_moved < best[0]
+                    ):
+                        best = (
+                            (cost_moved, index_one, index_other)
+                            if one is first
+                            else (cost_moved, index_other, index_one)
+                        )
+                if best is not None:
+                    _, index_first, index_second = best
+                    placed[key_first] = (first, index_first)
+                    placed[key_second] = (second, index_second)
+                occupy(first, index_first, 1)
+                occupy(second, index_second, 1)
+                if best is not None:
+                    return True
+            return False
+
+        all_candidates: list[_Candidates] = [self._candidates(load, not_before) for load in loads]
+        plan = Plan()
+        # NOTE: Loads with the fewest options go first, then the most energy-intensive ones
+        pending: list[_Candidates] = sorted(
+            all_candidates,
+            key=lambda candidates: (
+                len(candidates.starts),
+                -candidates.load.power * candidates.length,
+            ),
+        )
+        placed: dict[int, tuple[_Candidates, int]] = {}
+        for candidates in pending:
+            if (index := cheapest_fit(candidates)) is None:
+                continue
+            occupy(candidates, index, 1)
+            placed[id(candidates)] = (candidates, index)
+
+        for _ in range(MAX_IMPROVEMENT_ROUNDS):
+            improved: bool = False
+            for key, (candidates, index) in list(placed.items()):
+                occupy(candidates, index, -1)
+                best: int | None = cheapest_fit(candidates)
+                assert best is not None
+                if cost(candidates, best) < cost(candidates, index) - MIN_SAVING:
+                    improved = True
+                    index = best
+                    placed[key] = (candidates, index)
+                occupy(candidates, index, 1)
+            if not improved:
+                improved = improve_pairs()
+            # NOTE: Moving loads may have made room for those that didn't fit
+            for candidates in pending:
+                if id(candidates) in placed:
+                    continue
+                if (index := cheapest_fit(candidates)) is not None:
+                    occupy(candidates, index, 1)
+                    placed[id(candidates)] = (candidates, index)
+                    improved = True
+            if not improved:
+                break
+
+        for candidates in all_candidates:
+            if (placement := placed.get(id(candidates))) is None:
+                logger.debug("No feasible window for load: %s", candidates.load.name)
+                plan.unplaced.append(candidates.load)
+                continue
+            plan.placements.append(self._placement(*placement))
+            plan.lower_bound += self._placement(candidates, candidates.starts[0]).cost
+        plan.placements.sort(key=lambda placement: placement.index_from)
+        return plan
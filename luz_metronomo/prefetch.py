@@ -0,0 +1,79 @@
+import logging
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable
+from datetime import datetime
+
+from luz_metronomo.default import Default
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+DateRange = tuple[datetime, datetime]
+
+
+class Prefetcher:
+    """
+    Fetch date ranges in a background thread, ahead of the user requesting them.
+
+    Ranges are queued in a bounded queue, in which newly scheduled ranges replace the pending
+    ones. Prefetching is held back while the user is waiting for a fetch of their own (see
+    `pause`), so that it never competes with it.
+    """
+
+    def __init__(self, fetch: Callable[[datetime, datetime], object], max_pending: int):
+        self._fetch: Callable[[datetime, datetime], object] = fetch
+        self._pending: deque[DateRange] = deque(maxlen=max_pending)
+        self._condition = threading.Condition()
+        self._paused: int = 0
+        self._stopped: bool = False
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._pending.clear()
+            self._condition.notify_all()
+
+    def schedule(self, date_ranges: Iterable[DateRange]):
+        """
+        Replace the pending ranges with the given ones, in order of priority.
+        """
+        with self._condition:
+            self._pending.clear()
+            self._pending.extend(date_ranges)
+            self._condition.notify_all()
+
+    def pause(self):
+        """
+        Hold back prefetching until `resume` is called as many times as this method was.
+
+        A range that is being fetched when this is called is not interrupted.
+        """
+        with self._condition:
+            self._paused += 1
+
+    def resume(self):
+        with self._condition:
+            self._paused = max(0, self._paused - 1)
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._stopped or (self._pending and not self._paused)
+                )
+                if self._stopped:
+                    return
+                date_from, date_to = self._pending.popleft()
+
+            logger.debug("Prefetching range: %s - %s", date_from, date_to)
+            try:
+                self._fetch(date_from, date_to)
+            except Exception:
+                logger.exception(
+                    "Unable to prefetch range", extra={"date_from": date_from, "date_to": date_to}
+                )
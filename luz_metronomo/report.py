@@ -0,0 +1,147 @@
+"""
+Report statistics of the price lists over a date range, without starting the user interface.
+
+The lists are processed one chunk at a time, so long ranges (e.g. years of stored history) are
+summarised without holding all their points in memory.
+"""
+
+import json
+import logging
+import sys
+from collections.abc import Iterator
+from datetime import datetime
+
+from luz_metronomo.configuration import Configuration
+from luz_metronomo.default import Default
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.statistics_grouping import StatisticsGrouping
+from luz_metronomo.export import iter_stored_price_lists
+from luz_metronomo.statistics import (
+    SUMMARY_COLUMNS,
+    Aggregate,
+    PriceStatistics,
+    format_summary,
+    summary,
+)
+from luz_metronomo.store import PriceStore, StoreError
+from luz_metronomo.util.api import IncompleteFetchError, iter_price_lists
+from luz_metronomo.util.configuration import (
+    api_object,
+    cache_object,
+    store_object,
+    tariff_calendar_object,
+)
+from luz_metronomo.util.output import discard_standard_output
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+
+def iter_rows(
+    statistics: PriceStatistics, groupings: list[StatisticsGrouping]
+) -> Iterator[tuple[str, str, Aggregate]]:
+    """
+    Return the aggregates to report, with the name and label of their group.
+    """
+    yield "all", "all", statistics.overall
+    for grouping in groupings:
+        for label, aggregate in statistics.groups(grouping):
+            yield grouping.value, label, aggregate
+
+
+def format_table(title: str, rows: list[tuple[str, ...]]) -> str:
+    header: tuple[str, ...] = ("group",) + SUMMARY_COLUMNS
+    widths: list[int] = [
+        max(len(cells[column]) for cells in [header, *rows]) for column in range(len(header))
+    ]
+    lines: list[str] = [title]
+    for cells in [header, *rows]:
+        lines.append(
+            "  ".join(
+                cell.ljust(width) if column == 0 else cell.rjust(width)
+                for column, (cell, width) in enumerate(zip(cells, widths))
+            )
+        )
+    return "\n".join(lines)
+
+
+def report_statistics(
+    configuration: Configuration,
+    date_from: datetime,
+    date_to: datetime,
+    groupings: list[StatisticsGrouping],
+    json_lines: bool = False,
+    from_store: bool = False,
+) -> int:
+    """
+    Compute the statistics of the price lists over the given (inclusive) date range, and write
+    them to the standard output, as a table per list or as JSON lines.
+    """
+    store: PriceStore | None = store_object(configuration.store)
+    if from_store and store is None:
+        logger.error("The price store is disabled (`store.enable`)")
+        return 1
+    api = api_object(configuration.api)
+    cache = cache_object(configuration.api.cache)
+
+    chunks: Iterator[list[PriceList]]
+    if from_store:
+        assert store is not None
+        chunks = iter_stored_price_lists(configuration, store, date_from, date_to, api.interval)
+    else:
+        chunks = iter_price_lists(
+            configuration.api, date_from, date_to, api=api, cache=cache, store=store
+        )
+
+    tariff_calendar = tariff_calendar_object(configuration.tariff)
+    # NOTE: Statistics per title, in the order the lists were first seen
+    statistics: dict[str, PriceStatistics] = {}
+    try:
+        for price_lists in chunks:
+            for price_list in price_lists:
+                if len(price_list):
+                    statistics.setdefault(price_list.title, PriceStatistics(tariff_calendar)).add(
+                        price_list
+                    )
+    except StoreError:
+        logger.exception("Unable to read the price lists from the store")
+        return 1
+    except IncompleteFetchError as e:
+        logger.error("%s, the statistics would be partial", e)
+        return 1
+    finally:
+        api.close()
+        if store is not None:
+            store.close()
+
+    if not statistics:
+        logger.warning("No price points over the date range")
+
+    try:
+        if json_lines:
+            for title, price_statistics in statistics.items():
+                for group, label, aggregate in iter_rows(price_statistics, groupings):
+                    print(
+                        json.dumps(
+                            {"title": title, "group": group, "label": label} | summary(aggregate)
+                        )
+                    )
+        elif statistics:
+            print(
+                "\n\n".join(
+                    format_table(
+                        title,
+                        [
+                            (label,) + format_summary(aggregate)
+                            for _, label, aggregate in iter_rows(price_statistics, groupings)
+                        ],
+                    )
+                    for title, price_statistics in statistics.items()
+                )
+            )
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # NOTE: The reader stopped reading (e.g. `| head`), which is not worth reporting
+        logger.debug("Output closed, stopping the report")
+        discard_standard_output()
+        return 1
+    return 0
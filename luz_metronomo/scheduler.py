@@ -0,0 +1,134 @@
+"""
+Schedule the background refreshes of the user interface.
+
+REE publishes the prices of the following day once a day, in the evening: the following day is only
+polled for within a window that starts at the usual time of publication, with an exponential
+backoff between attempts, until its prices are found. The displayed day is rolled over at midnight.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from random import Random
+
+from luz_metronomo.default import Default
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+# NOTE: Timers don't account for the time the system spends suspended, so the wall clock is
+# checked at least that often (in seconds)
+MAX_SLEEP: float = 300.0
+
+
+def is_published(price_lists: list[PriceList]) -> bool:
+    """
+    Whether the price lists fetched over a range hold any point, i.e. were published.
+    """
+    return any(len(price_list) for price_list in price_lists)
+
+
+@dataclass
+class RefreshScheduler:
+    # NOTE: Local (Spanish) time at which the prices of the following day are usually published
+    publication_time: time
+    publication_window: timedelta
+    poll: bool = True
+    backoff_factor: float = 60.0
+    backoff_max: float = 900.0
+    backoff_jitter: float = 30.0
+    random: Random = field(default_factory=Random)
+
+    # NOTE: Local day seen by the latest call to `rollover`
+    _today: date | None = field(init=False, default=None)
+    # NOTE: Latest day whose prices were found to be published
+    _published: date | None = field(init=False, default=None)
+    _attempts: int = field(init=False, default=0)
+    _poll_at: datetime | None = field(init=False, default=None)
+
+    def window(self, day: date) -> tuple[datetime, datetime]:
+        """
+        Bounds of the window within which the prices of the day after the given one are polled.
+        """
+        start: datetime = datetime.combine(day, self.publication_time, TIMEZONE_SPAIN)
+        return start, start + self.publication_window
+
+    def backoff(self, attempts: int) -> float:
+        """
+        Amount of seconds to wait for after the given amount of unsuccessful attempts.
+        """
+        delay: float = self.backoff_factor * 2**attempts
+        if self.backoff_max > 0.0:
+            delay = min(delay, self.backoff_max)
+        return delay + self.random.uniform(0.0, self.backoff_jitter)
+
+    def rollover(self, now: datetime) -> date | None:
+        """
+        Return the previous local day if the day changed since the last call.
+        """
+        today: date = now.astimezone(TIMEZONE_SPAIN).date()
+        previous, self._today = self._today, today
+        if previous is None or previous == today:
+            return None
+        logger.debug("Day rolled over: %s -> %s", previous, today)
+        self._attempts = 0
+        self._poll_at = None
+        return previous
+
+    def poll_due(self, now: datetime) -> date | None:
+        """
+        Return the day whose prices have to be polled for now, if any.
+        """
+        if not self.poll:
+            return None
+        today: date = now.astimezone(TIMEZONE_SPAIN).date()
+        tomorrow: date = today + timedelta(days=1)
+        if self.is_published(tomorrow):
+            return None
+        window_start, window_end = self.window(today)
+        if not window_start <= now < window_end:
+            return None
+        if self._poll_at is not None and now < self._poll_at:
+            return None
+        return tomorrow
+
+    def is_published(self, day: date) -> bool:
+        """
+        Whether the prices of the given day were found to be published by a poll.
+        """
+        return self._published is not None and self._published >= day
+
+    def record_poll(self, now: datetime, day: date, published: bool):
+        if published:
+            logger.info("Prices published: %s", day)
+            self._published = day if self._published is None else max(self._published, day)
+            self._attempts = 0
+            self._poll_at = None
+            return
+
+        delay: float = self.backoff(self._attempts)
+        self._attempts += 1
+        self._poll_at = now + timedelta(seconds=delay)
+        logger.debug("Prices not published yet: %s (next attempt in %.0fs)", day, delay)
+
+    def next_wakeup(self, now: datetime) -> datetime:
+        """
+        Return the next time at which the day might roll over, or a poll might be due.
+        """
+        today: date = now.astimezone(TIMEZONE_SPAIN).date()
+        tomorrow: date = today + timedelta(days=1)
+        wakeups: list[datetime] = [datetime.combine(tomorrow, time(), TIMEZONE_SPAIN)]
+        if self.poll and not self.is_published(tomorrow):
+            window_start, window_end = self.window(today)
+            if now < window_start:
+                wakeups.append(window_start)
+            elif now < window_end:
+                wakeups.append(self._poll_at if self._poll_at is not None else now)
+        return min(wakeups)
+
+    def sleep_duration(self, now: datetime) -> float:
+        """
+        Amount of seconds to wait for before the next call to `rollover` and `poll_due`.
+        """
+        return min(MAX_SLEEP, max(0.0, (self.next_wakeup(now) - now).total_seconds()))
@@ -0,0 +1,323 @@
+"""
+Stand-in for the API, to exercise the client offline.
+
+The server implements the contract of the `precios-mercados-tiempo-real` endpoint: it synthesises
+the price lists of any date range, or replays the responses recorded by the client (see the
+`api.record-directory` setting), and injects faults on demand: latency, throttling, server
+errors, truncated bodies and slow-drip reads.
+
+Responses carry `ETag` and `Last-Modified` validators (unless disabled), and conditional requests
+are answered with `304 Not Modified` when the response didn't change.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from luz_metronomo.api import TIME_TRUNC_INTERVALS, recording_name
+from luz_metronomo.default import Default
+from luz_metronomo.util.payload import synthesise_raw_payload
+from luz_metronomo.util.timezone import GMT_PLUS_2
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+SERVER_ERROR_STATUSES: tuple[HTTPStatus, ...] = (
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+)
+
+# NOTE: Amount of times per second the body of a slow-drip response is written to
+DRIP_FREQUENCY: int = 10
+
+
+@dataclass
+class Faults:
+    # NOTE: Seconds to wait before responding, plus a random amount up to `latency_jitter`
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    # NOTE: Probabilities, between 0 and 1
+    error_rate: float = 0.0
+    truncate_rate: float = 0.0
+    # NOTE: Requests per second over which requests are rejected, `None` to disable
+    throttle_rate: float | None = None
+    # NOTE: Bytes per second at which bodies are written, `None` to write them at once
+    drip_rate: int | None = None
+
+
+class RequestError(Exception):
+    """
+    Invalid request, reported to the client the way the API does.
+    """
+
+    def __init__(self, status: HTTPStatus, detail: str):
+        super().__init__(detail)
+        self.status: HTTPStatus = status
+        self.detail: str = detail
+
+
+@dataclass
+class TokenBucket:
+    """
+    Allow `rate` requests per second on average, with bursts of up to `rate` requests (at least
+    one, so that rates below one request per second let some through).
+    """
+
+    rate: float
+    capacity: float = field(init=False)
+    tokens: float = field(init=False)
+    time_last: float = field(init=False, default_factory=time.monotonic)
+    lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+
+    def take(self) -> bool:
+        with self.lock:
+            now: float = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.time_last) * self.rate)
+            self.time_last = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+def parse_datetime_field(fields: dict[str, list[str]], name: str) -> datetime:
+    values: list[str] | None = fields.get(name)
+    if not values:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Missing field: {name}")
+    try:
+        the_datetime: datetime = datetime.fromisoformat(values[0])
+    except ValueError as e:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid date: {values[0]}") from e
+    # NOTE: The client sends Spanish datetimes without timezone information
+    if the_datetime.tzinfo is None:
+        the_datetime = the_datetime.replace(tzinfo=GMT_PLUS_2)
+    return the_datetime
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        faults: Faults | None = None,
+        replay_directory: Path | None = None,
+        replay_only: bool = False,
+        seed: int | None = None,
+        validators: bool = True,
+    ):
+        super().__init__(address, StandInRequestHandler)
+        self.faults: Faults = faults if faults is not None else Faults()
+        self.replay_directory: Path | None = replay_directory
+        self.replay_only: bool = replay_only
+        self.validators: bool = validators
+        # NOTE: Synthesised lists are all updated when the server starts, so that the responses
+        # to identical requests are identical too
+        self.last_update: datetime = datetime.now(timezone.utc).replace(microsecond=0)
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._bucket: TokenBucket | None = None
+        if self.faults.throttle_rate is not None:
+            self._bucket = TokenBucket(self.faults.throttle_rate)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def chance(self, probability: float) -> bool:
+        with self._random_lock:
+            return probability > 0.0 and self._random.random() < probability
+
+    def error_status(self) -> HTTPStatus:
+        with self._random_lock:
+            return self._random.choice(SERVER_ERROR_STATUSES)
+
+    def latency(self) -> float:
+        with self._random_lock:
+            return self.faults.latency + self._random.uniform(0.0, self.faults.latency_jitter)
+
+    def throttled(self) -> bool:
+        return self._bucket is not None and not self._bucket.take()
+
+    def response_body(self, fields: dict[str, list[str]]) -> tuple[bytes, datetime]:
+        """
+        Return the body of the response to a request, recorded or synthesised, and the date at
+        which it was last modified.
+        """
+        date_from: datetime = parse_datetime_field(fields, "start_date")
+        date_to: datetime = parse_datetime_field(fields, "end_date")
+        time_trunc: str = fields.get("time_trunc", ["hour"])[0]
+        if (interval := TIME_TRUNC_INTERVALS.get(time_trunc)) is None:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Unsupported time truncation: {time_trunc}")
+        if date_to < date_from:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "The end date precedes the start date")
+
+        if self.replay_directory is not None:
+            name: str = recording_name(fields["start_date"][0], fields["end_date"][0], time_trunc)
+            path: Path = self.replay_directory / name
+            try:
+                last_modified: datetime = datetime.fromtimestamp(
+                    int(path.stat().st_mtime), timezone.utc
+                )
+                return path.read_bytes(), last_modified
+            except FileNotFoundError:
+                if self.replay_only:
+                    raise RequestError(HTTPStatus.NOT_FOUND, f"No recorded response: {name}")
+
+        return (
+            synthesise_raw_payload(date_from, date_to, interval, self.last_update),
+            self.last_update,
+        )
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # NOTE: Otherwise small responses are held back by delayed acknowledgements
+    disable_nagle_algorithm = True
+    server: StandInServer
+
+    def log_message(self, format: str, *args: Any):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        faults: Faults = self.server.faults
+        if (latency := self.server.latency()) > 0.0:
+            time.sleep(latency)
+
+        if self.server.throttled():
+            self._send_error(
+                HTTPStatus.TOO_MANY_REQUESTS, "Too many requests", {"Retry-After": "1"}
+            )
+            return
+
+        if self.server.chance(faults.error_rate):
+            self._send_error(self.server.error_status(), "Injected server error")
+            return
+
+        try:
+            body, last_modified = self.server.response_body(parse_qs(urlsplit(self.path).query))
+        except RequestError as e:
+            self._send_error(e.status, e.detail)
+            return
+
+        headers: dict[str, str] = {"Content-Type": "application/json"}
+        if self.server.validators:
+            # NOTE: Weak, as the tag identifies the content regardless of its encoding
+            headers["ETag"] = f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+            if self._is_not_modified(headers["ETag"], last_modified):
+                self._send(HTTPStatus.NOT_MODIFIED, b"", headers)
+                return
+
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        self._send(HTTPStatus.OK, body, headers, truncate=self.server.chance(faults.truncate_rate))
+
+    def _is_not_modified(self, etag: str, last_modified: datetime) -> bool:
+        # NOTE: `If-None-Match` takes precedence over `If-Modified-Since`, when both are sent
+        if (if_none_match := self.headers.get("If-None-Match")) is not None:
+            etags: list[str] = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in etags or etag.removeprefix("W/") in etags
+        if (if_modified_since := self.headers.get("If-Modified-Since")) is not None:
+            try:
+                return last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send_error(self, status: HTTPStatus, detail: str, headers: dict[str, str] | None = None):
+        body: bytes = json.dumps(
+            {
+                "errors": [
+                    {
+                        "code": status.value,
+                        "status": str(status.value),
+                        "title": status.phrase,
+                        "detail": detail,
+                    }
+                ]
+            }
+        ).encode("utf-8")
+        self._send(status, body, {"Content-Type": "application/json"} | (headers or {}))
+
+    def _send(
+        self, status: HTTPStatus, body: bytes, headers: dict[str, str], truncate: bool = False
+    ):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        # NOTE: Truncated bodies announce their full length, and the connection is closed early
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Length", str(len(body)))
+        if truncate:
+            body = body[: len(body) // 2]
+            self.close_connection = True
+            self.send_header("Connection", "close")
+        self.end_headers()
+
+        try:
+            self._write_body(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # NOTE: Clients that give up on a slow response are expected
+            logger.info("%s - Client disconnected during the response", self.address_string())
+            self.close_connection = True
+
+    def _write_body(self, body: bytes):
+        drip_rate: int | None = self.server.faults.drip_rate
+        if drip_rate is None:
+            self.wfile.write(body)
+            return
+
+        chunk_size: int = max(1, drip_rate // DRIP_FREQUENCY)
+        for offset in range(0, len(body), chunk_size):
+            self.wfile.write(body[offset : offset + chunk_size])
+            self.wfile.flush()
+            time.sleep(1 / DRIP_FREQUENCY)
+
+
+def serve(
+    host: str,
+    port: int,
+    faults: Faults,
+    replay_directory: Path | None = None,
+    replay_only: bool = False,
+    seed: int | None = None,
+    validators: bool = True,
+) -> int:
+    """
+    Run the stand-in server until interrupted.
+    """
+    try:
+        server = StandInServer(
+            (host, port), faults, replay_directory, replay_only, seed, validators
+        )
+    except OSError:
+        logger.exception("Unable to start the server", extra={"host": host, "port": port})
+        return 1
+
+    with server:
+        print(f"Serving the stand-in API on: {server.url}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Interrupt caught, quitting")
+    return 0
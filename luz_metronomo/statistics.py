@@ -0,0 +1,306 @@
+"""
+Statistics of price lists, kept up to date as points are appended to them.
+
+Every aggregate (the whole list, each tariff period, and each day, week and month) holds running
+moments (count, minimum, maximum, mean and variance, updated with Welford's method) and a
+percentile sketch. Both can be merged, so that the aggregates of weeks and months are built from
+those of their days, and points appended to a list are folded into the existing aggregates instead
+of recomputing them from scratch.
+"""
+
+import math
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from itertools import groupby
+
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.statistics_grouping import StatisticsGrouping
+from luz_metronomo.entity.tariff_period import TariffPeriod
+from luz_metronomo.tariff import SECONDS_PER_DAY, TariffCalendar
+
+# NOTE: Percentiles displayed by default, as fractions
+DEFAULT_QUANTILES: tuple[float, ...] = (0.1, 0.5, 0.9)
+
+# NOTE: Prices are given with two decimals, at which resolution the sketches are exact
+DEFAULT_RESOLUTION: float = 0.01
+
+# NOTE: Ordinal of the Unix epoch, 1970-01-01
+EPOCH_ORDINAL: int = date(1970, 1, 1).toordinal()
+
+SUMMARY_COLUMNS: tuple[str, ...] = ("count", "min", "mean", "max", "stddev") + tuple(
+    f"p{round(fraction * 100)}" for fraction in DEFAULT_QUANTILES
+)
+
+
+@dataclass(slots=True)
+class RunningStats:
+    count: int = 0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+    mean: float = 0.0
+    # NOTE: Sum of the squared differences to the mean
+    m2: float = 0.0
+
+    @property
+    def variance(self) -> float:
+        """
+        Population variance of the values.
+        """
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def add(self, value: float):
+        self.count += 1
+        delta: float = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other: "RunningStats"):
+        """
+        Fold the values summarised by the other instance into this one (Chan et al.).
+        """
+        if not other.count:
+            return
+        count: int = self.count + other.count
+        delta: float = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @classmethod
+    def of(cls, values: Sequence[float]) -> "RunningStats":
+        """
+        Summarise a batch of values at once, which is faster than adding them one by one.
+        """
+        if not values:
+            return cls()
+        mean: float = math.fsum(values) / len(values)
+        return cls(
+            count=len(values),
+            minimum=min(values),
+            maximum=max(values),
+            mean=mean,
+            m2=math.fsum((value - mean) ** 2 for value in values),
+        )
+
+
+@dataclass(slots=True)
+class PercentileSketch:
+    """
+    Histogram of values rounded to `resolution`, from which percentiles are read.
+
+    Unlike most streaming estimators, histograms can be merged, and their error is bounded by their
+    resolution regardless of the distribution of the values.
+    """
+
+    resolution: float = DEFAULT_RESOLUTION
+    counts: Counter[int] = field(default_factory=Counter)
+
+    def add_values(self, values: Iterable[float]):
+        resolution: float = self.resolution
+        self.counts.update(round(value / resolution) for value in values)
+
+    def merge(self, other: "PercentileSketch"):
+        if other.resolution != self.resolution:
+            raise ValueError("Sketches of different resolutions can't be merged")
+        self.counts.update(other.counts)
+
+    def quantiles(self, fractions: Sequence[float]) -> list[float | None]:
+        """
+        Return the values below which the given fractions of the values fall (nearest rank).
+        """
+        total: int = self.counts.total()
+        if not total:
+            return [None] * len(fractions)
+
+        keys: list[int] = sorted(self.counts)
+        cumulative: array = array("q")
+        running: int = 0
+        for key in keys:
+            running += self.counts[key]
+            cumulative.append(running)
+        results: list[float | None] = []
+        for fraction in fractions:
+            rank: int = max(1, math.ceil(fraction * total))
+            index: int = bisect_right(cumulative, rank - 1)
+            # NOTE: Rounded to get rid of the floating point noise of the multiplication
+            results.append(round(keys[min(index, len(keys) - 1)] * self.resolution, 9))
+        return results
+
+
+@dataclass(slots=True)
+class Aggregate:
+    stats: RunningStats = field(default_factory=RunningStats)
+    sketch: PercentileSketch = field(default_factory=PercentileSketch)
+
+    def add_values(self, values: Sequence[float]):
+        self.stats.merge(RunningStats.of(values))
+        self.sketch.add_values(values)
+
+    def merge(self, other: "Aggregate"):
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+
+    def quantiles(self, fractions: Sequence[float] = DEFAULT_QUANTILES) -> list[float | None]:
+        return self.sketch.quantiles(fractions)
+
+
+class PriceStatistics:
+    """
+    Aggregates of the points of a price list, as a whole, per tariff period, and per (local) day,
+    week (starting on Monday) and month (starting on the first day).
+
+    Updating the statistics with a list that extends the previous one only processes the points
+    that were appended, any other change to the list starts over.
+    """
+
+    def __init__(self, tariff_calendar: TariffCalendar):
+        self._tariff_calendar: TariffCalendar = tariff_calendar
+        self._price_list: PriceList | None = None
+        self.overall = Aggregate()
+        self.periods: dict[TariffPeriod, Aggregate] = {}
+        self.days: dict[date, Aggregate] = {}
+        self.weeks: dict[date, Aggregate] = {}
+        self.months: dict[date, Aggregate] = {}
+
+    def clear(self):
+        self._price_list = None
+        self.overall = Aggregate()
+        self.periods.clear()
+        self.days.clear()
+        self.weeks.clear()
+        self.months.clear()
+
+    def _extends(self, price_list: PriceList) -> bool:
+        """
+        Whether the given list starts with all the points of the one processed already.
+        """
+        previous: PriceList | None = self._price_list
+        if previous is None:
+            return False
+        amount: int = len(previous)
+        if len(price_list) < amount or price_list.interval != previous.interval:
+            return False
+        # NOTE: Memory views are compared without instantiating the points
+        return (
+            price_list.timestamps[:amount] == previous.timestamps
+            and price_list.values[:amount] == previous.values
+            and price_list.offsets[:amount] == previous.offsets
+        )
+
+    def update(self, price_list: PriceList) -> int:
+        """
+        Bring the statistics up to date with the given list, and return the amount of points that
+        were processed.
+        """
+        if price_list is self._price_list:
+            return 0
+        if not self._extends(price_list):
+            self.clear()
+        start: int = len(self._price_list) if self._price_list is not None else 0
+        self._price_list = price_list
+        if start < len(price_list):
+            self._add(price_list[start:])
+        return len(price_list) - start
+
+    def add(self, price_list: PriceList):
+        """
+        Fold in the points of a list that follows the points processed already, e.g. the next
+        chunk of a long date range.
+
+        The list is not kept track of, the next call to `update` starts over.
+        """
+        self._price_list = None
+        self._add(price_list)
+
+    def groups(self, grouping: StatisticsGrouping) -> Iterator[tuple[str, Aggregate]]:
+        """
+        Return the aggregates of the given grouping in order, with their labels.
+        """
+        match grouping:
+            case StatisticsGrouping.Period:
+                for period, aggregate in sorted(self.periods.items()):
+                    yield period.name.lower(), aggregate
+
+            case StatisticsGrouping.Day:
+                for day, aggregate in sorted(self.days.items()):
+                    yield day.isoformat(), aggregate
+
+            case StatisticsGrouping.Week:
+                for week, aggregate in sorted(self.weeks.items()):
+                    year, number, _ = week.isocalendar()
+                    yield f"{year}-W{number:02}", aggregate
+
+            case StatisticsGrouping.Month:
+                for month, aggregate in sorted(self.months.items()):
+                    yield month.strftime("%Y-%m"), aggregate
+
+    def _add(self, price_list: PriceList):
+        values: memoryview = price_list.values
+        self.overall.add_values(values)
+
+        periods: array = self._tariff_calendar.classify(price_list.timestamps, price_list.offsets)
+        values_by_period: dict[int, list[float]] = {}
+        for period, value in zip(periods, values):
+            values_by_period.setdefault(period, []).append(value)
+        for period, period_values in values_by_period.items():
+            self.periods.setdefault(TariffPeriod(period), Aggregate()).add_values(period_values)
+
+        # NOTE: Points are sorted, so the points of a day are contiguous
+        local_days = (
+            (timestamp + offset) // SECONDS_PER_DAY
+            for timestamp, offset in zip(price_list.timestamps, price_list.offsets)
+        )
+        index: int = 0
+        for local_day, points in groupby(local_days):
+            amount: int = sum(1 for _ in points)
+            day_aggregate = Aggregate()
+            day_aggregate.add_values(values[index : index + amount])
+            index += amount
+
+            day: date = date.fromordinal(EPOCH_ORDINAL + local_day)
+            week: date = day - timedelta(days=day.weekday())
+            month: date = day.replace(day=1)
+            for aggregates, key in ((self.weeks, week), (self.months, month)):
+                aggregates.setdefault(key, Aggregate()).merge(day_aggregate)
+            if (aggregate := self.days.get(day)) is not None:
+                aggregate.merge(day_aggregate)
+            else:
+                self.days[day] = day_aggregate
+
+
+def summary(aggregate: Aggregate) -> dict[str, int | float | None]:
+    """
+    Return the statistics of an aggregate, keyed by `SUMMARY_COLUMNS`.
+    """
+    stats: RunningStats = aggregate.stats
+    if not stats.count:
+        return dict.fromkeys(SUMMARY_COLUMNS) | {"count": 0}
+    return dict(
+        zip(
+            SUMMARY_COLUMNS,
+            (stats.count, stats.minimum, stats.mean, stats.maximum, stats.stddev)
+            + tuple(aggregate.quantiles()),
+        )
+    )
+
+
+def format_summary(aggregate: Aggregate) -> tuple[str, ...]:
+    """
+    Format the statistics of an aggregate, in the order of `SUMMARY_COLUMNS`.
+    """
+    return tuple(
+        "-" if value is None else str(value) if isinstance(value, int) else f"{value:.2f}"
+        for value in summary(aggregate).values()
+    )
@@ -0,0 +1,251 @@
+"""
+Local history of the price lists, in an SQLite database.
+
+Lists are identified by a series (title, geography and interval between points), and their points
+are stored in a `WITHOUT ROWID` table whose primary key is `(series, timestamp)`: the table is
+itself a covering index on the title and timestamp of the points, so that reading a date range is
+a single range scan per list.
+
+Days for which complete lists were stored are recorded, which tells backfilling which ones it can
+skip.
+"""
+
+import logging
+import sqlite3
+import threading
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, time, timedelta
+from itertools import repeat
+from pathlib import Path
+
+from luz_metronomo.default import Default
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+
+logger = logging.getLogger(Default.PROGRAM_NAME)
+
+# NOTE: Bumped whenever the schema changes, stored in the `user_version` of the database
+SCHEMA_VERSION: int = 1
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    geography TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    last_update INTEGER NOT NULL,
+    UNIQUE (title, geography, interval)
+);
+
+CREATE TABLE IF NOT EXISTS price_points (
+    series INTEGER NOT NULL REFERENCES series (id),
+    timestamp INTEGER NOT NULL,
+    utc_offset INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (series, timestamp)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS complete_days (
+    geography TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (geography, interval, day)
+) WITHOUT ROWID;
+"""
+
+
+class StoreError(Exception): ...
+
+
+def local_day_bounds(day: date) -> tuple[int, int]:
+    """
+    Return the epoch timestamps of the start of the given (Spanish) day, and of the following one.
+    """
+    start: datetime = datetime.combine(day, time(), TIMEZONE_SPAIN)
+    end: datetime = datetime.combine(day + timedelta(days=1), time(), TIMEZONE_SPAIN)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def iter_days(day_from: date, day_to: date) -> Iterator[date]:
+    day: date = day_from
+    while day <= day_to:
+        yield day
+        day += timedelta(days=1)
+
+
+def complete_days(price_list: PriceList) -> list[date]:
+    """
+    Return the (Spanish) days for which the list holds every point, daylight saving time
+    transitions included.
+    """
+    counts: Counter[date] = Counter(
+        datetime.fromtimestamp(timestamp, TIMEZONE_SPAIN).date()
+        for timestamp in price_list.timestamps
+    )
+    days: list[date] = []
+    for day, count in counts.items():
+        day_start, day_end = local_day_bounds(day)
+        if count == (day_end - day_start) // price_list.interval:
+            days.append(day)
+    return sorted(days)
+
+
+class PriceStore:
+    """
+    Database of price points, safe to share between threads.
+
+    The database is opened lazily, on first use.
+    """
+
+    def __init__(self, path: Path, geography: str):
+        self.path: Path = path
+        self.geography: str = geography
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None:
+            return self._connection
+
+        logger.debug("Opening price store: %s", self.path)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            # NOTE: Readers don't block the writer, and commits don't wait for the disk as long
+            # as the database stays consistent
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("PRAGMA foreign_keys = ON")
+            version: int = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version > SCHEMA_VERSION:
+                connection.close()
+                raise StoreError(f"Unsupported price store version: {version} ({self.path})")
+            with connection:
+                connection.executescript(SCHEMA)
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        except (OSError, sqlite3.Error) as e:
+            raise StoreError(f"Unable to open the price store: {self.path}") from e
+
+        self._connection = connection
+        return connection
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def ingest(self, price_lists: Iterable[PriceList]) -> int:
+        """
+        Insert or update the points of the given lists, and return the amount of points that
+        changed.
+
+        Ingesting the same lists again changes nothing, points are only written when their value
+        differs from the stored one.
+        """
+        with self._lock:
+            connection: sqlite3.Connection = self._connect()
+            try:
+                with connection:
+                    return sum(
+                        self._ingest_price_list(connection, price_list)
+                        for price_list in price_lists
+                        if len(price_list)
+                    )
+            except sqlite3.Error as e:
+                raise StoreError("Unable to store the price lists") from e
+
+    def _ingest_price_list(self, connection: sqlite3.Connection, price_list: PriceList) -> int:
+        (series,) = connection.execute(
+            """
+            INSERT INTO series (title, geography, interval, last_update) VALUES (?, ?, ?, ?)
+            ON CONFLICT (title, geography, interval)
+                DO UPDATE SET last_update = max(last_update, excluded.last_update)
+            RETURNING id
+            """,
+            (
+                price_list.title,
+                self.geography,
+                price_list.interval,
+                int(price_list.last_update.timestamp()),
+            ),
+        ).fetchone()
+        total_changes: int = connection.total_changes
+        connection.executemany(
+            """
+            INSERT INTO price_points (series, timestamp, utc_offset, value) VALUES (?, ?, ?, ?)
+            ON CONFLICT (series, timestamp)
+                DO UPDATE SET utc_offset = excluded.utc_offset, value = excluded.value
+                WHERE utc_offset != excluded.utc_offset OR value != excluded.value
+            """,
+            zip(repeat(series), price_list.timestamps, price_list.offsets, price_list.values),
+        )
+        changes: int = connection.total_changes - total_changes
+        connection.executemany(
+            "INSERT OR IGNORE INTO complete_days (geography, interval, day) VALUES (?, ?, ?)",
+            (
+                (self.geography, price_list.interval, day.isoformat())
+                for day in complete_days(price_list)
+            ),
+        )
+        return changes
+
+    def read(self, date_from: datetime, date_to: datetime, interval: int) -> list[PriceList]:
+        """
+        Return the stored lists over the given (inclusive) date range, with points every
+        `interval` seconds.
+        """
+        timestamp_from: int = int(date_from.timestamp())
+        timestamp_to: int = int(date_to.timestamp())
+        price_lists: list[PriceList] = []
+        with self._lock:
+            connection: sqlite3.Connection = self._connect()
+            try:
+                series_rows: list[tuple[int, str, int]] = connection.execute(
+                    "SELECT id, title, last_update FROM series"
+                    " WHERE geography = ? AND interval = ? ORDER BY id",
+                    (self.geography, interval),
+                ).fetchall()
+                for series, title, last_update in series_rows:
+                    rows: list[tuple[int, int, float]] = connection.execute(
+                        "SELECT timestamp, utc_offset, value FROM price_points"
+                        " WHERE series = ? AND timestamp BETWEEN ? AND ? ORDER BY timestamp",
+                        (series, timestamp_from, timestamp_to),
+                    ).fetchall()
+                    if not rows:
+                        continue
+                    timestamps, offsets, values = zip(*rows)
+                    price_lists.append(
+                        PriceList.from_columns(
+                            title=title,
+                            last_update=datetime.fromtimestamp(last_update, TIMEZONE_SPAIN),
+                            timestamps=array("q", timestamps),
+                            offsets=array("i", offsets),
+                            values=array("d", values),
+                            interval=interval,
+                        )
+                    )
+            except sqlite3.Error as e:
+                raise StoreError("Unable to read the price lists") from e
+        return price_lists
+
+    def missing_days(self, day_from: date, day_to: date, interval: int) -> list[date]:
+        """
+        Return the days of the given (inclusive) range for which no complete list was stored.
+        """
+        with self._lock:
+            connection: sqlite3.Connection = self._connect()
+            try:
+                stored: set[str] = {
+                    day
+                    for (day,) in connection.execute(
+                        "SELECT day FROM complete_days"
+                        " WHERE geography = ? AND interval = ? AND day BETWEEN ? AND ?",
+                        (self.geography, interval, day_from.isoformat(), day_to.isoformat()),
+                    )
+                }
+            except sqlite3.Error as e:
+                raise StoreError("Unable to read the stored days") from e
+        return [day for day in iter_days(day_from, day_to) if day.isoformat() not in stored]
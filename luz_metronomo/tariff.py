@@ -0,0 +1,106 @@
+from array import array
+from collections.abc import Iterable
+from datetime import date, datetime, time
+
+from luz_metronomo.entity.day_type import DayType
+from luz_metronomo.entity.tariff_period import TariffPeriod
+
+# NOTE: Non-movable national holidays, as (month, day), on which the whole day is “valle”
+NATIONAL_HOLIDAYS: tuple[tuple[int, int], ...] = (
+    (1, 1),
+    (1, 6),
+    (5, 1),
+    (8, 15),
+    (10, 12),
+    (11, 1),
+    (12, 6),
+    (12, 8),
+    (12, 25),
+)
+
+# NOTE: Periods of a workday, the ranges begin at the given time and end right before the next one
+WORKDAY_PERIODS: tuple[tuple[time, TariffPeriod], ...] = (
+    # 00:00 to 08:00
+    (time(hour=0), TariffPeriod.Valle),
+    # 08:00 to 10:00
+    (time(hour=8), TariffPeriod.Llano),
+    # 10:00 to 14:00
+    (time(hour=10), TariffPeriod.Punta),
+    # 14:00 to 18:00
+    (time(hour=14), TariffPeriod.Llano),
+    # 18:00 to 22:00
+    (time(hour=18), TariffPeriod.Punta),
+    # 22:00 to 00:00
+    (time(hour=22), TariffPeriod.Llano),
+)
+
+SECONDS_PER_HOUR: int = 60 * 60
+SECONDS_PER_DAY: int = 24 * SECONDS_PER_HOUR
+SECONDS_PER_SLOT: int = 15 * 60
+SLOTS_PER_DAY: int = SECONDS_PER_DAY // SECONDS_PER_SLOT
+
+
+def _day_periods(day_type: DayType) -> bytes:
+    if day_type == DayType.Holiday:
+        return bytes([TariffPeriod.Valle]) * SLOTS_PER_DAY
+
+    periods: bytearray = bytearray(SLOTS_PER_DAY)
+    for time_start, period in WORKDAY_PERIODS:
+        slot_start: int = (time_start.hour * 60 + time_start.minute) * 60 // SECONDS_PER_SLOT
+        periods[slot_start:] = bytes([period]) * (SLOTS_PER_DAY - slot_start)
+    return bytes(periods)
+
+
+class TariffCalendar:
+    """
+    Classify datetimes into the periods of the 2.0TD tariff.
+
+    The period of every quarter-hour is precomputed for each type of day (workday, or weekend and
+    holiday), and the type of each day is memoised, so classifying a datetime is a couple of table
+    lookups.
+    """
+
+    def __init__(self, holidays: Iterable[date] = (), national_holidays: bool = True):
+        self._national_holidays: bool = national_holidays
+        self._holidays: frozenset[date] = frozenset(holidays)
+        self._table: dict[DayType, bytes] = {
+            day_type: _day_periods(day_type) for day_type in DayType
+        }
+        self._day_types: dict[int, DayType] = {}
+
+    def is_holiday(self, the_date: date) -> bool:
+        return the_date in self._holidays or (
+            self._national_holidays and (the_date.month, the_date.day) in NATIONAL_HOLIDAYS
+        )
+
+    def day_type(self, the_date: date) -> DayType:
+        if the_date.weekday() in (5, 6) or self.is_holiday(the_date):
+            return DayType.Holiday
+        return DayType.Workday
+
+    def _day_type_ordinal(self, ordinal: int) -> DayType:
+        if (day_type := self._day_types.get(ordinal)) is None:
+            day_type = self._day_types[ordinal] = self.day_type(date.fromordinal(ordinal))
+        return day_type
+
+    def period_at(self, the_datetime: datetime) -> TariffPeriod:
+        """
+        Return the period that applies at the given (local) datetime.
+        """
+        slot: int = (the_datetime.hour * 3600 + the_datetime.minute * 60) // SECONDS_PER_SLOT
+        day_type: DayType = self._day_type_ordinal(the_datetime.toordinal())
+        return TariffPeriod(self._table[day_type][slot])
+
+    def classify(self, timestamps: Iterable[int], offsets: Iterable[int]) -> array:
+        """
+        Return the periods (as an array of `TariffPeriod` values) that apply at the given epoch
+        timestamps, interpreted in local time with the given UTC offsets.
+        """
+        # NOTE: Ordinal of the Unix epoch, 1970-01-01
+        epoch_ordinal: int = date(1970, 1, 1).toordinal()
+        periods: array = array("B")
+        for timestamp, offset in zip(timestamps, offsets):
+            days, seconds = divmod(timestamp + offset, SECONDS_PER_DAY)
+            day_type: DayType = self._day_type_ordinal(epoch_ordinal + days)
+            periods.append(self._table[day_type][seconds // SECONDS_PER_SLOT])
+        return periods
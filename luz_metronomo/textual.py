@@ -1,43 +1,154 @@
+import asyncio
 import importlib
 import logging
-from datetime import date, datetime, time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from itertools import count, cycle
 from logging import Logger
 from math import floor
+from typing import Any
 
+from rich.console import Group
+from rich.style import Style
+from rich.table import Table
 from rich.terminal_theme import TerminalTheme
 from rich.text import Text
-from textual import on, work
-from textual.app import App, ComposeResult
-from textual.containers import Grid, VerticalScroll
+from textual import events, on, work
+from textual.app import App, ComposeResult, RenderResult
+from textual.binding import Binding
+from textual.cache import LRUCache
+from textual.constants import DEVTOOLS_HOST, DEVTOOLS_PORT
+from textual.containers import Grid, Horizontal, Vertical, VerticalScroll
+from textual.geometry import Size
 from textual.logging import TextualHandler
 from textual.reactive import reactive
+from textual.screen import ModalScreen
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.timer import Timer
 from textual.widget import Widget
 from textual.widgets import (
     Button,
+    Checkbox,
     DataTable,
     Footer,
     Header,
     Input,
     Label,
+    Static,
     TabbedContent,
     TabPane,
 )
-from textual.widgets.data_table import ColumnKey
-from textual.worker import get_current_worker
 from textual_plotext import PlotextPlot
 
-from luz_metronomo.configuration import Configuration, DevelopmentServer
+from luz_metronomo.api import Api
+from luz_metronomo.async_api import AsyncApi
+from luz_metronomo.cache import PriceCache
+from luz_metronomo.configuration import (
+    Configuration,
+    DevelopmentServer,
+    LuzMetronomo,
+    Planner,
+)
 from luz_metronomo.default import Default
 from luz_metronomo.entity.price_list import PriceList
-from luz_metronomo.util.api import find_price_point_by_datetime, get_price_lists
-from luz_metronomo.util.itertools import first
+from luz_metronomo.entity.tariff_period import TariffPeriod
+from luz_metronomo.metrics import METRICS, format_counter_value
+from luz_metronomo.planner import LoadPlanner, Plan, select_price_list
+from luz_metronomo.prefetch import Prefetcher
+from luz_metronomo.scheduler import RefreshScheduler, is_published
+from luz_metronomo.statistics import (
+    DEFAULT_QUANTILES,
+    Aggregate,
+    PriceStatistics,
+    RunningStats,
+)
+from luz_metronomo.store import PriceStore
+from luz_metronomo.tariff import SECONDS_PER_HOUR, TariffCalendar
+from luz_metronomo.util.api import (
+    IncompleteFetchError,
+    find_price_point_by_datetime,
+    get_cached_price_lists,
+    get_price_lists,
+    get_price_lists_async,
+)
+from luz_metronomo.util.configuration import (
+    api_object,
+    async_api_object,
+    cache_object,
+    load_object,
+    refresh_scheduler_object,
+    store_object,
+    tariff_calendar_object,
+)
 from luz_metronomo.util.textual import textual_theme_enum_to_object
-from luz_metronomo.util.timezone import GMT_PLUS_2
+from luz_metronomo.util.timezone import GMT_PLUS_2, TIMEZONE_SPAIN
+from luz_metronomo.window import PriceWindow, WindowFinder
 
 logger = logging.getLogger(Default.PROGRAM_NAME)
 
 
+# NOTE: Shared between all the cells of all the tables, they must not be modified
+TARIFF_PERIOD_TEXTS: dict[TariffPeriod, Text] = {
+    TariffPeriod.Valle: Text("valle", "green"),
+    TariffPeriod.Llano: Text("llano", "white"),
+    TariffPeriod.Punta: Text("punta", "red"),
+}
+
+
+# NOTE: Colours of the ranges highlighted over the graphs, in turn
+OVERLAY_COLOURS: tuple[str, ...] = ("green", "orange", "cyan", "magenta", "blue", "red")
+
+
+def sort_key(
+    price_list: PriceList, column: str, periods: array | None
+) -> Callable[[int], Any] | None:
+    """
+    Return the key by which the indices of the points of a list are sorted in ascending order of
+    the given column of the table (`None` when they already are, i.e. by time).
+    """
+    match column:
+        case "period":
+            assert periods is not None
+            # NOTE: Periods are sorted by name, like the table would sort their text
+            return lambda index: TARIFF_PERIOD_TEXTS[periods[index]].plain
+
+        case "time":
+            return None
+
+        case "rate":
+            return price_list.values.__getitem__
+
+    raise ValueError(f"Unsupported column: {column}")
+
+
+def spans_several_days(price_list: PriceList) -> bool:
+    return bool(price_list.price_points) and (
+        price_list.price_points[0].datetime.date() != price_list.price_points[-1].datetime.date()
+    )
+
+
+@dataclass
+class PlotSeries:
+    """
+    Static part of a plot, built once per price list.
+    """
+
+    title: str
+    times: list[str]
+    values: list[float]
+    xticks: list[str]
+    yticks: list[int]
+
+
 class PriceListGraph(PlotextPlot):
+    # NOTE: Amount of rendered frames to keep, e.g. to switch back and forth between sizes
+    FRAME_CACHE_SIZE: int = 8
+
     def __init__(
         self,
         price_list: PriceList,
@@ -49,62 +160,486 @@ class PriceListGraph(PlotextPlot):
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
-        self._price_list: PriceList = price_list
         self._plot_marker: str = plot_marker
         self._line_colour: tuple[int, int, int] = line_colour
         if light_plot_theme is not None:
             self.light_mode_theme = light_plot_theme
         if dark_plot_theme is not None:
             self.dark_mode_theme = dark_plot_theme
+        # NOTE: Current time, and floored value of the current price point
+        self._ruler: tuple[datetime, int] | None = None
+        self._frames: OrderedDict[tuple, RenderResult] = OrderedDict()
+        # NOTE: Labelled ranges of points (start and end indices) drawn over the list
+        self._overlays: list[tuple[str, int, int]] = []
+        self._set_price_list(price_list)
+
+    def _set_price_list(self, price_list: PriceList):
+        self._price_list: PriceList = price_list
+        # NOTE: Both formats must describe the same fields, for plotext to parse the labels
+        self._time_format: str = "%H:%M"
+        self._plot_date_form: str = "H:M"
+        if spans_several_days(self._price_list):
+            # NOTE: The year is needed for plotext to parse leap days
+            self._time_format = "%d/%m/%Y %H:%M"
+            self._plot_date_form = "d/m/Y H:M"
+        with METRICS.span("graph_build_series"):
+            self._series: PlotSeries = self._build_series()
+        self._frames.clear()
+
+    def update_price_list(self, price_list: PriceList):
+        """
+        Plot the given list in place of the current one.
+        """
+        self._set_price_list(price_list)
+        self._redraw_with_rulers(datetime.now(GMT_PLUS_2))
+
+    def set_overlays(self, overlays: list[tuple[str, int, int]]):
+        """
+        Highlight the given labelled ranges of points, e.g. the windows of a plan.
+        """
+        if overlays == self._overlays:
+            return
+        self._overlays = overlays
+        self._frames.clear()
+        self.refresh()
+
+    def _build_series(self) -> PlotSeries:
+        times: list[str] = [
+            price_point.datetime.strftime(self._time_format)
+            for price_point in self._price_list.price_points
+        ]
+        values: list[float] = self._price_list.values.tolist()
+        xticks: list[str] = times
+        if spans_several_days(self._price_list):
+            # NOTE: Only label the start of each day, to keep the axis readable
+            xticks = [
+                time_str
+                for time_str, price_point in zip(times, self._price_list.price_points)
+                if price_point.datetime.hour == 0 and price_point.datetime.minute == 0
+            ]
+        elif self._price_list.interval < SECONDS_PER_HOUR:
+            # NOTE: Only label full hours when points last less than that
+            xticks = [
+                time_str
+                for time_str, price_point in zip(times, self._price_list.price_points)
+                if price_point.datetime.minute == 0
+            ]
+        last_update: str = self._price_list.last_update.strftime("%c")
+        return PlotSeries(
+            title=f"Rates as of: {last_update}",
+            times=times,
+            values=values,
+            xticks=xticks,
+            yticks=sorted(set(floor(value) for value in values)),
+        )
 
     def _redraw_with_rulers(self, now: datetime):
-        self._redraw()
-        time_str: str = now.strftime("%H:%M")
-        if (price_point_now := find_price_point_by_datetime(self._price_list, now)) is None:
+        today: datetime = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        if not self._price_list.between(today, today + timedelta(days=1, microseconds=-1)):
+            self._ruler = None
+        elif (price_point_now := find_price_point_by_datetime(self._price_list, now)) is None:
             logger.warning("Unable to find price point for date: %s", now)
+            self._ruler = None
         else:
-            self.plt.hline(floor(price_point_now.value), self._line_colour)
-            # FIXME: Draw an additional line that indicates the lower time range
-            self.plt.vline(time_str, self._line_colour)
-            self.refresh()
+            self._ruler = (now, floor(price_point_now.value))
+        self.refresh()
 
-    def _redraw(self):
-        self.plt.date_form("H:M")
-        last_update: str = self._price_list.last_update.strftime("%c")
-        self.plt.title(f"Rates as of: {last_update}")
+    def _ruler_position(self) -> tuple[int, int] | None:
+        """
+        Position of the rulers, with the horizontal precision of a single cell of the plot.
+        """
+        if self._ruler is None or len(self._price_list) < 2:
+            return None
+        now, value = self._ruler
+        timestamp_first: int = self._price_list.timestamps[0]
+        timestamp_last: int = self._price_list.timestamps[-1]
+        return (
+            floor(
+                (now.timestamp() - timestamp_first)
+                * self.size.width
+                / (timestamp_last - timestamp_first)
+            ),
+            value,
+        )
+
+    def _draw(self):
+        self.plt.date_form(self._plot_date_form)
+        self.plt.title(self._series.title)
         self.plt.clear_data()
-        times: list[str] = [
-            price_point.datetime.strftime("%H:%M") for price_point in self._price_list.price_points
-        ]
-        price_points: list[float] = [
-            price_point.value for price_point in self._price_list.price_points
-        ]
-        self.plt.plot(times, price_points, marker=self._plot_marker)
-        self.plt.xticks(times)
-        self.plt.yticks(set(floor(price_point) for price_point in price_points))
+        self.plt.plot(self._series.times, self._series.values, marker=self._plot_marker)
+        for (label, index_from, index_to), colour in zip(self._overlays, cycle(OVERLAY_COLOURS)):
+            self.plt.plot(
+                self._series.times[index_from:index_to],
+                self._series.values[index_from:index_to],
+                marker=self._plot_marker,
+                color=colour,
+                label=label,
+            )
+        self.plt.xticks(self._series.xticks)
+        self.plt.yticks(self._series.yticks)
+        if self._ruler is not None:
+            now, value = self._ruler
+            self.plt.hline(value, self._line_colour)
+            # FIXME: Draw an additional line that indicates the lower time range
+            self.plt.vline(now.strftime(self._time_format), self._line_colour)
+
+    def render(self) -> RenderResult:
+        frame_key: tuple = (
+            self.size,
+            self.app.dark,
+            self.light_mode_theme,
+            self.dark_mode_theme,
+            self._ruler_position(),
+        )
+        if (frame := self._frames.get(frame_key)) is not None:
+            self._frames.move_to_end(frame_key)
+            METRICS.count("graph_frames", result="cached")
+            return frame
+
+        METRICS.count("graph_frames", result="rendered")
+        with METRICS.span("graph_render"):
+            self._draw()
+            frame = super().render()
+        self._frames[frame_key] = frame
+        while len(self._frames) > PriceListGraph.FRAME_CACHE_SIZE:
+            self._frames.popitem(last=False)
+        return frame
 
     def on_mount(self):
-        now: datetime = datetime.now(GMT_PLUS_2)
-        now_date: date = now.date()
-        if (
-            first(
-                True
-                for price_point in self._price_list.price_points
-                if price_point.datetime.date() == now_date
-            )
-            is not None
+        self._redraw_with_rulers(datetime.now(GMT_PLUS_2))
+        # FIXME: This should be moved to the PriceListPane as a general `highlight_current_time`
+        self.set_interval(
+            60.0,
+            callback=lambda: self._redraw_with_rulers(datetime.now(GMT_PLUS_2)),
+            name="redraw_with_rulers",
+        )
+
+
+class PriceStatisticsPanel(Static):
+    """
+    Summary of a price list, as a whole and per tariff period (and per day when it spans several),
+    updated incrementally as points are appended to the list.
+    """
+
+    def __init__(self, tariff_calendar: TariffCalendar, price_list: PriceList, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._statistics = PriceStatistics(tariff_calendar)
+        self._price_list: PriceList = price_list
+
+    def on_mount(self):
+        self.update_price_list(self._price_list)
+
+    def update_price_list(self, price_list: PriceList):
+        self._price_list = price_list
+        with METRICS.span("statistics_update"):
+            self._statistics.update(price_list)
+        if not self._statistics.overall.stats.count:
+            self.update(Text("No price points"))
+            return
+
+        aggregates: list[tuple[Text, Aggregate]] = [(Text("all"), self._statistics.overall)]
+        aggregates.extend(
+            (TARIFF_PERIOD_TEXTS[period], self._statistics.periods[period])
+            for period in TariffPeriod
+            if period in self._statistics.periods
+        )
+        summary = Table(box=None, expand=True)
+        summary.add_column()
+        for text, _ in aggregates:
+            summary.add_column(text, justify="right")
+        stats: list[RunningStats] = [aggregate.stats for _, aggregate in aggregates]
+        for label, values in (
+            ("min", [stat.minimum for stat in stats]),
+            ("mean", [stat.mean for stat in stats]),
+            ("max", [stat.maximum for stat in stats]),
+            ("stddev", [stat.stddev for stat in stats]),
         ):
-            self._redraw_with_rulers(now)
-            # FIXME: This should be moved to the PriceListPane as a general `highlight_current_time`
-            self.set_interval(
-                60.0,
-                callback=lambda: self._redraw_with_rulers(datetime.now(GMT_PLUS_2)),
-                name="redraw_with_rulers",
+            summary.add_row(label, *(f"{value:.2f}" for value in values))
+        quantiles: list[list[float | None]] = [aggregate.quantiles() for _, aggregate in aggregates]
+        for index, fraction in enumerate(DEFAULT_QUANTILES):
+            summary.add_row(
+                f"p{round(fraction * 100)}",
+                *("-" if values[index] is None else f"{values[index]:.2f}" for values in quantiles),
             )
-        else:
-            self._redraw()
+        if len(self._statistics.days) < 2:
+            self.update(summary)
+            return
+
+        days = Table("day", box=None, expand=True)
+        for column in ("min", "mean", "max"):
+            days.add_column(column, justify="right")
+        for day, aggregate in sorted(self._statistics.days.items()):
+            days.add_row(
+                day.strftime("%Y-%m-%d"),
+                f"{aggregate.stats.minimum:.2f}",
+                f"{aggregate.stats.mean:.2f}",
+                f"{aggregate.stats.maximum:.2f}",
+            )
+        self.update(Group(summary, Text(), days))
+
+
+class PriceListTable(ScrollView, can_focus=True):
+    """
+    Table of the points of a price list, whose rows are only formatted once they are displayed.
+
+    The rows are drawn line by line straight from the columns of the list, in the order of a
+    permutation of its indices computed when a column is first sorted by. Scrolling, moving the
+    cursor and jumping to a point are thus independent of the length of the list, and only the
+    most recently displayed rows are kept formatted.
+    """
+
+    COLUMNS: tuple[str, ...] = ("period", "time", "rate")
+    CELL_PADDING: int = 2
+    # NOTE: Amount of formatted rows to keep, a few screens worth
+    ROW_CACHE_SIZE: int = 512
+
+    COMPONENT_CLASSES = {
+        "price-list-table--header",
+        "price-list-table--even-row",
+        "price-list-table--cursor",
+    }
+
+    BINDINGS = [
+        Binding("up", "move_cursor(-1)", "Cursor up", show=False),
+        Binding("down", "move_cursor(1)", "Cursor down", show=False),
+        Binding("pageup", "move_cursor_page(-1)", "Page up", show=False),
+        Binding("pagedown", "move_cursor_page(1)", "Page down", show=False),
+        Binding("home", "move_cursor_to(0)", "First row", show=False),
+        Binding("end", "move_cursor_to(-1)", "Last row", show=False),
+    ]
+
+    def __init__(self, tariff_calendar: TariffCalendar, price_list: PriceList, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._tariff_calendar: TariffCalendar = tariff_calendar
+        self._sort: tuple[str, bool] = ("time", False)
+        self._cursor: int = 0
+        self._set_price_list(price_list)
+
+    def _set_price_list(self, price_list: PriceList):
+        self._price_list: PriceList = price_list
+        self._time_format: str = "%Y-%m-%d %H:%M" if spans_several_days(price_list) else "%H:%M"
+        # NOTE: Computed when first needed, as they involve all the points of the list
+        self._periods: array | None = None
+        # NOTE: Indices of the points in ascending order, and the key they are sorted by, per column
+        self._sort_orders: dict[str, tuple[array, Callable[[int], Any]] | None] = {}
+        self._cells: LRUCache[int, tuple[Text, str, str]] = LRUCache(PriceListTable.ROW_CACHE_SIZE)
+        self._strips: LRUCache[tuple[int, bool, bool], Strip] = LRUCache(
+            PriceListTable.ROW_CACHE_SIZE
+        )
+        self._header: Strip | None = None
+        self._styles: dict[str, Style] = {}
+
+        rate_width: int = len("rate")
+        if len(price_list):
+            rate_width = max(
+                rate_width,
+                len(f"{min(price_list.values):.2f}"),
+                len(f"{max(price_list.values):.2f}"),
+            )
+        self._widths: tuple[int, ...] = (
+            max(len(text) for text in TARIFF_PERIOD_TEXTS.values()),
+            len(datetime(2000, 1, 1).strftime(self._time_format)),
+            rate_width,
+        )
+        self._cursor = max(0, min(self._cursor, len(price_list) - 1))
+        self.virtual_size = Size(
+            sum(self._widths) + 2 * PriceListTable.CELL_PADDING * len(self._widths),
+            len(price_list) + 1,
+        )
+
+    def update_price_list(self, price_list: PriceList):
+        """
+        Display the given list in place of the current one, in the same order.
+        """
+        self._set_price_list(price_list)
+        self.refresh()
+
+    def notify_style_update(self):
+        super().notify_style_update()
+        self._strips.clear()
+        self._header = None
+        self._styles = {}
+
+    @property
+    def cursor_row(self) -> int:
+        return self._cursor
+
+    def _all_periods(self) -> array:
+        if self._periods is None:
+            self._periods = self._tariff_calendar.classify(
+                self._price_list.timestamps, self._price_list.offsets
+            )
+        return self._periods
+
+    def _sort_order(self, column: str) -> tuple[array, Callable[[int], Any]] | None:
+        if column not in self._sort_orders:
+            if (
+                key := sort_key(
+                    self._price_list, column, self._all_periods() if column == "period" else None
+                )
+            ) is None:
+                self._sort_orders[column] = None
+            else:
+                order: array = array("L", sorted(range(len(self._price_list)), key=key))
+                self._sort_orders[column] = (order, key)
+        return self._sort_orders[column]
+
+    def index_at(self, row: int) -> int:
+        """
+        Return the index in the list of the point displayed on the given row.
+        """
+        column, reverse = self._sort
+        position: int = len(self._price_list) - 1 - row if reverse else row
+        if (sort_order := self._sort_order(column)) is None:
+            return position
+        return sort_order[0][position]
+
+    def row_of(self, index: int) -> int:
+        """
+        Return the row on which the point at the given index in the list is displayed.
+        """
+        column, reverse = self._sort
+        position: int = index
+        if (sort_order := self._sort_order(column)) is not None:
+            order, key = sort_order
+            # NOTE: Sorting is stable, points with the same key are in the order of their indices
+            position = bisect_left(
+                order,
+                index,
+                bisect_left(order, key(index), key=key),
+                bisect_right(order, key(index), key=key),
+            )
+        return len(self._price_list) - 1 - position if reverse else position
+
+    def sort(self, column: str, reverse: bool = False):
+        """
+        Display the rows in ascending (or descending) order of the given column.
+        """
+        if column not in PriceListTable.COLUMNS:
+            raise ValueError(f"Unsupported column: {column}")
+        self._sort = (column, reverse)
+        self._strips.clear()
         self.refresh()
 
+    def move_cursor(self, row: int, center: bool = False):
+        """
+        Move the cursor to the given row, and scroll it into view.
+        """
+        if not len(self._price_list):
+            return
+        self._cursor = max(0, min(row, len(self._price_list) - 1))
+        # NOTE: The header takes up the first line of the viewport
+        height: int = max(1, self.scrollable_content_region.height - 1)
+        scroll_y: int = self.scroll_offset.y
+        if center:
+            scroll_y = self._cursor - height // 2
+        elif self._cursor < scroll_y:
+            scroll_y = self._cursor
+        elif self._cursor >= scroll_y + height:
+            scroll_y = self._cursor - height + 1
+        self.scroll_to(y=max(0, scroll_y), animate=False)
+        self.refresh()
+
+    def jump_to(self, the_datetime: datetime) -> bool:
+        """
+        Move the cursor to the point that applies at the given datetime, if there is one.
+        """
+        if (index := self._price_list.index_at(the_datetime)) is None:
+            return False
+        self.move_cursor(self.row_of(index), center=True)
+        return True
+
+    def action_move_cursor(self, rows: int):
+        self.move_cursor(self._cursor + rows)
+
+    def action_move_cursor_page(self, pages: int):
+        self.move_cursor(self._cursor + pages * max(1, self.scrollable_content_region.height - 1))
+
+    def action_move_cursor_to(self, row: int):
+        self.move_cursor(row if row >= 0 else len(self._price_list) + row)
+
+    def on_click(self, event: events.Click):
+        if event.y > 0 and (row := self.scroll_offset.y + event.y - 1) < len(self._price_list):
+            self.move_cursor(row)
+
+    def _style(self, component_class: str | None = None) -> Style:
+        """
+        Return the style of the table, combined with that of the given component class.
+        """
+        name: str = component_class or ""
+        if (style := self._styles.get(name)) is None:
+            style = self.rich_style
+            if component_class is not None:
+                style += self.get_component_rich_style(component_class)
+            self._styles[name] = style
+        return style
+
+    def _format_cells(self, index: int) -> tuple[Text, str, str]:
+        if (cells := self._cells.get(index)) is None:
+            period: int
+            if self._periods is not None:
+                period = self._periods[index]
+            else:
+                period = self._tariff_calendar.classify(
+                    self._price_list.timestamps[index : index + 1],
+                    self._price_list.offsets[index : index + 1],
+                )[0]
+            cells = self._cells[index] = (
+                TARIFF_PERIOD_TEXTS[TariffPeriod(period)],
+                self._price_list.datetime_at(index).strftime(self._time_format),
+                f"{self._price_list.values[index]:.2f}",
+            )
+        return cells
+
+    def _render_cells(self, cells: Iterable[Text | str], style: Style) -> Strip:
+        padding: str = " " * PriceListTable.CELL_PADDING
+        line = Text(style=style, no_wrap=True)
+        for column, (cell, width) in enumerate(zip(cells, self._widths)):
+            cell_text: Text = cell if isinstance(cell, Text) else Text(cell)
+            alignment: str = " " * (width - cell_text.cell_len)
+            line.append(padding)
+            # NOTE: Rates are aligned to the right, like numbers in the other tables
+            if column == len(self._widths) - 1:
+                line.append(alignment)
+                line.append_text(cell_text)
+            else:
+                line.append_text(cell_text)
+                line.append(alignment)
+            line.append(padding)
+        return Strip(line.render(self.app.console), line.cell_len)
+
+    def _row_line(self, row: int) -> tuple[Strip, Style]:
+        """
+        Return the rendered cells of the given row, and the style of the rest of its line.
+        """
+        index: int = self.index_at(row)
+        is_cursor: bool = row == self._cursor
+        strip_key: tuple[int, bool, bool] = (index, row % 2 == 1, is_cursor)
+        style: Style = self._style()
+        if is_cursor:
+            style = self._style("price-list-table--cursor")
+        elif row % 2 == 1:
+            style = self._style("price-list-table--even-row")
+        if (strip := self._strips.get(strip_key)) is None:
+            strip = self._strips[strip_key] = self._render_cells(self._format_cells(index), style)
+        return strip, style
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        width: int = self.scrollable_content_region.width
+        style: Style = self._style()
+        strip: Strip
+        if y == 0:
+            style = self._style("price-list-table--header")
+            if self._header is None:
+                self._header = self._render_cells(PriceListTable.COLUMNS, style)
+            strip = self._header
+        elif (row := scroll_y + y - 1) < len(self._price_list):
+            strip, style = self._row_line(row)
+        else:
+            return Strip.blank(width, style)
+        return strip.crop_extend(scroll_x, scroll_x + width, style)
+
 
 class PriceListPane(Widget):
     BINDINGS = [
@@ -114,57 +649,103 @@ class PriceListPane(Widget):
         ("T", "sort_rates_by('time', True)", "Sort (reverse) rates by time"),
         ("r", "sort_rates_by('rate')", "Sort rates by value"),
         ("R", "sort_rates_by('rate', True)", "Sort (reverse) rates by value"),
+        ("w", "find_cheapest_windows", "Cheapest windows"),
+        ("h", "toggle_hourly", "Toggle hourly rates"),
+        ("n", "jump_to_now", "Jump to now"),
     ]
 
-    @classmethod
-    def datetime_to_peak_hour_text(cls, datetime: datetime) -> Text:
-        # NOTE: The API only uses hours for time ranges, and assume the range
-        # begins at the full hour
-        # E.g. 08:00 matches the documented low and mid ranges, but assume the
-        # low range ends at 07:59 and the mid range starts at 08:00
-        hora_valle: tuple[Text, list[tuple[time, time]]] = (
-            Text("valle", "green"),
-            [
-                # 00:00 to 08:00
-                (time(hour=0), time(hour=7, minute=59)),
-            ],
-        )
-        hora_llano: tuple[Text, list[tuple[time, time]]] = (
-            Text("llano", "white"),
-            [
-                # 08:00 to 10:00
-                (time(hour=8), time(hour=9, minute=59)),
-                # 14:00 to 18:00
-                (time(hour=14), time(hour=17, minute=59)),
-                # 22:00 to 00:00
-                (time(hour=22), time(hour=23, minute=59)),
-            ],
-        )
-        hora_punta: tuple[Text, list[tuple[time, time]]] = (
-            Text("punta", "red"),
-            [
-                # 10:00 to 14:00
-                (time(hour=10), time(hour=13, minute=59)),
-                # 18:00 to 22:00
-                (time(hour=18), time(hour=21, minute=59)),
-            ],
+    def __init__(
+        self,
+        configuration: Configuration,
+        terminal_theme: TerminalTheme,
+        tariff_calendar: TariffCalendar,
+        price_list: PriceList,
+        *args,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._configuration: Configuration = configuration
+        self._terminal_theme = terminal_theme
+        self._tariff_calendar: TariffCalendar = tariff_calendar
+        # NOTE: List as fetched, and list displayed (the hourly means of the former, if toggled)
+        self._price_list_source: PriceList = price_list
+        self._hourly: bool = False
+        self._price_list = price_list
+
+    def update_price_list(self, price_list: PriceList):
+        """
+        Display the given list in place of the current one, only updating what changed.
+        """
+        if price_list == self._price_list_source:
+            return
+        self._price_list_source = price_list
+        self._display_price_list()
+
+    def _display_price_list(self):
+        price_list: PriceList = self._price_list_source
+        if self._hourly:
+            price_list = price_list.roll_up(SECONDS_PER_HOUR)
+        if price_list == self._price_list:
+            return
+        self._price_list = price_list
+        self.query_one(PriceListGraph).update_price_list(price_list)
+        self.query_one(PriceStatisticsPanel).update_price_list(price_list)
+        self.query_one(PriceListTable).update_price_list(price_list)
+
+    def compose(self) -> ComposeResult:
+        yield PriceListGraph(
+            price_list=self._price_list,
+            plot_marker=self._configuration.user_interface.plot_marker,
+            line_colour=(
+                self._terminal_theme.foreground_color.red,
+                self._terminal_theme.foreground_color.green,
+                self._terminal_theme.foreground_color.blue,
+            ),
+            light_plot_theme=self._configuration.user_interface.light_plot_theme,
+            dark_plot_theme=self._configuration.user_interface.dark_plot_theme,
         )
+        with Horizontal(classes="price-list-details"):
+            yield PriceListTable(tariff_calendar=self._tariff_calendar, price_list=self._price_list)
+            yield PriceStatisticsPanel(
+                tariff_calendar=self._tariff_calendar, price_list=self._price_list
+            )
+
+    def action_find_cheapest_windows(self):
+        self.app.push_screen(CheapestWindowsScreen(self._price_list, self._tariff_calendar))
+
+    def action_toggle_hourly(self):
+        """
+        Switch between the points of the list and their hourly means, e.g. with quarter-hour
+        prices, without fetching them again.
+        """
+        self._hourly = not self._hourly
+        self._display_price_list()
+
+    def action_sort_rates_by(self, column_predicate: str, reverse: bool = False):
+        if column_predicate not in PriceListTable.COLUMNS:
+            logger.warning("Unable to get sort order for column labelled: %s", column_predicate)
+            return
+
+        self.query_one(PriceListTable).sort(column_predicate, reverse)
+
+    def action_jump_to_now(self):
+        if not self.query_one(PriceListTable).jump_to(datetime.now(GMT_PLUS_2)):
+            self.notify("No rate for the current time", severity="warning")
 
-        # NOTE: On the weekend, it’s always “valle”.
-        if datetime.weekday() in (5, 6):
-            return hora_valle[0]
 
-        for text, horas in (hora_valle, hora_llano, hora_punta):
-            for hora in horas:
-                if hora[0] <= datetime.time() <= hora[1]:
-                    return text
+class PlanPane(Widget):
+    """
+    Cheapest schedule of the configured loads over a price list, overlaid on its graph.
 
-        return Text()
+    Loads are planned from now on, their earliest start and deadline being relative to the first
+    day of the list.
+    """
 
     def __init__(
         self,
         configuration: Configuration,
         terminal_theme: TerminalTheme,
+        tariff_calendar: TariffCalendar,
         price_list: PriceList,
         *args,
         **kwargs,
@@ -172,21 +753,8 @@ class PriceListPane(Widget):
         super().__init__(*args, **kwargs)
         self._configuration: Configuration = configuration
         self._terminal_theme = terminal_theme
-        self._price_list = price_list
-        self._column_keys = {}
-
-    def on_mount(self):
-        table: DataTable = self.query_one(DataTable)
-        table.add_columns("period", "time", "rate")
-        # FIXME: Highlight row of current time period, update every minute
-        table.add_rows(
-            (
-                PriceListPane.datetime_to_peak_hour_text(price_point.datetime),
-                price_point.datetime.strftime("%H:%M"),
-                price_point.value,
-            )
-            for price_point in self._price_list.price_points
-        )
+        self._tariff_calendar: TariffCalendar = tariff_calendar
+        self._price_list: PriceList = price_list
 
     def compose(self) -> ComposeResult:
         yield PriceListGraph(
@@ -202,22 +770,207 @@ class PriceListPane(Widget):
         )
         yield DataTable(cell_padding=2, cursor_type="row", zebra_stripes=True)
 
-    def action_sort_rates_by(self, column_predicate: str, reverse: bool = False):
+    def on_mount(self):
+        self.query_one(DataTable).add_columns("load", "from", "to", "power", "mean rate", "cost")
+        self._update_plan()
+
+    def update_price_list(self, price_list: PriceList):
+        if price_list == self._price_list:
+            return
+        self._price_list = price_list
+        self.query_one(PriceListGraph).update_price_list(price_list)
+        self._update_plan()
+
+    def _update_plan(self):
+        planner_config: Planner = self._configuration.planner
+        day: date = (
+            self._price_list.datetime_at(0).date() if len(self._price_list) else date.today()
+        )
+        with METRICS.span("plan_loads"):
+            plan: Plan = LoadPlanner(
+                self._price_list, self._tariff_calendar, planner_config.max_power
+            ).plan(
+                (load_object(load, day) for load in planner_config.loads),
+                not_before=datetime.now(TIMEZONE_SPAIN),
+            )
+
+        self.query_one(PriceListGraph).set_overlays(
+            [
+                (placement.load.name, placement.index_from, placement.index_to)
+                for placement in plan.placements
+            ]
+        )
         table: DataTable = self.query_one(DataTable)
-        column_key: ColumnKey | None = first(
-            column.key
-            for column in table.columns.values()
-            if column.label.plain == column_predicate
+        table.clear()
+        time_format: str = "%Y-%m-%d %H:%M" if spans_several_days(self._price_list) else "%H:%M"
+        for placement in plan.placements:
+            table.add_row(
+                placement.load.name,
+                placement.date_from.strftime(time_format),
+                placement.date_to.strftime(time_format),
+                f"{placement.load.power:.2f}",
+                f"{placement.mean_price:.2f}",
+                f"{placement.cost:.2f}",
+            )
+        for load in plan.unplaced:
+            table.add_row(load.name, "-", "-", f"{load.power:.2f}", "-", "-")
+        table.add_row(
+            Text("total", "bold"),
+            "",
+            "",
+            "",
+            "",
+            Text(f"{plan.cost:.2f}", "bold"),
         )
-        if column_key is not None:
-            # NOTE: The table doesn’t know how to sort `Text` instances
-            table.sort(
-                column_key,
-                reverse=reverse,
-                key=lambda value: value.plain if isinstance(value, Text) else value,
+
+
+def parse_duration(value: str) -> timedelta:
+    """
+    Parse a duration given in hours, either as a number (e.g. `1.5`) or as `H:MM` (e.g. `1:30`).
+    """
+    if ":" in value:
+        hours, minutes = value.split(":", 1)
+        return timedelta(hours=int(hours or 0), minutes=int(minutes or 0))
+    return timedelta(hours=float(value))
+
+
+class CheapestWindowsScreen(ModalScreen):
+    """
+    Find the cheapest windows of a given duration within the displayed list, e.g. to run an
+    appliance.
+    """
+
+    BINDINGS = [("escape", "dismiss", "Close")]
+
+    DEFAULT_DURATION: str = "2"
+    DEFAULT_AMOUNT: int = 3
+
+    def __init__(self, price_list: PriceList, tariff_calendar: TariffCalendar, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._window_finder = WindowFinder(price_list, tariff_calendar)
+
+    def compose(self) -> ComposeResult:
+        with Vertical(id="cheapest-windows-dialog"):
+            yield Label(f"Cheapest windows: {self._window_finder.price_list.title}")
+            with Horizontal(classes="cheapest-windows-options"):
+                yield Label("Hours:")
+                yield Input(
+                    placeholder=CheapestWindowsScreen.DEFAULT_DURATION,
+                    restrict=r"[0-9.:]*",
+                    id="cheapest-windows-duration",
+                )
+                yield Label("Windows:")
+                yield Input(
+                    placeholder=str(CheapestWindowsScreen.DEFAULT_AMOUNT),
+                    restrict=r"[0-9]*",
+                    id="cheapest-windows-amount",
+                )
+            with Horizontal(classes="cheapest-windows-options"):
+                for period in TariffPeriod:
+                    yield Checkbox(
+                        TARIFF_PERIOD_TEXTS[period].copy(),
+                        value=True,
+                        id=f"cheapest-windows-{period.value}",
+                    )
+                yield Checkbox("from now", value=True, id="cheapest-windows-from-now")
+            yield DataTable(cursor_type="row", zebra_stripes=True)
+            with Horizontal(classes="cheapest-windows-buttons"):
+                yield Button("find", variant="primary", id="cheapest-windows-submit")
+                yield Button("close", id="cheapest-windows-close")
+
+    def on_mount(self):
+        self.query_one(DataTable).add_columns("from", "to", "mean rate")
+        self.find_cheapest_windows()
+
+    @on(Input.Submitted)
+    @on(Checkbox.Changed)
+    @on(Button.Pressed, "#cheapest-windows-submit")
+    def find_cheapest_windows(self):
+        duration_value: str = self.query_one("#cheapest-windows-duration", Input).value
+        amount_value: str = self.query_one("#cheapest-windows-amount", Input).value
+        try:
+            duration: timedelta = parse_duration(
+                duration_value or CheapestWindowsScreen.DEFAULT_DURATION
             )
-        else:
-            logger.warning("Unable to get key for column labelled: %s", column_predicate)
+        except ValueError:
+            self.notify(f"Invalid duration: {duration_value}", severity="error")
+            return
+        if duration <= timedelta():
+            self.notify("The duration must be positive", severity="error")
+            return
+        amount: int = int(amount_value) if amount_value else CheapestWindowsScreen.DEFAULT_AMOUNT
+        periods: list[TariffPeriod] = [
+            period
+            for period in TariffPeriod
+            if self.query_one(f"#cheapest-windows-{period.value}", Checkbox).value
+        ]
+        date_from: datetime | None = None
+        if self.query_one("#cheapest-windows-from-now", Checkbox).value:
+            date_from = datetime.now(TIMEZONE_SPAIN)
+
+        with METRICS.span("cheapest_windows"):
+            windows: list[PriceWindow] = self._window_finder.cheapest_windows(
+                duration, max(amount, 1), periods=periods, date_from=date_from
+            )
+        table: DataTable = self.query_one(DataTable)
+        table.clear()
+        time_format: str = (
+            "%Y-%m-%d %H:%M" if spans_several_days(self._window_finder.price_list) else "%H:%M"
+        )
+        for window in windows:
+            table.add_row(
+                window.date_from.strftime(time_format),
+                window.date_to.strftime(time_format),
+                f"{window.mean:.2f}",
+            )
+        if not windows:
+            self.notify("No window matches", severity="warning")
+
+    @on(Button.Pressed, "#cheapest-windows-close")
+    def close_dialog(self):
+        self.dismiss()
+
+
+class MetricsPanel(Static):
+    """
+    Summary of the spans and counters recorded so far, refreshed while displayed.
+    """
+
+    REFRESH_INTERVAL: float = 1.0
+
+    def on_mount(self):
+        self.display = False
+        self.set_interval(
+            MetricsPanel.REFRESH_INTERVAL, self.refresh_metrics, name="refresh_metrics"
+        )
+
+    def watch_display(self, display: bool):
+        if display:
+            self.refresh_metrics()
+
+    def refresh_metrics(self):
+        if not self.display:
+            return
+
+        spans = Table("span", "count", "mean", "max", "last", box=None, expand=True)
+        for name, labels, summary in METRICS.spans():
+            spans.add_row(
+                _metric_label(name, labels),
+                str(summary.count),
+                f"{summary.mean * 1000:.1f}ms",
+                f"{summary.maximum * 1000:.1f}ms",
+                f"{summary.last * 1000:.1f}ms",
+            )
+        counters = Table("counter", "value", box=None, expand=True)
+        for name, labels, value in METRICS.counters():
+            counters.add_row(_metric_label(name, labels), format_counter_value(value))
+        self.update(Group(spans, Text(), counters))
+
+
+def _metric_label(name: str, labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return name
+    return f"{name} ({', '.join(f'{label}={value}' for label, value in labels)})"
 
 
 # FIXME: Move?
@@ -225,37 +978,86 @@ def datetime_now_as_ymd() -> datetime:
     return datetime.now(GMT_PLUS_2).replace(hour=0, minute=0, second=0, tzinfo=None)
 
 
+def date_range_end(date_from: datetime, days: int) -> datetime:
+    return (date_from + timedelta(days=days - 1)).replace(hour=23, minute=59, second=0, tzinfo=None)
+
+
 class LuzMetronomoApp(App):
     TITLE = "Luz Metronomo"
 
     BINDINGS = [
         ("q", "exit", "Exit the programme"),
+        ("left_square_bracket", "move_date_from(-1)", "Previous day"),
+        ("right_square_bracket", "move_date_from(1)", "Next day"),
+        ("f12", "toggle_metrics", "Metrics"),
     ]
 
-    price_lists: reactive[list[PriceList]] = reactive([], layout=True, recompose=True)
-    date_from: reactive[datetime] = reactive(datetime_now_as_ymd)
+    PLAN_PANE_ID: str = "plan"
+
+    price_lists: reactive[list[PriceList]] = reactive([], init=False)
+    # NOTE: Not initialised by watchers, which don't run for values set before mounting (e.g. a
+    # date given on the command line): the first lists are shown once mounted instead
+    date_from: reactive[datetime] = reactive(datetime_now_as_ymd, init=False)
+    days: reactive[int] = reactive(1, init=False)
 
-    def __init__(self, configuration: Configuration, *args, **kwargs):
+    def __init__(
+        self,
+        configuration: Configuration,
+        *args,
+        date_from: datetime | None = None,
+        days: int = 1,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
+        if date_from is not None:
+            self.set_reactive(LuzMetronomoApp.date_from, date_from)
+        self.set_reactive(LuzMetronomoApp.days, days)
         self.CSS = (
             importlib.resources.files("luz_metronomo")
             .joinpath("luz_metronomo_app.tcss")
             .read_text()
         )
         self._configuration: Configuration = configuration
+        self._api: Api = api_object(self._configuration.api)
+        self._async_api: AsyncApi = async_api_object(self._configuration.api)
+        self._price_cache: PriceCache | None = cache_object(self._configuration.api.cache)
+        self._price_store: PriceStore | None = store_object(self._configuration.store)
+        self._tariff_calendar: TariffCalendar = tariff_calendar_object(self._configuration.tariff)
+        self._prefetcher: Prefetcher | None = None
+        if self._price_cache is not None and self._configuration.user_interface.prefetch_days:
+            self._prefetcher = Prefetcher(
+                lambda date_from, date_to: list(
+                    get_price_lists(
+                        self._configuration.api,
+                        date_from,
+                        date_to,
+                        api=self._api,
+                        cache=self._price_cache,
+                        store=self._price_store,
+                    )
+                ),
+                max_pending=self._configuration.user_interface.prefetch_queue_size,
+            )
+        self._refresh_scheduler: RefreshScheduler = refresh_scheduler_object(
+            self._configuration.user_interface.refresh
+        )
+        self._refresh_timer: Timer | None = None
+        # NOTE: Identifiers of the panes that display each list, by title
+        self._pane_ids: dict[str, str] = {}
+        self._pane_ids_counter: Iterator[int] = count()
 
         console_config: DevelopmentServer = self._configuration.luz_metronomo.development_server
         if console_config.enable:
-            logger.info(
-                "Connecting to development server: %s:%s", console_config.host, console_config.port
-            )
+            host: str = console_config.host or DEVTOOLS_HOST
+            port: int = console_config.port or DEVTOOLS_PORT
+            logger.info("Connecting to development server: %s:%s", host, port)
             try:
                 from textual_dev.client import DevtoolsClient
                 from textual_dev.redirect_output import StdoutRedirector
             except ImportError:
                 logger.warning("Development dependencies are not installed")
             else:
-                self.devtools = DevtoolsClient(host=console_config.host, port=console_config.port)
+                self.devtools = DevtoolsClient(host=host, port=port)
                 self._devtools_redirector = StdoutRedirector(self.devtools)
                 textual_handler = TextualHandler()
                 logger.addHandler(textual_handler)
@@ -276,8 +1078,11 @@ class LuzMetronomoApp(App):
         if self._configuration.user_interface.use_dark_theme is not None:
             self.dark = self._configuration.user_interface.use_dark_theme
 
-    # TODO: A checkbox/option to update to the following day at midnight
     def compose(self) -> ComposeResult:
+        with METRICS.span("ui_compose"):
+            yield from self._compose()
+
+    def _compose(self) -> ComposeResult:
         header_widget = Header(show_clock=True)
         header_widget.icon = "≡"
         yield header_widget
@@ -289,24 +1094,95 @@ class LuzMetronomoApp(App):
                 restrict=r"[0-9-]*",
                 id="date-picker-input",
             ),
+            Label("Days:", id="date-range-label"),
+            Input(
+                placeholder=str(self.days),
+                restrict=r"[0-9]*",
+                id="date-range-input",
+            ),
             Button("today", id="date-picker-today"),
             Button("ok", variant="primary", id="date-picker-submit"),
+            Checkbox(
+                "follow today",
+                value=self._configuration.user_interface.follow_today,
+                id="date-picker-follow",
+            ),
             id="date-picker-container",
         )
         with VerticalScroll(id="price-lists-container"):
-            with TabbedContent():
-                for price_list in self.price_lists:
-                    with TabPane(price_list.title):
-                        yield PriceListPane(
+            # NOTE: Panes are managed by `watch_price_lists`
+            yield TabbedContent()
+        yield MetricsPanel(id="metrics-panel")
+        yield Footer()
+
+    async def watch_price_lists(self, price_lists: list[PriceList]):
+        with METRICS.span("ui_update_price_lists"):
+            await self._update_panes(price_lists)
+
+    async def _update_panes(self, price_lists: list[PriceList]):
+        tabbed_content: TabbedContent = self.query_one(TabbedContent)
+
+        titles: set[str] = {price_list.title for price_list in price_lists}
+        for title, pane_id in list(self._pane_ids.items()):
+            if title not in titles:
+                del self._pane_ids[title]
+                await tabbed_content.remove_pane(pane_id)
+
+        for price_list in price_lists:
+            if (pane_id := self._pane_ids.get(price_list.title)) is not None:
+                tabbed_content.get_pane(pane_id).query_one(PriceListPane).update_price_list(
+                    price_list
+                )
+            else:
+                pane_id = f"price-list-{next(self._pane_ids_counter)}"
+                self._pane_ids[price_list.title] = pane_id
+                await tabbed_content.add_pane(
+                    TabPane(
+                        price_list.title,
+                        PriceListPane(
                             configuration=self._configuration,
                             terminal_theme=self.ansi_theme,
+                            tariff_calendar=self._tariff_calendar,
                             price_list=price_list,
-                        )
-        yield Footer()
+                        ),
+                        id=pane_id,
+                    )
+                )
+
+        await self._update_plan_pane(price_lists)
+
+    async def _update_plan_pane(self, price_lists: list[PriceList]):
+        tabbed_content: TabbedContent = self.query_one(TabbedContent)
+        price_list: PriceList | None = None
+        if self._configuration.planner.loads:
+            price_list = select_price_list(price_lists, self._configuration.planner.price_list)
+        plan_panes = tabbed_content.query(f"#{LuzMetronomoApp.PLAN_PANE_ID}")
+
+        if price_list is None:
+            if plan_panes:
+                await tabbed_content.remove_pane(LuzMetronomoApp.PLAN_PANE_ID)
+        elif plan_panes:
+            plan_panes.first().query_one(PlanPane).update_price_list(price_list)
+        else:
+            await tabbed_content.add_pane(
+                TabPane(
+                    "Plan",
+                    PlanPane(
+                        configuration=self._configuration,
+                        terminal_theme=self.ansi_theme,
+                        tariff_calendar=self._tariff_calendar,
+                        price_list=price_list,
+                    ),
+                    id=LuzMetronomoApp.PLAN_PANE_ID,
+                )
+            )
 
     async def watch_date_from(self, date_from: datetime | None):
         if date_from is not None:
-            self.get_price_lists(date_from)
+            self.show_price_lists(date_from, self.days)
+
+    async def watch_days(self, days: int):
+        self.show_price_lists(self.date_from, days)
 
     def update_price_lists(self, price_lists: list[PriceList]):
         self.price_lists = price_lists
@@ -314,29 +1190,214 @@ class LuzMetronomoApp(App):
     def set_price_lists_loading(self, loading: bool):
         self.query_one("#price-lists-container").loading = loading
 
-    @work(exclusive=True, thread=True)
-    def get_price_lists(self, date_from: datetime):
-        worker = get_current_worker()
-        date_to = date_from.replace(hour=23, minute=59, second=0, tzinfo=None)
-        self.call_from_thread(self.set_price_lists_loading, True)
-        price_lists = list(get_price_lists(self._configuration.api, date_from, date_to))
-        if not worker.is_cancelled:
-            self.call_from_thread(lambda value: setattr(self, "price_lists", value), price_lists)
+    def show_price_lists(self, date_from: datetime, days: int):
+        """
+        Display the price lists over the given range, straight from the cache if they were fetched
+        already, or from a worker otherwise.
+        """
+        if self._price_cache is not None and (
+            price_lists := get_cached_price_lists(
+                self._configuration.api,
+                date_from,
+                date_range_end(date_from, days),
+                api=self._api,
+                cache=self._price_cache,
+            )
+        ):
+            logger.debug("Price lists displayed from the cache: %s (%d days)", date_from, days)
+            # NOTE: Cancel any fetch still running for a previous range
+            self.workers.cancel_group(self, "default")
+            self.set_price_lists_loading(False)
+            self.price_lists = price_lists
+            self.prefetch_price_lists(date_from, days)
         else:
-            logger.warning("Worker was cancelled, the price lists will not be updated")
-        self.call_from_thread(self.set_price_lists_loading, False)
+            self.get_price_lists(date_from, days)
+
+    def prefetch_price_lists(self, date_from: datetime, days: int):
+        """
+        Schedule the prefetching of the ranges surrounding the given one.
+        """
+        if self._prefetcher is None:
+            return
+
+        prefetch_days: int = self._configuration.user_interface.prefetch_days
+        date_ranges: list[tuple[datetime, datetime]] = []
+        for offset in range(1, prefetch_days + 1):
+            for prefetch_from in (
+                date_from + timedelta(days=offset),
+                date_from - timedelta(days=offset),
+            ):
+                date_ranges.append((prefetch_from, date_range_end(prefetch_from, days)))
+        # NOTE: The following day only once its prices are known to be published, lists without
+        # prices would be fetched for nothing
+        tomorrow: datetime = datetime_now_as_ymd() + timedelta(days=1)
+        if self._refresh_scheduler.is_published(tomorrow.date()) and not (
+            date_from <= tomorrow < date_from + timedelta(days=days + prefetch_days)
+        ):
+            date_ranges.append((tomorrow, date_range_end(tomorrow, days)))
+        self._prefetcher.schedule(date_ranges)
+
+    @work(exclusive=True)
+    async def get_price_lists(self, date_from: datetime, days: int, revalidate: bool = False):
+        # NOTE: Starting another fetch cancels this one, which closes its connections
+        date_to = date_range_end(date_from, days)
+        self.set_price_lists_loading(True)
+        if self._prefetcher is not None:
+            self._prefetcher.pause()
+        try:
+            with METRICS.span("ui_fetch_worker"):
+                price_lists = await get_price_lists_async(
+                    self._configuration.api,
+                    date_from,
+                    date_to,
+                    api=self._async_api,
+                    cache=self._price_cache,
+                    revalidate=revalidate,
+                    store=self._price_store,
+                )
+        except asyncio.CancelledError:
+            METRICS.count("ui_fetch_workers_cancelled")
+            logger.debug("Fetch cancelled: %s (%d days)", date_from, days)
+            raise
+        except IncompleteFetchError as e:
+            # NOTE: Partial lists would be taken for complete ones, the current ones are kept
+            logger.error("%s", e)
+            self.notify(str(e), title="Unable to fetch the prices", severity="error")
+            self.set_price_lists_loading(False)
+            return
+        finally:
+            if self._prefetcher is not None:
+                self._prefetcher.resume()
+        self.price_lists = price_lists
+        self.prefetch_price_lists(date_from, days)
+        self.set_price_lists_loading(False)
 
     @on(Input.Submitted, "#date-picker-input")
+    @on(Input.Submitted, "#date-range-input")
     @on(Button.Pressed, "#date-picker-submit")
     def update_date_from_value(self):
+        date_from: datetime = self.date_from
         input: Input = self.query_one("#date-picker-input", Input)
-        date_now: datetime = datetime.strptime(input.value, "%Y-%m-%d")
-        self.date_from = date_now.replace(hour=0, minute=0, second=0, tzinfo=None)
+        if input.value:
+            date_now: datetime = datetime.strptime(input.value, "%Y-%m-%d")
+            date_from = date_now.replace(hour=0, minute=0, second=0, tzinfo=None)
+        days: int = self.days
+        range_input: Input = self.query_one("#date-range-input", Input)
+        if range_input.value and int(range_input.value) > 0:
+            days = int(range_input.value)
+
+        # NOTE: Both values are set at once, to only fetch the price lists once
+        self.set_reactive(LuzMetronomoApp.date_from, date_from)
+        self.set_reactive(LuzMetronomoApp.days, days)
+        self.show_price_lists(date_from, days)
 
     @on(Button.Pressed, "#date-picker-today")
     def update_date_from_input(self):
         input: Input = self.query_one("#date-picker-input", Input)
         input.value = datetime_now_as_ymd().strftime("%Y-%m-%d")
 
+    @on(Checkbox.Changed, "#date-picker-follow")
+    def update_follow_today(self, event: Checkbox.Changed):
+        if event.value:
+            self.date_from = datetime.combine(datetime.now(TIMEZONE_SPAIN).date(), time())
+
+    def schedule_refresh(self):
+        """
+        Wake up when the day rolls over, or when the prices of the following day are due to be
+        polled for.
+        """
+        delay: float = self._refresh_scheduler.sleep_duration(datetime.now(TIMEZONE_SPAIN))
+        # NOTE: One-off timers without any delay never fire
+        delay = max(delay, 0.01)
+        logger.debug("Next refresh check in %.0fs", delay)
+        # NOTE: A single check is pending at any time, e.g. when a poll is replaced by another one
+        if self._refresh_timer is not None:
+            self._refresh_timer.stop()
+        self._refresh_timer = self.set_timer(delay, self.check_refresh, name="refresh")
+
+    def check_refresh(self):
+        now: datetime = datetime.now(TIMEZONE_SPAIN)
+        previous_day: date | None = self._refresh_scheduler.rollover(now)
+        if (
+            previous_day is not None
+            and self.date_from.date() == previous_day
+            and self.query_one("#date-picker-follow", Checkbox).value
+        ):
+            logger.info("Moving on to the following day: %s", now.date())
+            self.date_from = datetime.combine(now.date(), time())
+
+        if (day := self._refresh_scheduler.poll_due(now)) is not None:
+            self.poll_publication(day)
+        else:
+            self.schedule_refresh()
+
+    @work(exclusive=True, group="refresh", exit_on_error=False)
+    async def poll_publication(self, day: date):
+        """
+        Check whether the prices of the given day are published, and refresh the displayed lists
+        if they cover it and they are.
+        """
+        date_from: datetime = datetime.combine(day, time())
+        published: bool = False
+        try:
+            with METRICS.span("ui_poll_publication"):
+                price_lists: list[PriceList] = await get_price_lists_async(
+                    self._configuration.api,
+                    date_from,
+                    date_range_end(date_from, 1),
+                    api=self._async_api,
+                    cache=self._price_cache,
+                    revalidate=True,
+                    store=self._price_store,
+                )
+            published = is_published(price_lists)
+        except IncompleteFetchError as e:
+            # NOTE: Failed requests are retried like unpublished prices are
+            logger.warning("%s, polling again later", e)
+        except Exception:
+            # NOTE: Any other error must not stop the refreshes either
+            logger.exception("Unable to poll for the prices", extra={"day": day})
+        finally:
+            METRICS.count("ui_publication_polls", published=published)
+            self._refresh_scheduler.record_poll(datetime.now(TIMEZONE_SPAIN), day, published)
+            self.schedule_refresh()
+
+        displayed_to: datetime = date_range_end(self.date_from, self.days)
+        if published and self.date_from <= date_from <= displayed_to:
+            self.get_price_lists(self.date_from, self.days, revalidate=True)
+        elif published:
+            self.prefetch_price_lists(self.date_from, self.days)
+
+    def on_mount(self):
+        self.show_price_lists(self.date_from, self.days)
+        if self._prefetcher is not None:
+            self._prefetcher.start()
+        self._refresh_scheduler.rollover(datetime.now(TIMEZONE_SPAIN))
+        self.schedule_refresh()
+        luz_metronomo_config: LuzMetronomo = self._configuration.luz_metronomo
+        if (path_metrics := luz_metronomo_config.metrics_file) is not None:
+            self.set_interval(
+                luz_metronomo_config.metrics_interval,
+                callback=lambda: METRICS.write_prometheus(path_metrics),
+                name="write_metrics",
+            )
+
+    async def on_unmount(self):
+        if self._refresh_timer is not None:
+            self._refresh_timer.stop()
+        if self._prefetcher is not None:
+            self._prefetcher.stop()
+        self._api.close()
+        await self._async_api.close()
+        if self._price_store is not None:
+            self._price_store.close()
+
+    def action_move_date_from(self, days: int):
+        self.date_from = self.date_from + timedelta(days=days)
+
+    def action_toggle_metrics(self):
+        metrics_panel: MetricsPanel = self.query_one(MetricsPanel)
+        metrics_panel.display = not metrics_panel.display
+
     def action_exit(self):
         self.exit()
@@ -1,84 +1,563 @@
+import asyncio
 import logging
-from collections.abc import Iterator
-from datetime import datetime
-from typing import Any
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime, timedelta
+from itertools import chain, islice
 
-from urllib3.util import Retry as UrllibRetry
-from urllib3.util import Timeout as UrllibTimeout
-
-from luz_metronomo.api import Api, ApiError
+from luz_metronomo.api import (
+    Api,
+    ApiError,
+    decode_price_lists,
+    normalise_datetime_field,
+)
+from luz_metronomo.async_api import AsyncApi
+from luz_metronomo.cache import CacheKey, PriceCache, StaleEntry, response_digest
+from luz_metronomo.coalesce import RequestCoalescer
 from luz_metronomo.configuration import Api as ApiConfig
 from luz_metronomo.default import Default
 from luz_metronomo.entity.price_list import PriceList
 from luz_metronomo.entity.price_point import PricePoint
-from luz_metronomo.util.configuration import retry_object, timeout_object
+from luz_metronomo.entity.validators import Validators
+from luz_metronomo.metrics import METRICS
+from luz_metronomo.scheduler import is_published
+from luz_metronomo.store import PriceStore, StoreError
+from luz_metronomo.util.configuration import api_object
+from luz_metronomo.util.timezone import GMT_PLUS_2
 
 logger = logging.getLogger(Default.PROGRAM_NAME)
 
+# NOTE: Shared by all the clients, so that a range requested by the user, prefetched and polled for
+# at the same time is only requested once (per whether it revalidates the cache)
+REQUESTS_IN_FLIGHT = RequestCoalescer()
 
-# FIXME: Document.
-def get_price_lists(
-    api_config: ApiConfig, date_from: datetime, date_to: datetime
-) -> Iterator[PriceList]:
-    retry: UrllibRetry = retry_object(api_config.retry)
-    timeout: UrllibTimeout = timeout_object(api_config.timeout)
-    try:
-        api = Api(url=str(api_config.url), retry=retry, timeout=timeout)
-        data: dict[str, Any] = api.get(date_from, date_to)
-    except ApiError:
-        logger.exception("Could not fetch data", extra={"url": str(api_config.url)})
-    else:
-        for price_list in data["included"]:
-            title: str = price_list["attributes"]["title"]
-            last_update: datetime = datetime.fromisoformat(price_list["attributes"]["last-update"])
-            the_list = PriceList(
+
+class IncompleteFetchError(ApiError):
+    """
+    Raised when the price lists over some of the chunks of a date range could not be fetched, once
+    all the others were.
+    """
+
+    def __init__(self, date_ranges: list[tuple[datetime, datetime]]):
+        self.date_ranges: list[tuple[datetime, datetime]] = date_ranges
+        super().__init__(
+            "Could not fetch the price lists over: "
+            + ", ".join(
+                f"{date_from.date()} - {date_to.date()}" for date_from, date_to in date_ranges
+            )
+        )
+
+
+def split_date_range(
+    date_from: datetime, date_to: datetime, chunk: timedelta
+) -> Iterator[tuple[datetime, datetime]]:
+    """
+    Split the given (inclusive) date range into consecutive ranges that last at most `chunk`.
+
+    Each range ends one minute before the next one starts, the way single days are requested.
+    """
+    chunk_from: datetime = date_from
+    while chunk_from <= date_to:
+        chunk_to: datetime = min(chunk_from + chunk - timedelta(minutes=1), date_to)
+        yield chunk_from, chunk_to
+        chunk_from += chunk
+
+
+def merge_price_lists(
+    price_lists: Iterable[PriceList], date_from: datetime, date_to: datetime
+) -> list[PriceList]:
+    """
+    Merge the price lists that share a title into a single ordered list, and only keep the price
+    points that fall within the given (inclusive) date range.
+
+    The API returns the point that starts right after the requested range (e.g. `00:00` of the
+    following day), which overlaps with the first point of the adjacent range: duplicate points
+    are removed, and the ones that come from the most recently updated list are kept. Merged lists
+    keep the interval of the lists they come from.
+    """
+    # NOTE: The bounds are interpreted the same way they are sent to the API
+    date_from_spain: datetime = date_from.astimezone(GMT_PLUS_2).replace(microsecond=0)
+    date_to_spain: datetime = date_to.astimezone(GMT_PLUS_2).replace(microsecond=0)
+
+    merged_lists: dict[str, tuple[datetime, int, dict[int, tuple[int, float]]]] = {}
+    for price_list in sorted(price_lists, key=lambda price_list: price_list.last_update):
+        last_update, interval, rows = merged_lists.get(
+            price_list.title, (price_list.last_update, price_list.interval, {})
+        )
+        in_range: PriceList = price_list.between(date_from_spain, date_to_spain)
+        rows.update(zip(in_range.timestamps, zip(in_range.offsets, in_range.values)))
+        merged_lists[price_list.title] = (
+            max(last_update, price_list.last_update),
+            min(interval, price_list.interval),
+            rows,
+        )
+
+    merged_price_lists: list[PriceList] = []
+    for title, (last_update, interval, rows) in merged_lists.items():
+        timestamps: list[int] = sorted(rows)
+        merged_price_lists.append(
+            PriceList.from_columns(
                 title=title,
                 last_update=last_update,
-                price_points=[
-                    PricePoint(
-                        value=the_value["value"],
-                        datetime=datetime.fromisoformat(the_value["datetime"]),
-                    )
-                    for the_value in sorted(
-                        price_list["attributes"]["values"],
-                        key=lambda the_value: datetime.fromisoformat(
-                            the_value["datetime"]
-                        ).timestamp(),
-                    )
-                ],
+                timestamps=timestamps,
+                offsets=(rows[timestamp][0] for timestamp in timestamps),
+                values=(rows[timestamp][1] for timestamp in timestamps),
+                interval=interval,
             )
-            # NOTE: The last item has `00:00` set as a date, like the first one,
-            # so we remove it to avoid rendering issues.
-            # Ideally, the pruning should be smarter and remove all trailing entries
-            # that match earlier HH:MM entries.
-            if the_list.price_points and all(
-                (
-                    the_list.price_points[-1].datetime.hour
-                    == the_list.price_points[0].datetime.hour,
-                    the_list.price_points[-1].datetime.minute
-                    == the_list.price_points[0].datetime.minute,
+        )
+    return merged_price_lists
+
+
+def _cache_key(api: Api | AsyncApi, date_from: datetime, date_to: datetime) -> CacheKey:
+    return CacheKey(
+        url=api.url,
+        date_from=normalise_datetime_field(date_from),
+        date_to=normalise_datetime_field(date_to),
+        time_trunc=api.time_trunc,
+    )
+
+
+def _is_unchanged(
+    stale: StaleEntry | None, raw_response: bytes | None, validators: Validators
+) -> bool:
+    """
+    Whether a response revalidates the stale entry: either the server answered that it was not
+    modified, or it returned the very same body (e.g. when it sends no validators).
+    """
+    if stale is None:
+        return False
+    return raw_response is None or (
+        stale.validators.digest is not None and stale.validators.digest == validators.digest
+    )
+
+
+def _fetch_price_lists(
+    api: Api, date_from: datetime, date_to: datetime, cache: PriceCache | None
+) -> list[PriceList]:
+    cache_key: CacheKey = _cache_key(api, date_from, date_to)
+    return REQUESTS_IN_FLIGHT.run(
+        (cache_key, False),
+        lambda: _fetch_price_lists_once(api, cache_key, date_from, date_to, cache),
+    )
+
+
+def _lookup_memory_cache(cache: PriceCache, cache_key: CacheKey) -> list[PriceList] | None:
+    if (price_lists := cache.get(cache_key)) is not None:
+        logger.debug("Price lists found in the memory cache: %s", cache_key)
+        METRICS.count("cache_lookups", result="memory")
+    return price_lists
+
+
+def _lookup_cache(
+    cache: PriceCache, cache_key: CacheKey, interval: int, revalidate: bool = False
+) -> tuple[list[PriceList] | None, StaleEntry | None]:
+    """
+    Return the price lists held in the cache under the given key if they are still fresh, otherwise
+    the stale entry to revalidate, if any.
+
+    Fresh entries are revalidated too when `revalidate` is set, e.g. when polling for prices yet to
+    be published. Shared by the synchronous and asynchronous fetches, the latter in a thread.
+    """
+    if not revalidate:
+        if (price_lists := _lookup_memory_cache(cache, cache_key)) is not None:
+            return price_lists, None
+
+        if (raw_response := cache.get_raw(cache_key)) is not None:
+            try:
+                price_lists = decode_price_lists(raw_response, interval)
+            except ApiError:
+                price_lists = None
+            # NOTE: Entries without prices are discarded too, e.g. written by former versions
+            if price_lists is None or not is_published(price_lists):
+                logger.warning("Discarding invalid disk cache entry: %s", cache_key)
+                cache.discard(cache_key)
+            else:
+                logger.debug("Response found in the disk cache: %s", cache_key)
+                METRICS.count("cache_lookups", result="disk")
+                cache.set(
+                    cache_key,
+                    price_lists,
+                    replace(cache.get_validators(cache_key), digest=response_digest(raw_response)),
                 )
-            ):
-                the_list.price_points.pop()
-            yield the_list
+                return price_lists, None
+
+    stale: StaleEntry | None = cache.get_stale(cache_key)
+    METRICS.count("cache_lookups", result="stale" if stale is not None else "miss")
+    return None, stale
+
+
+def _cache_response(
+    cache: PriceCache | None,
+    cache_key: CacheKey,
+    interval: int,
+    stale: StaleEntry | None,
+    raw_response: bytes | None,
+    validators: Validators,
+) -> list[PriceList]:
+    """
+    Return the price lists of the response to a (conditional) request, which revalidates the stale
+    entry or replaces it in the cache.
+    """
+    if raw_response is not None:
+        validators = replace(validators, digest=response_digest(raw_response))
+
+    unchanged: bool = _is_unchanged(stale, raw_response, validators)
+    if unchanged:
+        assert cache is not None and stale is not None
+        logger.debug("Stale cache entry revalidated: %s", cache_key)
+        METRICS.count("api_revalidations", result="unchanged")
+        cache.touch(cache_key)
+        price_lists: list[PriceList] | None = stale.price_lists
+        if price_lists is None:
+            assert stale.raw_response is not None
+            price_lists = decode_price_lists(stale.raw_response, interval)
+        validators = replace(validators, digest=stale.validators.digest)
+    else:
+        assert raw_response is not None
+        if stale is not None:
+            METRICS.count("api_revalidations", result="modified")
+        price_lists = decode_price_lists(raw_response, interval)
+
+    # NOTE: Prices yet to be published are fetched again, instead of being served until expiry
+    if cache is not None and is_published(price_lists):
+        if not unchanged:
+            assert raw_response is not None
+            cache.set_raw(cache_key, raw_response, validators)
+        cache.set(cache_key, price_lists, validators)
+    return price_lists
+
+
+def _fetch_price_lists_once(
+    api: Api,
+    cache_key: CacheKey,
+    date_from: datetime,
+    date_to: datetime,
+    cache: PriceCache | None,
+) -> list[PriceList]:
+    price_lists: list[PriceList] | None = None
+    stale: StaleEntry | None = None
+    if cache is not None:
+        price_lists, stale = _lookup_cache(cache, cache_key, api.interval)
+        if price_lists is not None:
+            return price_lists
+
+    try:
+        raw_response, validators = api.fetch_conditional(
+            date_from, date_to, stale.validators if stale is not None else Validators()
+        )
+        return _cache_response(cache, cache_key, api.interval, stale, raw_response, validators)
+    except ApiError:
+        logger.exception(
+            "Could not fetch data",
+            extra={"url": api.url, "date_from": date_from, "date_to": date_to},
+        )
+        raise
+
+
+async def _fetch_price_lists_async(
+    api: AsyncApi,
+    date_from: datetime,
+    date_to: datetime,
+    cache: PriceCache | None,
+    revalidate: bool = False,
+    deadline: float | None = None,
+) -> list[PriceList]:
+    cache_key: CacheKey = _cache_key(api, date_from, date_to)
+    # NOTE: A call that revalidates only joins another one that does, a call that may be answered
+    # by the cache would not tell whether the prices changed since
+    return await REQUESTS_IN_FLIGHT.run_async(
+        (cache_key, revalidate),
+        lambda: _fetch_price_lists_once_async(
+            api, cache_key, date_from, date_to, cache, revalidate, deadline
+        ),
+    )
 
 
-# FIXME: Document.
-def find_price_point_by_datetime(price_list: PriceList, datetime: datetime) -> PricePoint | None:
-    datetime_predicate: datetime = datetime.replace(minute=0, second=0, microsecond=0)
-    for idx_price_point, price_point in enumerate(price_list.price_points):
-        price_point_datetime_predicate: datetime = price_point.datetime.replace(
-            minute=0, second=0, microsecond=0
+async def _fetch_price_lists_once_async(
+    api: AsyncApi,
+    cache_key: CacheKey,
+    date_from: datetime,
+    date_to: datetime,
+    cache: PriceCache | None,
+    revalidate: bool,
+    deadline: float | None,
+) -> list[PriceList]:
+    price_lists: list[PriceList] | None = None
+    stale: StaleEntry | None = None
+    if cache is not None:
+        # NOTE: Memory hits don't need a thread, the disk cache and decoding do
+        if not revalidate and (price_lists := _lookup_memory_cache(cache, cache_key)) is not None:
+            return price_lists
+        price_lists, stale = await asyncio.to_thread(
+            _lookup_cache, cache, cache_key, api.interval, revalidate
         )
-        # NOTE: This function assumes the current interval stops at minute 59,
-        # despite the API returning overlapping ranges.
-        if price_point_datetime_predicate == datetime_predicate:
-            logger.debug(
-                "Found price point for dates: %s %s %s",
-                price_point,
-                datetime_predicate,
-                price_point_datetime_predicate,
+        if price_lists is not None:
+            return price_lists
+
+    try:
+        raw_response, validators = await api.fetch_conditional(
+            date_from,
+            date_to,
+            stale.validators if stale is not None else Validators(),
+            deadline=deadline,
+        )
+        return await asyncio.to_thread(
+            _cache_response, cache, cache_key, api.interval, stale, raw_response, validators
+        )
+    except ApiError:
+        logger.exception(
+            "Could not fetch data",
+            extra={"url": api.url, "date_from": date_from, "date_to": date_to},
+        )
+        raise
+
+
+def _chunk_date_ranges(
+    api_config: ApiConfig, date_from: datetime, date_to: datetime
+) -> list[tuple[datetime, datetime]]:
+    return list(split_date_range(date_from, date_to, timedelta(days=api_config.range.chunk_days)))
+
+
+def store_price_lists(store: PriceStore, price_lists: list[PriceList]):
+    """
+    Keep the given lists in the store, which is not critical: errors are only logged.
+    """
+    try:
+        with METRICS.span("store_ingest"):
+            changes: int = store.ingest(price_lists)
+    except StoreError:
+        logger.exception("Unable to store the price lists", extra={"path": store.path})
+        return
+    if changes:
+        logger.debug("Stored %d price point(s)", changes)
+        METRICS.count("store_points_changed", changes)
+
+
+def get_cached_price_lists(
+    api_config: ApiConfig,
+    date_from: datetime,
+    date_to: datetime,
+    api: Api,
+    cache: PriceCache,
+) -> list[PriceList] | None:
+    """
+    Return the price lists over the given (inclusive) date range if all of them are held in the
+    memory cache, and hold any price, without performing any input/output.
+    """
+    chunks: list[list[PriceList]] = []
+    for chunk_from, chunk_to in _chunk_date_ranges(api_config, date_from, date_to):
+        if (price_lists := cache.get(_cache_key(api, chunk_from, chunk_to))) is None:
+            return None
+        chunks.append(price_lists)
+    merged_price_lists: list[PriceList] = merge_price_lists(
+        chain.from_iterable(chunks), date_from, date_to
+    )
+    return merged_price_lists if is_published(merged_price_lists) else None
+
+
+def get_price_lists(
+    api_config: ApiConfig,
+    date_from: datetime,
+    date_to: datetime,
+    api: Api | None = None,
+    cache: PriceCache | None = None,
+    store: PriceStore | None = None,
+) -> Iterator[PriceList]:
+    """
+    Fetch the price lists over the given (inclusive) date range, and keep them in the store if
+    given.
+
+    Long ranges are split into chunks that are fetched concurrently, and whose lists are merged
+    back together by title. If any chunk can't be fetched, `IncompleteFetchError` is raised once
+    the others are (and stored), rather than returning lists with gaps. A range that ends before it
+    starts is empty, and has no lists.
+    """
+    if api is None:
+        api = api_object(api_config)
+
+    date_ranges: list[tuple[datetime, datetime]] = _chunk_date_ranges(
+        api_config, date_from, date_to
+    )
+    if not date_ranges:
+        return
+    logger.debug("Fetching price lists in %d chunk(s)", len(date_ranges))
+
+    failed: list[tuple[datetime, datetime]] = []
+
+    def fetch(date_range: tuple[datetime, datetime]) -> list[PriceList]:
+        try:
+            return _fetch_price_lists(api, *date_range, cache)
+        except ApiError:
+            failed.append(date_range)
+            return []
+
+    chunks: list[list[PriceList]]
+    with METRICS.span("get_price_lists"):
+        if len(date_ranges) == 1:
+            chunks = [fetch((date_from, date_to))]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(api_config.range.max_workers, len(date_ranges)),
+                thread_name_prefix="get_price_lists",
+            ) as executor:
+                chunks = list(executor.map(fetch, date_ranges))
+
+        price_lists: list[PriceList] = merge_price_lists(
+            chain.from_iterable(chunks), date_from, date_to
+        )
+
+    if store is not None:
+        store_price_lists(store, price_lists)
+
+    if failed:
+        raise IncompleteFetchError(sorted(failed))
+    yield from price_lists
+
+
+async def get_price_lists_async(
+    api_config: ApiConfig,
+    date_from: datetime,
+    date_to: datetime,
+    api: AsyncApi,
+    cache: PriceCache | None = None,
+    revalidate: bool = False,
+    store: PriceStore | None = None,
+) -> list[PriceList]:
+    """
+    Fetch the price lists over the given (inclusive) date range, on the running event loop.
+
+    Chunks are fetched concurrently (as bounded by the client), and cancelling the call cancels
+    all the requests in flight. Cached responses are revalidated with the API even if they are
+    still fresh, if `revalidate` is set. If any chunk can't be fetched, `IncompleteFetchError` is
+    raised once the others are (and stored), which includes the chunks whose request didn't complete
+    within the deadline of the configuration (`api.deadline`). A range that ends before it starts
+    is empty, and has no lists.
+    """
+    date_ranges: list[tuple[datetime, datetime]] = _chunk_date_ranges(
+        api_config, date_from, date_to
+    )
+    if not date_ranges:
+        return []
+    logger.debug("Fetching price lists in %d chunk(s) (async)", len(date_ranges))
+
+    failed: list[tuple[datetime, datetime]] = []
+
+    async def fetch(date_range: tuple[datetime, datetime]) -> list[PriceList]:
+        try:
+            return await _fetch_price_lists_async(
+                api, *date_range, cache, revalidate, api_config.deadline
             )
-            return price_point
+        except ApiError:
+            failed.append(date_range)
+            return []
+
+    with METRICS.span("get_price_lists"):
+        async with asyncio.TaskGroup() as task_group:
+            tasks: list[asyncio.Task[list[PriceList]]] = [
+                task_group.create_task(fetch(date_range)) for date_range in date_ranges
+            ]
+        price_lists: list[PriceList] = merge_price_lists(
+            chain.from_iterable(task.result() for task in tasks), date_from, date_to
+        )
+
+    if store is not None:
+        await asyncio.to_thread(store_price_lists, store, price_lists)
+
+    if failed:
+        raise IncompleteFetchError(sorted(failed))
+    return price_lists
+
+
+def iter_price_list_chunks(
+    api_config: ApiConfig,
+    date_ranges: Iterable[tuple[datetime, datetime]],
+    api: Api | None = None,
+    cache: PriceCache | None = None,
+    store: PriceStore | None = None,
+) -> Iterator[tuple[datetime, datetime, list[PriceList]]]:
+    """
+    Fetch the price lists over each of the given (inclusive) date ranges, which must fit in a
+    single chunk, and yield them along with their range.
+
+    Ranges are yielded in order, and at most `max-workers` of them are fetched ahead of the one
+    being consumed, which bounds memory usage regardless of the amount of ranges. Ranges that
+    can't be fetched are skipped, and `IncompleteFetchError` is raised once all the others are
+    yielded.
+
+    Settled ranges (i.e. past days) bypass the cache: bulk commands go through lots of them, which
+    would evict the ranges being displayed, and they are kept in the store if needed again.
+    """
+    if api is None:
+        api = api_object(api_config)
+
+    def fetch(date_range: tuple[datetime, datetime]) -> list[PriceList]:
+        chunk_cache: PriceCache | None = cache
+        if chunk_cache is not None and _cache_key(api, *date_range).is_settled():
+            chunk_cache = None
+        return list(
+            get_price_lists(api_config, *date_range, api=api, cache=chunk_cache, store=store)
+        )
+
+    date_ranges_iter: Iterator[tuple[datetime, datetime]] = iter(date_ranges)
+    with ThreadPoolExecutor(
+        max_workers=api_config.range.max_workers, thread_name_prefix="iter_price_lists"
+    ) as executor:
+        pending: deque[tuple[tuple[datetime, datetime], Future[list[PriceList]]]] = deque(
+            (date_range, executor.submit(fetch, date_range))
+            for date_range in islice(date_ranges_iter, api_config.range.max_workers)
+        )
+        failed: list[tuple[datetime, datetime]] = []
+        while pending:
+            (chunk_from, chunk_to), future = pending.popleft()
+            if (date_range := next(date_ranges_iter, None)) is not None:
+                pending.append((date_range, executor.submit(fetch, date_range)))
+            try:
+                price_lists: list[PriceList] = future.result()
+            except IncompleteFetchError as e:
+                failed.extend(e.date_ranges)
+                continue
+            yield chunk_from, chunk_to, price_lists
+
+    if failed:
+        raise IncompleteFetchError(failed)
+
+
+def iter_price_lists(
+    api_config: ApiConfig,
+    date_from: datetime,
+    date_to: datetime,
+    api: Api | None = None,
+    cache: PriceCache | None = None,
+    store: PriceStore | None = None,
+) -> Iterator[list[PriceList]]:
+    """
+    Fetch the price lists over the given (inclusive) date range, one chunk at a time.
+
+    Chunks are yielded in order, and at most `max-workers` of them are fetched ahead of the one
+    being consumed, which bounds memory usage regardless of the length of the range. Chunks that
+    can't be fetched are skipped, and `IncompleteFetchError` is raised once all the others are
+    yielded.
+    """
+    for _, _, price_lists in iter_price_list_chunks(
+        api_config,
+        _chunk_date_ranges(api_config, date_from, date_to),
+        api=api,
+        cache=cache,
+        store=store,
+    ):
+        yield price_lists
+
 
-    return None
+def find_price_point_by_datetime(
+    price_list: PriceList, datetime: datetime, interval: timedelta | None = None
+) -> PricePoint | None:
+    """
+    Find the price point that applies at the given datetime, each point lasting `interval` (by
+    default, the interval of the list).
+    """
+    price_point: PricePoint | None = price_list.price_point_at(datetime, interval)
+    if price_point is not None:
+        logger.debug("Found price point for date: %s %s", price_point, datetime)
+    return price_point
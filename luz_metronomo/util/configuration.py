@@ -1,9 +1,29 @@
+from datetime import date, datetime, timedelta
 from typing import Any
 
+from urllib3 import PoolManager
 from urllib3.util import Retry as UrllibRetry
 from urllib3.util import Timeout as UrllibTimeout
 
-from luz_metronomo.configuration import Retry, Timeout
+from luz_metronomo.api import Api
+from luz_metronomo.async_api import AsyncApi, AsyncRetry, AsyncTimeout
+from luz_metronomo.cache import PriceCache
+from luz_metronomo.configuration import Api as ApiConfig
+from luz_metronomo.configuration import (
+    Cache,
+    PlannedLoad,
+    Pool,
+    Refresh,
+    Retry,
+    Store,
+    Tariff,
+    Timeout,
+)
+from luz_metronomo.planner import Load
+from luz_metronomo.scheduler import RefreshScheduler
+from luz_metronomo.store import PriceStore
+from luz_metronomo.tariff import TariffCalendar
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
 
 
 def retry_object(retry: Retry) -> UrllibRetry:
@@ -41,3 +61,106 @@ def timeout_object(timeout: Timeout) -> UrllibTimeout:
         parameters["connect"] = timeout.connect
         parameters["read"] = timeout.read
     return UrllibTimeout(**parameters)
+
+
+def pool_manager_object(pool: Pool) -> PoolManager:
+    return PoolManager(num_pools=pool.num_pools, maxsize=pool.maxsize, block=pool.block)
+
+
+def api_object(api: ApiConfig) -> Api:
+    return Api(
+        url=str(api.url),
+        retry=retry_object(api.retry),
+        timeout=timeout_object(api.timeout),
+        time_trunc=api.time_trunc.value,
+        pool_manager=pool_manager_object(api.pool),
+        compression=api.compression,
+        record_directory=api.record_directory,
+    )
+
+
+def async_retry_object(retry: Retry) -> AsyncRetry:
+    return AsyncRetry(
+        total=retry.total,
+        connect=retry.connect,
+        read=retry.read,
+        status=retry.status,
+        other=retry.other,
+        redirect=retry.redirect,
+        status_forcelist=frozenset(retry.status_forcelist),
+        allowed_methods=(
+            frozenset(method.upper() for method in retry.allowed_methods)
+            if retry.allowed_methods is not None
+            else None
+        ),
+        backoff_factor=retry.backoff.factor,
+        backoff_max=retry.backoff.max,
+        backoff_jitter=retry.backoff.jitter,
+    )
+
+
+def async_timeout_object(timeout: Timeout) -> AsyncTimeout:
+    if timeout.total is not None:
+        return AsyncTimeout(total=timeout.total)
+    # NOTE: A duration of `0.0` disables the timeout
+    return AsyncTimeout(total=None, connect=timeout.connect or None, read=timeout.read or None)
+
+
+def async_api_object(api: ApiConfig) -> AsyncApi:
+    return AsyncApi(
+        url=str(api.url),
+        retry=async_retry_object(api.retry),
+        timeout=async_timeout_object(api.timeout),
+        time_trunc=api.time_trunc.value,
+        max_connections=api.pool.maxsize,
+        compression=api.compression,
+        record_directory=api.record_directory,
+    )
+
+
+def cache_object(cache: Cache) -> PriceCache | None:
+    if not cache.enable:
+        return None
+    return PriceCache(
+        memory_size=cache.memory_size, disk_size=cache.disk_size, ttl=cache.ttl, path=cache.path
+    )
+
+
+def store_object(store: Store) -> PriceStore | None:
+    if not store.enable:
+        return None
+    return PriceStore(path=store.path, geography=store.geography)
+
+
+def refresh_scheduler_object(refresh: Refresh) -> RefreshScheduler:
+    return RefreshScheduler(
+        publication_time=refresh.publication_time,
+        publication_window=timedelta(seconds=refresh.publication_window),
+        poll=refresh.poll,
+        backoff_factor=refresh.backoff.factor,
+        backoff_max=refresh.backoff.max,
+        backoff_jitter=refresh.backoff.jitter,
+    )
+
+
+def tariff_calendar_object(tariff: Tariff) -> TariffCalendar:
+    return TariffCalendar(holidays=tariff.holidays, national_holidays=tariff.national_holidays)
+
+
+def load_object(load: PlannedLoad, day: date) -> Load:
+    earliest_start: datetime | None = None
+    if load.earliest_start is not None:
+        earliest_start = datetime.combine(day, load.earliest_start, TIMEZONE_SPAIN)
+    deadline: datetime | None = None
+    if load.deadline is not None:
+        deadline = datetime.combine(day, load.deadline, TIMEZONE_SPAIN)
+        if earliest_start is not None and deadline <= earliest_start:
+            deadline += timedelta(days=1)
+    return Load(
+        name=load.name,
+        duration=timedelta(hours=load.duration),
+        power=load.power,
+        earliest_start=earliest_start,
+        deadline=deadline,
+        exclusive=load.exclusive,
+    )
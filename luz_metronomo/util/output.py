@@ -0,0 +1,12 @@
+import os
+import sys
+
+
+def discard_standard_output():
+    """
+    Send whatever is left to write to the standard output to the null device, once its reader is
+    gone (e.g. `| head`), so that flushing it on exit doesn't fail all over again.
+    """
+    devnull: int = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+    os.close(devnull)
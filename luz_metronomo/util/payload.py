@@ -0,0 +1,119 @@
+import json
+import math
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+
+# NOTE: Lists returned by the API, as (identifier, title, colour, scale of the rates)
+PAYLOAD_LISTS: tuple[tuple[str, str, str, float], ...] = (
+    ("1001", "PVPC (€/MWh)", "#ffcf09", 1.0),
+    ("600", "Precio mercado spot (€/MWh)", "#df4a32", 0.7),
+)
+
+
+def synthetic_rate(timestamp: int, scale: float = 1.0) -> float:
+    """
+    Return a plausible rate at the given epoch timestamp, which is always the same for a given
+    timestamp, so that overlapping ranges hold the same points.
+    """
+    local: datetime = datetime.fromtimestamp(timestamp, TIMEZONE_SPAIN)
+    hour: float = local.hour + local.minute / 60
+    # NOTE: Two daily peaks, in the morning and the evening, plus some deterministic noise
+    shape: float = math.exp(-((hour - 10.5) ** 2) / 8) + 1.3 * math.exp(-((hour - 20) ** 2) / 6)
+    noise: float = ((timestamp * 2654435761) % 4096) / 4096
+    return round(scale * (60 + 90 * shape + 25 * noise), 2)
+
+
+def payload_datetimes(
+    date_from: datetime, date_to: datetime, interval: timedelta
+) -> Iterator[datetime]:
+    """
+    Yield the (Spanish) datetimes of the points that cover the given range, which includes the
+    point that starts right after it, the way the API does.
+    """
+    step: int = int(interval.total_seconds())
+    timestamp_from: int = int(date_from.timestamp()) // step * step
+    timestamp_to: int = int(date_to.timestamp())
+    timestamp: int = timestamp_from
+    while timestamp < timestamp_to + step:
+        yield datetime.fromtimestamp(timestamp, TIMEZONE_SPAIN)
+        timestamp += step
+
+
+def format_payload_datetime(the_datetime: datetime) -> str:
+    return the_datetime.isoformat(timespec="milliseconds")
+
+
+def synthesise_payload(
+    date_from: datetime,
+    date_to: datetime,
+    interval: timedelta = timedelta(hours=1),
+    last_update: datetime | None = None,
+) -> dict[str, Any]:
+    """
+    Build a response of the API for the given (inclusive, timezone aware) date range, with one
+    point every `interval`.
+    """
+    if last_update is None:
+        last_update = datetime.now(timezone.utc)
+    last_update_str: str = format_payload_datetime(last_update.astimezone(TIMEZONE_SPAIN))
+    datetimes: list[datetime] = list(payload_datetimes(date_from, date_to, interval))
+    rates: list[list[float]] = [
+        [synthetic_rate(int(the_datetime.timestamp()), scale) for the_datetime in datetimes]
+        for _, _, _, scale in PAYLOAD_LISTS
+    ]
+    totals: list[float] = [sum(column) or 1.0 for column in zip(*rates)]
+
+    return {
+        "data": {
+            "type": "Precios mercado peninsular en tiempo real",
+            "id": "mer13",
+            "attributes": {
+                "title": "Precios mercado peninsular en tiempo real",
+                "last-update": last_update_str,
+                "description": None,
+            },
+            "meta": {"cache-control": {"cache": "MISS"}},
+        },
+        "included": [
+            {
+                "type": title,
+                "id": identifier,
+                "groupId": None,
+                "attributes": {
+                    "title": title,
+                    "description": None,
+                    "color": colour,
+                    "type": None,
+                    "magnitude": None,
+                    "composite": False,
+                    "last-update": last_update_str,
+                    "values": [
+                        {
+                            "value": rate,
+                            "percentage": round(rate / total, 4),
+                            "datetime": format_payload_datetime(the_datetime),
+                        }
+                        for the_datetime, rate, total in zip(datetimes, list_rates, totals)
+                    ],
+                },
+            }
+            for (identifier, title, colour, _), list_rates in zip(PAYLOAD_LISTS, rates)
+        ],
+    }
+
+
+def synthesise_raw_payload(
+    date_from: datetime,
+    date_to: datetime,
+    interval: timedelta = timedelta(hours=1),
+    last_update: datetime | None = None,
+) -> bytes:
+    """
+    Serialise a synthetic response the way the API does.
+    """
+    return json.dumps(
+        synthesise_payload(date_from, date_to, interval, last_update), ensure_ascii=False
+    ).encode("utf-8")
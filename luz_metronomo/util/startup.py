@@ -0,0 +1,162 @@
+import subprocess
+import sys
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+# NOTE: Modules imported by each command, past argument parsing (`None` being the user interface)
+STARTUP_MODULES: dict[str | None, tuple[str, ...]] = {
+    None: (
+        "luz_metronomo.__main__",
+        "luz_metronomo.configuration",
+        "luz_metronomo.textual",
+    ),
+    "export": (
+        "luz_metronomo.__main__",
+        "luz_metronomo.configuration",
+        "luz_metronomo.export",
+    ),
+    "backfill": (
+        "luz_metronomo.__main__",
+        "luz_metronomo.configuration",
+        "luz_metronomo.backfill",
+    ),
+    "stats": (
+        "luz_metronomo.__main__",
+        "luz_metronomo.configuration",
+        "luz_metronomo.report",
+    ),
+    "plan": (
+        "luz_metronomo.__main__",
+        "luz_metronomo.configuration",
+        "luz_metronomo.plan",
+    ),
+    "serve": (
+        "luz_metronomo.__main__",
+        "luz_metronomo.server",
+    ),
+}
+
+# NOTE: Modules that must never be imported by a headless command
+HEADLESS_FORBIDDEN_MODULES: tuple[str, ...] = ("textual", "textual_plotext", "rich")
+
+
+@dataclass
+class StartupBudget:
+    # NOTE: Import time of the modules, in microseconds
+    import_time: int
+    amount_modules: int
+
+
+# NOTE: Generous budgets meant to catch heavy imports creeping in, not small variations
+STARTUP_BUDGETS: dict[str | None, StartupBudget] = {
+    None: StartupBudget(import_time=1_500_000, amount_modules=900),
+    "export": StartupBudget(import_time=600_000, amount_modules=450),
+    "backfill": StartupBudget(import_time=600_000, amount_modules=450),
+    "stats": StartupBudget(import_time=600_000, amount_modules=450),
+    "plan": StartupBudget(import_time=600_000, amount_modules=450),
+    "serve": StartupBudget(import_time=300_000, amount_modules=250),
+}
+
+
+@dataclass
+class ImportTime:
+    module: str
+    # NOTE: Times are in microseconds, as reported by `-X importtime`
+    self_time: int
+    cumulative_time: int
+    depth: int
+
+
+@dataclass
+class StartupProfile:
+    import_times: list[ImportTime]
+    modules: list[str]
+
+    @property
+    def total_time(self) -> int:
+        return sum(import_time.self_time for import_time in self.import_times)
+
+
+def parse_import_times(lines: Iterable[str]) -> list[ImportTime]:
+    """
+    Parse the report written to the standard error by `python -X importtime`.
+    """
+    import_times: list[ImportTime] = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields: list[str] = line.removeprefix("import time:").split("|", 2)
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # NOTE: Header line
+            continue
+        module: str = fields[2].rstrip()
+        name: str = module.lstrip()
+        import_times.append(
+            ImportTime(
+                module=name,
+                self_time=int(fields[0]),
+                cumulative_time=int(fields[1]),
+                depth=(len(module) - len(name) - 1) // 2,
+            )
+        )
+    return import_times
+
+
+def profile_startup(modules: Iterable[str]) -> StartupProfile:
+    """
+    Import the given modules in a fresh interpreter, and return how long each import took.
+    """
+    code: str = "".join(f"import {module}\n" for module in modules)
+    code += "import sys\nprint('\\n'.join(sorted(sys.modules)))\n"
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return StartupProfile(
+        import_times=parse_import_times(process.stderr.splitlines()),
+        modules=process.stdout.split(),
+    )
+
+
+def check_startup_budget(command: str | None, profile: StartupProfile) -> list[str]:
+    """
+    Return the reasons why the startup of the given command is over budget, if it is.
+    """
+    violations: list[str] = []
+    budget: StartupBudget = STARTUP_BUDGETS[command]
+    if profile.total_time > budget.import_time:
+        violations.append(
+            f"import time {profile.total_time / 1000:.1f}ms over budget"
+            f" ({budget.import_time / 1000:.1f}ms)"
+        )
+    if len(profile.modules) > budget.amount_modules:
+        violations.append(
+            f"{len(profile.modules)} modules imported, over budget ({budget.amount_modules})"
+        )
+    if command is not None:
+        violations.extend(
+            f"headless command imports {module}"
+            for module in profile.modules
+            if module.split(".", 1)[0] in HEADLESS_FORBIDDEN_MODULES
+        )
+    return violations
+
+
+def format_startup_profile(profile: StartupProfile, limit: int = 30) -> str:
+    """
+    Format the slowest imports (by cumulative time) of a profile as a table.
+    """
+    lines: list[str] = [f"{'self (ms)':>10} {'cumulative (ms)':>16}  module"]
+    for import_time in sorted(
+        profile.import_times, key=lambda import_time: import_time.cumulative_time, reverse=True
+    )[:limit]:
+        lines.append(
+            f"{import_time.self_time / 1000:>10.1f} {import_time.cumulative_time / 1000:>16.1f}"
+            f"  {import_time.module}"
+        )
+    lines.append(
+        f"Total: {profile.total_time / 1000:.1f}ms, {len(profile.modules)} modules imported"
+    )
+    return "\n".join(lines)
@@ -6,7 +6,7 @@ from textual.app import ALABASTER, MONOKAI
 from textual.notifications import Notification, SeverityLevel
 from textual.widget import Widget
 
-from luz_metronomo.textual_theme import TextualTheme
+from luz_metronomo.entity.textual_theme import TextualTheme
 
 
 class Notifier(Protocol):
@@ -1,3 +1,18 @@
-from datetime import timedelta, timezone
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
 
 GMT_PLUS_2 = timezone(timedelta(hours=+2))
+
+# NOTE: Timezone in which the API expresses its datetimes, daylight saving time included
+TIMEZONE_SPAIN = ZoneInfo("Europe/Madrid")
+
+
+def spanish_day_range(day_from: date, day_to: date) -> tuple[datetime, datetime]:
+    """
+    Return the (inclusive) date range from the start of the first day to the last minute of the
+    last one, in the Spanish timezone regardless of that of the host.
+    """
+    return (
+        datetime.combine(day_from, time(), TIMEZONE_SPAIN),
+        datetime.combine(day_to, time(23, 59), TIMEZONE_SPAIN),
+    )
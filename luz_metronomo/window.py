@@ -0,0 +1,219 @@
+"""
+Find the cheapest windows of a given duration within a price list, e.g. to run an appliance.
+
+Sums of the values are precomputed as prefix sums, so that the cost of every window of a given
+length is a single subtraction, and windows that span a gap between points, or points outside of
+the allowed tariff periods, are ruled out with prefix counts the same way. A query is then a few
+linear passes, run by the interpreter over whole arrays rather than point by point.
+
+A duration that isn't a multiple of the interval of the list spans a last point that is only
+partly used: windows are ranked by, and their means taken over, the fraction of that point that
+is actually used.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Collection
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from heapq import heapify, heappop
+from itertools import accumulate, compress, groupby, pairwise
+from operator import not_, sub
+
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.tariff_period import TariffPeriod
+from luz_metronomo.tariff import SECONDS_PER_DAY, TariffCalendar
+
+
+@dataclass(frozen=True, slots=True)
+class PriceWindow:
+    # NOTE: Indices of the first point of the window, and past its last one
+    index_from: int
+    index_to: int
+    date_from: datetime
+    # NOTE: End of the window (exclusive), within its last point if only partly used
+    date_to: datetime
+    # NOTE: Mean value over the duration of the window
+    mean: float
+
+
+class WindowFinder:
+    """
+    Answer cheapest window queries over a price list.
+
+    Precomputing the prefix sums is linear in the amount of points of the list, and so is every
+    query: a finder is meant to be built once per list, and queried many times.
+    """
+
+    def __init__(self, price_list: PriceList, tariff_calendar: TariffCalendar):
+        self._price_list: PriceList = price_list
+        self._tariff_calendar: TariffCalendar = tariff_calendar
+        self._sums: array = array("d", accumulate(price_list.values, initial=0.0))
+        # NOTE: Amount of points that don't immediately follow the previous one, up to each point
+        self._gaps: array = array(
+            "L",
+            accumulate(
+                (
+                    current - previous != price_list.interval
+                    for previous, current in pairwise(price_list.timestamps)
+                ),
+                initial=0,
+            ),
+        )
+        self._periods: array | None = None
+        # NOTE: Amount of points outside of the allowed periods up to each point, per allowed periods
+        self._excluded: dict[frozenset[TariffPeriod], array] = {}
+
+    @property
+    def price_list(self) -> PriceList:
+        return self._price_list
+
+    def _excluded_counts(self, periods: frozenset[TariffPeriod]) -> array:
+        if (excluded := self._excluded.get(periods)) is None:
+            if self._periods is None:
+                self._periods = self._tariff_calendar.classify(
+                    self._price_list.timestamps, self._price_list.offsets
+                )
+            allowed: bytes = bytes(period in periods for period in range(len(TariffPeriod)))
+            excluded = self._excluded[periods] = array(
+                "L", accumulate((allowed[period] ^ 1 for period in self._periods), initial=0)
+            )
+        return excluded
+
+    def extent(self, duration: timedelta) -> tuple[int, float]:
+        """
+        Return the amount of points spanned by a window of the given duration, and the amount of
+        points it actually uses, the last one being possibly only partly used.
+
+        A duration of zero spans (and uses) a single point.
+        """
+        interval: timedelta = timedelta(seconds=self._price_list.interval)
+        if duration <= timedelta():
+            return 1, 1.0
+        # NOTE: Integer division of the durations (in microseconds), to round up exactly
+        return -(-duration // interval), duration / interval
+
+    def _window(self, index: int, length: int, points: float, total: float) -> PriceWindow:
+        return PriceWindow(
+            index_from=index,
+            index_to=index + length,
+            date_from=self._price_list.datetime_at(index),
+            date_to=self._price_list.datetime_at(index + length - 1)
+            + timedelta(seconds=self._price_list.interval * (points - length + 1)),
+            mean=total / points,
+        )
+
+    def candidates(
+        self,
+        duration: timedelta,
+        periods: Collection[TariffPeriod] | None,
+        date_from: datetime | None,
+        date_to: datetime | None,
+    ) -> tuple[int, list[float], list[int]]:
+        """
+        Return the amount of points spanned by a window of the given duration, the sums of the
+        values of all the windows of that length (the last point weighted by the fraction used),
+        and the indices at which valid windows start.
+        """
+        length, points = self.extent(duration)
+        timestamps: memoryview = self._price_list.timestamps
+        # NOTE: Windows must start at or after `date_from`, and end at or before `date_to`
+        index_first: int = (
+            0 if date_from is None else bisect_left(timestamps, date_from.timestamp())
+        )
+        index_last: int = len(timestamps) - length
+        if date_to is not None:
+            index_last = min(
+                index_last,
+                bisect_right(timestamps, date_to.timestamp() - self._price_list.interval) - length,
+            )
+        if index_last < index_first:
+            return length, [], []
+
+        # NOTE: Lengths of the windows are equal, so their sums and their gaps are differences of
+        # prefix arrays shifted by that length
+        sums: list[float] = list(map(sub, self._sums[length:], self._sums))
+        if points < length:
+            unused: float = length - points
+            sums = [
+                total - unused * value
+                for total, value in zip(sums, self._price_list.values[length - 1 :])
+            ]
+        invalid = map(sub, self._gaps[length - 1 :], self._gaps)
+        if periods is not None and set(periods) != set(TariffPeriod):
+            excluded: array = self._excluded_counts(frozenset(periods))
+            invalid = map(max, invalid, map(sub, excluded[length:], excluded))
+        starts: list[int] = list(compress(range(len(sums)), map(not_, invalid)))
+        starts = starts[bisect_left(starts, index_first) : bisect_right(starts, index_last)]
+        return length, sums, starts
+
+    def cheapest(
+        self,
+        duration: timedelta,
+        periods: Collection[TariffPeriod] | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> PriceWindow | None:
+        """
+        Return the cheapest window of contiguous points that lasts the given duration,
+        restricted to the given tariff periods and date range (if any).
+        """
+        length, sums, starts = self.candidates(duration, periods, date_from, date_to)
+        if not starts:
+            return None
+        index: int = min(starts, key=sums.__getitem__)
+        return self._window(index, length, self.extent(duration)[1], sums[index])
+
+    def cheapest_windows(
+        self,
+        duration: timedelta,
+        amount: int,
+        periods: Collection[TariffPeriod] | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[PriceWindow]:
+        """
+        Return up to `amount` cheapest windows that don't overlap, cheapest first: each window is
+        the cheapest one that doesn't overlap those before it.
+
+        Starts are popped from a heap rather than sorted, which is linear in the amount of points
+        plus logarithmic in it per start popped, until enough windows are found.
+        """
+        length, sums, starts = self.candidates(duration, periods, date_from, date_to)
+        # NOTE: Starts are only ordered as far as needed, which is usually a small fraction of them
+        # (ties go to the earliest start)
+        heap: list[tuple[float, int]] = [(sums[index], index) for index in starts]
+        heapify(heap)
+        chosen: list[int] = []
+        while heap and len(chosen) < amount:
+            _, index = heappop(heap)
+            # NOTE: Windows have the same length, so only the closest chosen ones can overlap
+            position: int = bisect_left(chosen, index)
+            if position > 0 and index - chosen[position - 1] < length:
+                continue
+            if position < len(chosen) and chosen[position] - index < length:
+                continue
+            chosen.insert(position, index)
+        points: float = self.extent(duration)[1]
+        return sorted(
+            (self._window(index, length, points, sums[index]) for index in chosen),
+            key=lambda window: window.mean,
+        )
+
+    def cheapest_per_day(
+        self, duration: timedelta, periods: Collection[TariffPeriod] | None = None
+    ) -> list[PriceWindow]:
+        """
+        Return the cheapest window that starts on each (local) day of the list, in order.
+        """
+        length, sums, starts = self.candidates(duration, periods, None, None)
+        points: float = self.extent(duration)[1]
+        timestamps: memoryview = self._price_list.timestamps
+        offsets: memoryview = self._price_list.offsets
+        cheapest: list[int] = [
+            min(day_starts, key=sums.__getitem__)
+            for _, day_starts in groupby(
+                starts, key=lambda index: (timestamps[index] + offsets[index]) // SECONDS_PER_DAY
+            )
+        ]
+        return [self._window(index, length, points, sums[index]) for index in cheapest]
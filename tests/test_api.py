@@ -0,0 +1,151 @@
+import json
+from datetime import datetime, timedelta
+from typing import Any
+
+import pytest
+
+from luz_metronomo.api import ApiError, decode_price_lists
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.util.payload import (
+    PAYLOAD_LISTS,
+    synthesise_payload,
+    synthesise_raw_payload,
+)
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+
+LAST_UPDATE = datetime(2024, 3, 1, 20, 15, tzinfo=TIMEZONE_SPAIN)
+
+
+def day_range(day: datetime) -> tuple[datetime, datetime]:
+    date_from: datetime = day.replace(tzinfo=TIMEZONE_SPAIN)
+    return date_from, date_from.replace(hour=23, minute=59)
+
+
+def raw_payload(payload: dict[str, Any]) -> bytes:
+    return json.dumps(payload).encode("utf-8")
+
+
+def test_decode_lists_of_a_day():
+    date_from, date_to = day_range(datetime(2024, 3, 1))
+    payload: dict[str, Any] = synthesise_payload(date_from, date_to, last_update=LAST_UPDATE)
+    price_lists = decode_price_lists(raw_payload(payload), 3600)
+
+    assert [price_list.title for price_list in price_lists] == [
+        title for _, title, _, _ in PAYLOAD_LISTS
+    ]
+    for price_list, item in zip(price_lists, payload["included"]):
+        values: list[dict[str, Any]] = item["attributes"]["values"]
+        assert price_list.last_update == LAST_UPDATE
+        assert price_list.interval == 3600
+        # NOTE: The API also returns the point that starts right after the range
+        assert len(price_list) == 25
+        assert list(price_list.values) == [value["value"] for value in values]
+        assert [price_list.datetime_at(index) for index in range(len(price_list))] == [
+            datetime.fromisoformat(value["datetime"]) for value in values
+        ]
+
+
+@pytest.mark.parametrize(
+    "day, amount_points, interval",
+    [
+        (datetime(2024, 3, 31), 23, timedelta(hours=1)),
+        (datetime(2024, 10, 27), 25, timedelta(hours=1)),
+        (datetime(2025, 10, 26), 100, timedelta(minutes=15)),
+    ],
+)
+def test_decode_daylight_saving_time_days(day: datetime, amount_points: int, interval: timedelta):
+    date_from, date_to = day_range(day)
+    price_lists = decode_price_lists(
+        synthesise_raw_payload(date_from, date_to, interval, LAST_UPDATE),
+        int(interval.total_seconds()),
+    )
+    for price_list in price_lists:
+        day_points: PriceList = price_list.between(date_from, date_to)
+        assert len(day_points) == amount_points
+        # NOTE: Offsets change along with the clocks, points stay evenly spaced
+        assert len(set(day_points.offsets)) == 2
+        assert {
+            current - previous
+            for previous, current in zip(day_points.timestamps, day_points.timestamps[1:])
+        } == {int(interval.total_seconds())}
+
+
+def test_decode_sorts_unordered_values():
+    date_from, date_to = day_range(datetime(2024, 3, 1))
+    payload: dict[str, Any] = synthesise_payload(date_from, date_to, last_update=LAST_UPDATE)
+    for item in payload["included"]:
+        item["attributes"]["values"].reverse()
+    for price_list in decode_price_lists(raw_payload(payload)):
+        assert list(price_list.timestamps) == sorted(price_list.timestamps)
+
+
+def test_decode_interval():
+    date_from: datetime = datetime(2024, 3, 1, 12, tzinfo=TIMEZONE_SPAIN)
+    raw_response: bytes = synthesise_raw_payload(
+        date_from, date_from - timedelta(minutes=15), timedelta(minutes=15), LAST_UPDATE
+    )
+    # NOTE: Single points are given the default interval, unless told otherwise
+    assert {price_list.interval for price_list in decode_price_lists(raw_response)} == {3600}
+    assert {price_list.interval for price_list in decode_price_lists(raw_response, 900)} == {900}
+
+
+def test_decode_empty_lists():
+    date_from, date_to = day_range(datetime(2024, 3, 1))
+    payload: dict[str, Any] = synthesise_payload(date_from, date_to, last_update=LAST_UPDATE)
+    for item in payload["included"]:
+        item["attributes"]["values"] = []
+    price_lists = decode_price_lists(raw_payload(payload), 3600)
+    assert [len(price_list) for price_list in price_lists] == [0] * len(PAYLOAD_LISTS)
+    assert decode_price_lists(raw_payload({"included": []})) == []
+
+
+def invalid_value(**value: Any) -> dict[str, Any]:
+    return {
+        "included": [
+            {
+                "attributes": {
+                    "title": "PVPC (€/MWh)",
+                    "last-update": LAST_UPDATE.isoformat(),
+                    "values": [{"value": 1.0, "datetime": "2024-03-01T00:00:00.000+01:00"} | value],
+                }
+            }
+        ]
+    }
+
+
+@pytest.mark.parametrize(
+    "raw_response, message",
+    [
+        (b"", None),
+        (b"\xff\xfe", None),
+        (b"[]", "Invalid JSON response"),
+        (b'{"errors": [{"code": 502}]}', "Error response"),
+        (b'{"data": {}}', "missing price lists"),
+        (b'{"included": [{"attributes": {}}]}', "invalid price list"),
+        (b'{"included": [{"attributes": {"values": []}}]}', "Invalid price list title"),
+        (
+            b'{"included": [{"attributes": {"title": "a", "last-update": 1, "values": []}}]}',
+            "Invalid price list last update",
+        ),
+        (
+            b'{"included": [{"attributes": {"title": "a", "last-update": "", "values": [1]}}]}',
+            "Invalid price list values",
+        ),
+        (
+            b'{"included": [{"attributes": {"title": "a", "last-update": "today", "values": []}}]}',
+            "Invalid price list last update: 'today'",
+        ),
+        (
+            raw_payload(invalid_value(value=10**400)),
+            r"Invalid price list values: PVPC \(€/MWh\) \(",
+        ),
+        (raw_payload(invalid_value(value=True)), "Invalid price value"),
+        (raw_payload(invalid_value(value="1.0")), "Invalid price value"),
+        (raw_payload(invalid_value(datetime=0)), "Invalid price datetime"),
+        (raw_payload(invalid_value(datetime="yesterday")), "Invalid price datetime"),
+        (raw_payload(invalid_value(datetime="2024-03-01T00:00:00")), "without timezone"),
+    ],
+)
+def test_decode_invalid_responses(raw_response: bytes, message: str | None):
+    with pytest.raises(ApiError, match=message):
+        decode_price_lists(raw_response)
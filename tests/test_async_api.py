@@ -0,0 +1,359 @@
+import asyncio
+import gzip
+import zlib
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime
+from urllib.parse import urlencode
+
+import pytest
+
+from luz_metronomo.api import ApiError, normalise_datetime_field
+from luz_metronomo.async_api import AsyncApi, AsyncRetry, AsyncTimeout, _RetryableError
+from luz_metronomo.entity.validators import Validators
+
+DATE_FROM = datetime(2024, 3, 1)
+DATE_TO = datetime(2024, 3, 1, 23, 59)
+
+
+def response(
+    status: str = "200 OK", headers: dict[str, str] | None = None, body: bytes = b""
+) -> bytes:
+    lines: list[str] = [f"HTTP/1.1 {status}"]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def chunked(*chunks: bytes, trailers: bytes = b"") -> bytes:
+    return (
+        b"".join(b"%x;ext=1\r\n%s\r\n" % (len(chunk), chunk) for chunk in chunks)
+        + b"0\r\n"
+        + trailers
+        + b"\r\n"
+    )
+
+
+class Server:
+    """
+    Server that answers the requests it receives with the given raw responses, in order, and
+    records the request lines along with whether they came in on a new connection.
+    """
+
+    def __init__(self, responses: list[bytes], close: bool = False):
+        self.responses: list[bytes] = responses
+        self.close: bool = close
+        self.requests: list[tuple[str, bool]] = []
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        new_connection: bool = True
+        while self.responses:
+            request_line: bytes = await reader.readline()
+            if not request_line:
+                break
+            while (await reader.readline()) not in (b"\r\n", b""):
+                pass
+            self.requests.append((request_line.decode("latin-1").strip(), new_connection))
+            new_connection = False
+            writer.write(self.responses.pop(0))
+            await writer.drain()
+            if self.close:
+                break
+        writer.close()
+
+    async def run(self, test: Callable[[str], Awaitable[None]]):
+        server: asyncio.Server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port: int = server.sockets[0].getsockname()[1]
+        async with server:
+            await test(f"http://127.0.0.1:{port}/api")
+
+
+def run(
+    responses: list[bytes], test: Callable[[AsyncApi], Awaitable[None]], **parameters
+) -> Server:
+    server = Server(responses, close=parameters.pop("close", False))
+
+    async def with_api(url: str):
+        api = AsyncApi(url=url, **parameters)
+        try:
+            await test(api)
+        finally:
+            await api.close()
+
+    asyncio.run(server.run(with_api))
+    return server
+
+
+def read_headers(raw: bytes) -> tuple[str, int, dict[str, str]]:
+    async def read() -> tuple[str, int, dict[str, str]]:
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await AsyncApi(url="http://localhost")._read_headers(reader)
+
+    return asyncio.run(read())
+
+
+def read_body(raw: bytes, status: int, headers: dict[str, str], chunk_size: int = 4) -> bytes:
+    async def read() -> bytes:
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        api = AsyncApi(url="http://localhost", chunk_size=chunk_size)
+        return b"".join([chunk async for chunk in api._iter_body(reader, status, headers)])
+
+    return asyncio.run(read())
+
+
+def test_headers_are_case_insensitive_and_repeated_ones_joined():
+    version, status, headers = read_headers(
+        b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+        b"Vary: Accept\r\nvary:  Accept-Encoding \r\n\r\n"
+    )
+    assert (version, status) == ("HTTP/1.1", 200)
+    assert headers == {"content-type": "application/json", "vary": "Accept, Accept-Encoding"}
+
+
+def test_headers_accept_bare_line_feeds():
+    assert read_headers(b"HTTP/1.0 204 No Content\nServer: x\n\n") == (
+        "HTTP/1.0",
+        204,
+        {"server": "x"},
+    )
+
+
+@pytest.mark.parametrize(
+    "raw, kind",
+    [
+        (b"", "read"),
+        (b"garbage\r\n\r\n", "other"),
+        (b"HTTP/1.1 OK\r\n\r\n", "other"),
+        (b"HTTP/1.1 200 OK\r\nServer: x\r\n", "read"),
+        (b"HTTP/1.1 200 OK\r\n" + b"X: y\r\n" * 101 + b"\r\n", "other"),
+    ],
+)
+def test_invalid_headers(raw: bytes, kind: str):
+    with pytest.raises(_RetryableError) as error:
+        read_headers(raw)
+    assert error.value.kind == kind
+
+
+def test_body_with_content_length_stops_at_its_end():
+    assert read_body(b"0123456789trailing", 200, {"content-length": "10"}) == b"0123456789"
+
+
+def test_body_shorter_than_its_content_length():
+    with pytest.raises(asyncio.IncompleteReadError):
+        read_body(b"01234", 200, {"content-length": "10"})
+
+
+def test_body_without_length_is_read_until_closed():
+    assert read_body(b"0123456789", 200, {}) == b"0123456789"
+
+
+def test_chunked_body_skips_extensions_and_trailers():
+    raw: bytes = chunked(b"hello, ", b"world", trailers=b"Expires: never\r\n") + b"next"
+    assert read_body(raw, 200, {"transfer-encoding": "gzip, Chunked"}) == b"hello, world"
+
+
+def test_chunked_body_with_invalid_size():
+    with pytest.raises(_RetryableError) as error:
+        read_body(b"zz\r\nhello\r\n0\r\n\r\n", 200, {"transfer-encoding": "chunked"})
+    assert error.value.kind == "read"
+
+
+@pytest.mark.parametrize("status", [204, 304])
+def test_bodyless_statuses_ignore_their_headers(status: int):
+    assert read_body(b"unrelated", status, {"content-length": "9"}) == b""
+
+
+@pytest.mark.parametrize(
+    "encoding, compress",
+    [
+        ("gzip", gzip.compress),
+        ("x-gzip", gzip.compress),
+        ("deflate", zlib.compress),
+    ],
+)
+def test_compressed_chunked_body_is_decoded(encoding: str, compress: Callable[[bytes], bytes]):
+    body: bytes = b'{"prices": [1, 2, 3]}' * 100
+    compressed: bytes = compress(body)
+    raw: bytes = response(
+        headers={"Content-Encoding": encoding, "Transfer-Encoding": "chunked"},
+        body=chunked(compressed[:10], compressed[10:]),
+    )
+
+    async def test(api: AsyncApi):
+        assert await api.fetch(DATE_FROM, DATE_TO) == body
+
+    run([raw], test)
+
+
+def test_unsupported_content_encoding_fails():
+    raw: bytes = response(headers={"Content-Encoding": "compress", "Content-Length": "0"})
+
+    async def test(api: AsyncApi):
+        with pytest.raises(ApiError, match="Unsupported content encoding"):
+            await api.fetch(DATE_FROM, DATE_TO)
+
+    run([raw], test, retry=AsyncRetry(total=0))
+
+
+def test_request_asks_for_the_date_range():
+    async def test(api: AsyncApi):
+        await api.fetch(DATE_FROM, DATE_TO)
+
+    server: Server = run([response(headers={"Content-Length": "0"})], test)
+    (request_line, _), *_ = server.requests
+    assert request_line.startswith("GET /api?")
+    assert urlencode({"start_date": normalise_datetime_field(DATE_FROM)}) in request_line
+    assert urlencode({"end_date": normalise_datetime_field(DATE_TO)}) in request_line
+    assert "time_trunc=hour" in request_line
+    assert request_line.endswith(" HTTP/1.1")
+
+
+def test_connections_are_kept_alive():
+    raw: bytes = response(headers={"Content-Length": "2"}, body=b"{}")
+
+    async def test(api: AsyncApi):
+        for _ in range(3):
+            assert await api.fetch(DATE_FROM, DATE_TO) == b"{}"
+
+    server: Server = run([raw, raw, raw], test)
+    assert [new_connection for _, new_connection in server.requests] == [True, False, False]
+
+
+def test_connections_are_not_reused_without_body_length():
+    raw: bytes = response(body=b"{}")
+
+    async def test(api: AsyncApi):
+        for _ in range(2):
+            assert await api.fetch(DATE_FROM, DATE_TO) == b"{}"
+
+    server: Server = run([raw, raw], test, close=True)
+    assert [new_connection for _, new_connection in server.requests] == [True, True]
+
+
+def test_redirections_are_followed_relative_to_the_request():
+    responses: list[bytes] = [
+        response("301 Moved Permanently", {"Location": "/moved?a=1", "Content-Length": "0"}),
+        response("307 Temporary Redirect", {"Location": "elsewhere", "Content-Length": "0"}),
+        response(headers={"Content-Length": "2"}, body=b"{}"),
+    ]
+
+    async def test(api: AsyncApi):
+        assert await api.fetch(DATE_FROM, DATE_TO) == b"{}"
+
+    server: Server = run(responses, test)
+    assert [request_line.split()[1] for request_line, _ in server.requests[1:]] == [
+        "/moved?a=1",
+        "/elsewhere",
+    ]
+
+
+def test_too_many_redirections():
+    redirect: bytes = response("302 Found", {"Location": "/api", "Content-Length": "0"})
+
+    async def test(api: AsyncApi):
+        with pytest.raises(ApiError, match="Too many redirections"):
+            await api.fetch(DATE_FROM, DATE_TO)
+
+    server: Server = run([redirect] * 3, test, retry=AsyncRetry(redirect=2))
+    assert len(server.requests) == 3
+
+
+def test_not_modified_keeps_the_validators_omitted():
+    raw: bytes = response("304 Not Modified", {"ETag": '"b"'})
+
+    async def test(api: AsyncApi):
+        raw_response, validators = await api.fetch_conditional(
+            DATE_FROM, DATE_TO, Validators(etag='"a"', last_modified="yesterday")
+        )
+        assert raw_response is None
+        assert (validators.etag, validators.last_modified) == ('"b"', "yesterday")
+
+    run([raw], test)
+
+
+def test_status_failures_are_retried():
+    responses: list[bytes] = [
+        response("503 Service Unavailable", {"Content-Length": "0", "Retry-After": "0"}),
+        response(headers={"Content-Length": "2"}, body=b"{}"),
+    ]
+
+    async def test(api: AsyncApi):
+        assert await api.fetch(DATE_FROM, DATE_TO) == b"{}"
+
+    server: Server = run(responses, test, retry=AsyncRetry(status_forcelist=frozenset({503})))
+    assert len(server.requests) == 2
+
+
+def test_status_failures_of_disallowed_methods_are_not_retried():
+    responses: list[bytes] = [
+        response("503 Service Unavailable", {"Content-Length": "0"}),
+        response(headers={"Content-Length": "2"}, body=b"{}"),
+    ]
+
+    async def test(api: AsyncApi):
+        with pytest.raises(ApiError, match="503"):
+            await api.fetch(DATE_FROM, DATE_TO)
+
+    retry = AsyncRetry(status_forcelist=frozenset({503}), allowed_methods=frozenset({"HEAD"}))
+    server: Server = run(responses, test, retry=retry)
+    assert len(server.requests) == 1
+
+
+def test_deadline_bounds_the_retries():
+    async def test(api: AsyncApi):
+        with pytest.raises(ApiError, match="Deadline exceeded"):
+            await api.fetch(DATE_FROM, DATE_TO, deadline=0.2)
+
+    # NOTE: The server never responds, each attempt times out
+    run(
+        [b""] * 10,
+        test,
+        retry=AsyncRetry(total=10),
+        timeout=AsyncTimeout(total=0.1),
+    )
+
+
+def test_body_is_closed_when_reading_it_stops_early(monkeypatch: pytest.MonkeyPatch):
+    iter_body = AsyncApi._iter_body
+    closed: list[bool] = []
+
+    async def recording_iter_body(self, *args) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in iter_body(self, *args):
+                yield chunk
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(AsyncApi, "_iter_body", recording_iter_body)
+
+    async def test(api: AsyncApi):
+        with pytest.raises(ApiError, match="Unable to read the response"):
+            await api.fetch(DATE_FROM, DATE_TO)
+        assert closed == [True]
+
+    # NOTE: The first chunk can't be decompressed, the others are never read
+    body: bytes = chunked(b"not gzip", b"{}")
+    run(
+        [response(headers={"Transfer-Encoding": "chunked", "Content-Encoding": "gzip"}, body=body)],
+        test,
+        retry=AsyncRetry(total=0),
+    )
+
+
+@pytest.mark.parametrize(
+    "retry, kind, history, method, allowed",
+    [
+        (AsyncRetry(total=2), "read", ["read"], "GET", True),
+        (AsyncRetry(total=2), "read", ["read", "connect"], "GET", False),
+        (AsyncRetry(total=2), "read", [], "POST", False),
+        (AsyncRetry(total=2), "connect", [], "POST", True),
+        (AsyncRetry(total=2, allowed_methods=None), "status", [], "POST", True),
+        (AsyncRetry(total=None, read=1), "read", [], "get", True),
+        (AsyncRetry(total=None, read=1), "read", ["read"], "GET", False),
+        (AsyncRetry(total=None, read=1), "connect", [], "GET", False),
+    ],
+)
+def test_retry_allows(retry: AsyncRetry, kind: str, history: list[str], method: str, allowed: bool):
+    assert retry.allows(kind, history, method) is allowed
@@ -0,0 +1,134 @@
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from luz_metronomo import cache as cache_module
+from luz_metronomo.cache import CacheKey, PriceCache
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.validators import Validators
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+
+TTL = 900.0
+URL = "http://127.0.0.1/api"
+
+
+def key(day: str) -> CacheKey:
+    return CacheKey(URL, f"{day}T00:00:00", f"{day}T23:59:00", "hour")
+
+
+# NOTE: Past days are settled, days far ahead never are
+SETTLED = key("2024-03-01")
+CURRENT = key("2099-03-01")
+
+
+def price_lists(title: str) -> list[PriceList]:
+    return [PriceList(title, datetime(2024, 3, 1, 20, 30, tzinfo=TIMEZONE_SPAIN))]
+
+
+class Clock:
+    def __init__(self):
+        # NOTE: Ahead of the times at which the files are written
+        self.now: float = time.time() + 1.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+def test_settled_keys():
+    now: datetime = datetime(2024, 3, 2, 0, 30, tzinfo=TIMEZONE_SPAIN)
+    assert SETTLED.is_settled(now)
+    assert not key("2024-03-02").is_settled(now)
+    assert not CURRENT.is_settled()
+
+
+def test_memory_entries_expire(clock: Clock):
+    cache = PriceCache(memory_size=8, disk_size=0, ttl=TTL)
+    cache.set(CURRENT, price_lists("current"), Validators(etag='"a"'))
+    clock.now += TTL - 1.0
+    assert cache.get(CURRENT) == price_lists("current")
+    clock.now += 1.0
+    assert cache.get(CURRENT) is None
+
+    # NOTE: Expired entries are kept to be revalidated
+    stale = cache.get_stale(CURRENT)
+    assert stale is not None
+    assert stale.price_lists == price_lists("current")
+    assert stale.validators == Validators(etag='"a"')
+    cache.touch(CURRENT)
+    assert cache.get(CURRENT) == price_lists("current")
+
+
+def test_disk_entries_expire(clock: Clock, tmp_path: Path):
+    cache = PriceCache(memory_size=8, disk_size=8, ttl=TTL, path=tmp_path)
+    cache.set_raw(CURRENT, b"{}", Validators(last_modified="Fri, 01 Mar 2024 20:30:00 GMT"))
+    assert cache.get_raw(CURRENT) == b"{}"
+    clock.now += TTL
+    assert cache.get_raw(CURRENT) is None
+
+    stale = cache.get_stale(CURRENT)
+    assert stale is not None and stale.price_lists is None and stale.raw_response == b"{}"
+    assert stale.validators.last_modified == "Fri, 01 Mar 2024 20:30:00 GMT"
+    assert stale.validators.digest is not None
+    cache.touch(CURRENT)
+    assert cache.get_raw(CURRENT) == b"{}"
+
+
+def test_settled_entries_never_expire(clock: Clock, tmp_path: Path):
+    cache = PriceCache(memory_size=8, disk_size=8, ttl=TTL, path=tmp_path)
+    cache.set(SETTLED, price_lists("settled"))
+    cache.set_raw(SETTLED, b"{}")
+    clock.now += 365 * 24 * 3600.0
+    assert cache.get(SETTLED) == price_lists("settled")
+    assert cache.get_raw(SETTLED) == b"{}"
+
+
+def test_memory_evicts_the_least_recently_used_entries():
+    cache = PriceCache(memory_size=2, disk_size=0, ttl=TTL)
+    keys: list[CacheKey] = [key(f"2024-03-0{day}") for day in (1, 2, 3)]
+    cache.set(keys[0], price_lists("first"))
+    cache.set(keys[1], price_lists("second"))
+    assert cache.get(keys[0]) == price_lists("first")
+    cache.set(keys[2], price_lists("third"))
+    assert cache.get(keys[1]) is None
+    assert cache.get_stale(keys[1]) is None
+    assert cache.get(keys[0]) == price_lists("first")
+    assert cache.get(keys[2]) == price_lists("third")
+
+
+def test_disk_evicts_the_least_recently_accessed_entries(clock: Clock, tmp_path: Path):
+    cache = PriceCache(memory_size=8, disk_size=2, ttl=TTL, path=tmp_path)
+    keys: list[CacheKey] = [key(f"2024-03-0{day}") for day in (1, 2, 3)]
+    for index, cache_key in enumerate(keys[:2]):
+        cache.set_raw(cache_key, b"%d" % index, Validators(etag=f'"{index}"'))
+        path_entry: Path = tmp_path / f"{cache_key.digest()}.json"
+        os.utime(path_entry, (1000.0 * (index + 1), path_entry.stat().st_mtime))
+
+    # NOTE: Reading the first entry makes the second one the least recently accessed
+    assert cache.get_raw(keys[0]) == b"0"
+    cache.set_raw(keys[2], b"2")
+    assert cache.get_stale(keys[1]) is None
+    assert not (tmp_path / f"{keys[1].digest()}.validators").exists()
+    assert cache.get_raw(keys[0]) == b"0"
+    assert cache.get_validators(keys[0]) == Validators(etag='"0"')
+    assert cache.get_raw(keys[2]) == b"2"
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_discard(tmp_path: Path):
+    cache = PriceCache(memory_size=8, disk_size=8, ttl=TTL, path=tmp_path)
+    cache.set(CURRENT, price_lists("current"))
+    cache.set_raw(CURRENT, b"{}", Validators(etag='"a"'))
+    cache.discard(CURRENT)
+    assert cache.get(CURRENT) is None and cache.get_raw(CURRENT) is None
+    assert cache.get_stale(CURRENT) is None
+    assert list(tmp_path.iterdir()) == []
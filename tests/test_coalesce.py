@@ -0,0 +1,138 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from luz_metronomo.coalesce import RequestCoalescer
+
+
+def test_sequential_calls_are_not_coalesced():
+    coalescer = RequestCoalescer()
+    calls: list[str] = []
+    for _ in range(3):
+        assert coalescer.run("key", lambda: calls.append("key") or len(calls)) == len(calls)
+    assert calls == ["key"] * 3
+
+
+def test_threads_share_the_request_in_flight():
+    coalescer = RequestCoalescer()
+    started = threading.Event()
+    release = threading.Event()
+    calls: list[str] = []
+
+    def request(key: str) -> str:
+        calls.append(key)
+        started.set()
+        release.wait(10)
+        return f"response {key}"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        first = executor.submit(coalescer.run, "a", lambda: request("a"))
+        assert started.wait(10)
+        others = [executor.submit(coalescer.run, "a", lambda: request("a")) for _ in range(2)]
+        other_key = executor.submit(coalescer.run, "b", lambda: "response b")
+        assert other_key.result(10) == "response b"
+        release.set()
+        assert [future.result(10) for future in [first, *others]] == ["response a"] * 3
+    assert calls == ["a"]
+
+
+def test_failed_request_is_sent_again_by_the_waiting_callers():
+    coalescer = RequestCoalescer()
+    started = threading.Event()
+    release = threading.Event()
+    calls: list[str] = []
+
+    def failing() -> str:
+        calls.append("failing")
+        started.set()
+        release.wait(10)
+        raise ConnectionError
+
+    def succeeding() -> str:
+        calls.append("succeeding")
+        return "response"
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(coalescer.run, "key", failing)
+        assert started.wait(10)
+        waiting = executor.submit(coalescer.run, "key", succeeding)
+        release.set()
+        with pytest.raises(ConnectionError):
+            first.result(10)
+        assert waiting.result(10) == "response"
+    assert calls == ["failing", "succeeding"]
+    # NOTE: Nothing is left in flight
+    assert coalescer.run("key", lambda: "again") == "again"
+
+
+def test_tasks_share_the_request_in_flight():
+    coalescer = RequestCoalescer()
+    calls: list[str] = []
+
+    async def request(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return f"response {key}"
+
+    async def main() -> list[str]:
+        return await asyncio.gather(
+            *(coalescer.run_async(key, lambda key=key: request(key)) for key in "aaba")
+        )
+
+    assert asyncio.run(main()) == ["response a", "response a", "response b", "response a"]
+    assert calls == ["a", "b"]
+
+
+def test_cancelled_task_leaves_the_request_to_the_waiting_ones():
+    coalescer = RequestCoalescer()
+    calls: list[str] = []
+
+    async def request(delay: float) -> str:
+        calls.append("request")
+        await asyncio.sleep(delay)
+        return "response"
+
+    async def main() -> str:
+        first = asyncio.create_task(coalescer.run_async("key", lambda: request(10)))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(coalescer.run_async("key", lambda: request(0)))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await asyncio.wait_for(waiting, 10)
+
+    assert asyncio.run(main()) == "response"
+    assert calls == ["request", "request"]
+
+
+def test_threads_and_tasks_share_the_request_in_flight():
+    coalescer = RequestCoalescer()
+    started = threading.Event()
+    release = threading.Event()
+    calls: list[str] = []
+
+    def request() -> str:
+        calls.append("thread")
+        started.set()
+        release.wait(10)
+        return "response"
+
+    async def request_async() -> str:
+        calls.append("task")
+        return "other response"
+
+    async def main() -> str:
+        waiting = asyncio.create_task(coalescer.run_async("key", request_async))
+        await asyncio.sleep(0.01)
+        release.set()
+        return await asyncio.wait_for(waiting, 10)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        thread = executor.submit(coalescer.run, "key", request)
+        assert started.wait(10)
+        assert asyncio.run(main()) == "response"
+        assert thread.result(10) == "response"
+    assert calls == ["thread"]
@@ -0,0 +1,190 @@
+import csv
+import io
+import json
+import struct
+from array import array
+from datetime import datetime, timedelta
+from typing import Any
+
+import pytest
+
+from luz_metronomo import export as export_module
+from luz_metronomo import report as report_module
+from luz_metronomo.api import Api
+from luz_metronomo.configuration import Configuration
+from luz_metronomo.entity.export_format import ExportFormat
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.price_point import PricePoint
+from luz_metronomo.export import (
+    COLUMNAR_MAGIC,
+    COLUMNAR_VERSION,
+    ColumnarExporter,
+    CsvExporter,
+    JsonLinesExporter,
+    exporter_object,
+)
+from luz_metronomo.util.configuration import api_object
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+
+# NOTE: Clocks are set back at 03:00 on that day, the points of the repeated hour keep their offset
+DATE_FROM = datetime(2024, 10, 27, 1, tzinfo=TIMEZONE_SPAIN)
+
+
+def price_lists() -> list[PriceList]:
+    timestamp: float = DATE_FROM.timestamp()
+    datetimes: list[datetime] = [
+        datetime.fromtimestamp(timestamp + hour * 3600, TIMEZONE_SPAIN) for hour in range(4)
+    ]
+    return [
+        PriceList(
+            title,
+            DATE_FROM - timedelta(hours=5),
+            [
+                PricePoint(value + index, the_datetime)
+                for index, the_datetime in enumerate(datetimes)
+            ],
+        )
+        for title, value in (("PVPC (€/MWh)", 100.5), ("Mercado", 50.0))
+    ]
+
+
+def expected_rows() -> list[tuple[str, str, float]]:
+    return [
+        (price_list.title, price_point.datetime.isoformat(), price_point.value)
+        for price_list in price_lists()
+        for price_point in price_list.price_points
+    ]
+
+
+def test_csv_exporter():
+    output = io.StringIO()
+    exporter = CsvExporter(output)
+    for price_list in price_lists():
+        exporter.write(price_list)
+    exporter.flush()
+    header, *rows = list(csv.reader(io.StringIO(output.getvalue())))
+    assert header == ["title", "datetime", "value"]
+    assert [(title, the_datetime, float(value)) for title, the_datetime, value in rows] == (
+        expected_rows()
+    )
+    assert [row[1] for row in rows[1:3]] == [
+        "2024-10-27T02:00:00+02:00",
+        "2024-10-27T02:00:00+01:00",
+    ]
+
+
+def test_json_lines_exporter():
+    output = io.StringIO()
+    exporter = JsonLinesExporter(output)
+    for price_list in price_lists():
+        exporter.write(price_list)
+    exporter.flush()
+    rows: list[dict[str, Any]] = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [(row["title"], row["datetime"], row["value"]) for row in rows] == expected_rows()
+
+
+def read_columnar(raw: bytes) -> list[tuple[str, list[int], list[int], list[float]]]:
+    assert raw[:4] == COLUMNAR_MAGIC
+    assert struct.unpack_from("<B", raw, 4) == (COLUMNAR_VERSION,)
+    blocks: list[tuple[str, list[int], list[int], list[float]]] = []
+    position: int = 5
+    while position < len(raw):
+        (title_length,) = struct.unpack_from("<H", raw, position)
+        position += 2
+        title: str = raw[position : position + title_length].decode("utf-8")
+        position += title_length
+        (amount,) = struct.unpack_from("<I", raw, position)
+        position += 4
+        columns: list[list] = []
+        for typecode, size in (("q", 8), ("i", 4), ("d", 8)):
+            columns.append(list(struct.unpack_from(f"<{amount}{typecode}", raw, position)))
+            position += amount * size
+        blocks.append((title, *columns))
+    return blocks
+
+
+def test_columnar_exporter():
+    output = io.BytesIO()
+    exporter = ColumnarExporter(output)
+    for price_list in price_lists():
+        exporter.write(price_list)
+    exporter.flush()
+    assert read_columnar(output.getvalue()) == [
+        (
+            price_list.title,
+            list(price_list.timestamps),
+            list(price_list.offsets),
+            list(price_list.values),
+        )
+        for price_list in price_lists()
+    ]
+    assert read_columnar(output.getvalue())[0][2] == [7200, 7200, 3600, 3600]
+
+
+def test_columnar_exporter_without_lists():
+    output = io.BytesIO()
+    ColumnarExporter(output).write(PriceList("empty", DATE_FROM))
+    assert read_columnar(output.getvalue()) == [("empty", [], [], [])]
+
+
+def test_columnar_exporter_on_big_endian_hosts(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(export_module.sys, "byteorder", "big")
+    output = io.BytesIO()
+    exporter = ColumnarExporter(output)
+    for price_list in price_lists():
+        exporter.write(price_list)
+    (title, timestamps, offsets, values), _ = read_columnar(output.getvalue())
+    # NOTE: Columns are swapped, which a little-endian host reads back as big-endian
+    assert array("q", [timestamps[0]]).tobytes() == struct.pack(">q", int(DATE_FROM.timestamp()))
+    assert array("i", [offsets[0]]).tobytes() == struct.pack(">i", 7200)
+    assert array("d", [values[0]]).tobytes() == struct.pack(">d", 100.5)
+
+
+@pytest.mark.parametrize(
+    "export_format, exporter_class, output",
+    [
+        (ExportFormat.Csv, CsvExporter, io.StringIO()),
+        (ExportFormat.JsonLines, JsonLinesExporter, io.StringIO()),
+        (ExportFormat.Columnar, ColumnarExporter, io.BytesIO()),
+    ],
+)
+def test_exporter_object(export_format: ExportFormat, exporter_class: type, output: io.IOBase):
+    assert isinstance(exporter_object(export_format, output), exporter_class)
+
+
+@pytest.mark.parametrize(
+    "module, run",
+    [
+        (
+            export_module,
+            lambda configuration: export_module.export_price_lists(
+                configuration,
+                DATE_FROM,
+                DATE_FROM + timedelta(hours=4),
+                ExportFormat.Csv,
+                "-",
+                from_store=True,
+            ),
+        ),
+        (
+            report_module,
+            lambda configuration: report_module.report_statistics(
+                configuration, DATE_FROM, DATE_FROM + timedelta(hours=4), [], from_store=True
+            ),
+        ),
+    ],
+)
+def test_disabled_store_leaves_no_client_open(monkeypatch: pytest.MonkeyPatch, module, run):
+    opened: list[Api] = []
+    closed: list[Api] = []
+
+    def recording_api_object(*args) -> Api:
+        api: Api = api_object(*args)
+        opened.append(api)
+        monkeypatch.setattr(api, "close", lambda: closed.append(api))
+        return api
+
+    monkeypatch.setattr(module, "api_object", recording_api_object)
+    configuration: Configuration = Configuration.model_validate({"store": {"enable": False}})
+    assert run(configuration) == 1
+    assert opened == closed
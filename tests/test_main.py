@@ -0,0 +1,138 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+ROOT: Path = Path(__file__).resolve().parent.parent
+
+# NOTE: Runs a command against the stand-in server, with the cache and the store disabled
+RUN_COMMAND: str = """
+import json
+import sys
+import threading
+
+from luz_metronomo.server import Faults, StandInServer
+
+server = StandInServer(("127.0.0.1", 0), Faults())
+threading.Thread(target=server.serve_forever, daemon=True).start()
+with open(sys.argv[1], "w") as f:
+    json.dump({"api": {"url": server.url, "cache": {"enable": False}}, "store": {"enable": False}}, f)
+
+from luz_metronomo.__main__ import main
+
+sys.exit(main(["luz-metronomo", "-c", sys.argv[1], *sys.argv[2:]]))
+"""
+
+
+def run_command(tmp_path: Path, timezone: str, *args: str) -> str:
+    """
+    Run the given command on a host set to the given timezone, and return its standard output.
+    """
+    process = subprocess.run(
+        [sys.executable, "-c", RUN_COMMAND, str(tmp_path / "configuration.json"), *args],
+        capture_output=True,
+        check=True,
+        cwd=tmp_path,
+        env=os.environ | {"PYTHONPATH": str(ROOT), "TZ": timezone},
+        text=True,
+        timeout=60,
+    )
+    return process.stdout
+
+
+def run_command_into_closed_pipe(tmp_path: Path, *args: str) -> tuple[int, str]:
+    """
+    Run the given command with its standard output closed by the reader right away (e.g. `| head`),
+    and return its exit status and standard error.
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-c", RUN_COMMAND, str(tmp_path / "configuration.json"), *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=tmp_path,
+        env=os.environ | {"PYTHONPATH": str(ROOT)},
+        text=True,
+    )
+    assert process.stdout is not None and process.stderr is not None
+    process.stdout.close()
+    stderr: str = process.stderr.read()
+    return process.wait(60), stderr
+
+
+# NOTE: Days are Spanish ones, whichever the timezone of the host (e.g. cron jobs on UTC servers)
+HOST_TIMEZONES: list[str] = ["UTC", "America/New_York", "Asia/Tokyo", "Europe/Madrid"]
+
+
+@pytest.mark.parametrize("timezone", HOST_TIMEZONES)
+def test_export_days_in_any_host_timezone(tmp_path: Path, timezone: str):
+    output: str = run_command(
+        tmp_path, timezone, "export", "--date-from", "2024-03-30", "--date-to", "2024-04-01"
+    )
+    rows: list[dict[str, str]] = list(csv.DictReader(output.splitlines()))
+    for title in {row["title"] for row in rows}:
+        datetimes: list[datetime] = [
+            datetime.fromisoformat(row["datetime"]) for row in rows if row["title"] == title
+        ]
+        # NOTE: Clocks are set forward on 2024-03-31, which lasts 23 hours
+        assert len(datetimes) == 24 + 23 + 24
+        assert datetimes[0].isoformat() == "2024-03-30T00:00:00+01:00"
+        assert datetimes[-1].isoformat() == "2024-04-01T23:00:00+02:00"
+
+
+@pytest.mark.parametrize("timezone", HOST_TIMEZONES)
+def test_stats_days_in_any_host_timezone(tmp_path: Path, timezone: str):
+    output: str = run_command(
+        tmp_path,
+        timezone,
+        "stats",
+        *("--date-from", "2024-03-01", "--date-to", "2024-03-01"),
+        *("--group-by", "day", "--json"),
+    )
+    counts: Counter[str] = Counter()
+    for line in output.splitlines():
+        row = json.loads(line)
+        assert row["count"] == 24
+        counts[row["group"]] += 1
+        if row["group"] == "day":
+            assert row["label"] == "2024-03-01"
+    assert counts["all"] == counts["day"] > 0
+
+
+@pytest.mark.parametrize("timezone", HOST_TIMEZONES)
+def test_plan_days_in_any_host_timezone(tmp_path: Path, timezone: str):
+    output: str = run_command(
+        tmp_path,
+        timezone,
+        "plan",
+        *("--date-from", "2024-03-01", "--json"),
+        *("-l", "name=dishwasher,duration=24,power=1"),
+    )
+    (placement,) = [json.loads(line) for line in output.splitlines()]
+    # NOTE: A load that lasts the whole day only fits its exact bounds
+    assert (placement["from"], placement["to"]) == (
+        "2024-03-01T00:00:00+01:00",
+        "2024-03-02T00:00:00+01:00",
+    )
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ("export", "--date-from", "2024-03-01", "--date-to", "2024-03-10"),
+        ("export", "--date-from", "2024-03-01", "--date-to", "2024-03-10", "--format", "columnar"),
+        ("stats", "--date-from", "2024-03-01", "--date-to", "2024-03-01"),
+        ("plan", "--date-from", "2024-03-01", "-l", "name=dishwasher,duration=2,power=1"),
+    ],
+)
+def test_closed_output_is_not_an_error(tmp_path: Path, args: tuple[str, ...]):
+    status, stderr = run_command_into_closed_pipe(tmp_path, *args)
+    assert status == 1
+    assert "Traceback" not in stderr and "ERROR" not in stderr
+    # NOTE: Nor when the standard output is flushed on exit
+    assert "BrokenPipeError" not in stderr
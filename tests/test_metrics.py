@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import pytest
+
+from luz_metronomo.metrics import Metrics, format_counter_value
+
+
+@pytest.mark.parametrize(
+    "value, formatted",
+    [
+        (0, "0"),
+        (1, "1"),
+        (999_999, "999999"),
+        (12_345_678, "12345678"),
+        (2**53, "9007199254740992"),
+        (12_345_678.0, "12345678"),
+        (0.5, "0.5"),
+        (1234567.25, "1234567.25"),
+    ],
+)
+def test_format_counter_value(value: float, formatted: str):
+    assert format_counter_value(value) == formatted
+
+
+def test_counters_add_up():
+    metrics = Metrics()
+    for size in (600_000, 600_000, 34_567):
+        metrics.count("api_bytes_received", size, encoding="wire")
+    metrics.count("api_requests", status=200)
+    metrics.count("api_requests", status=200)
+    assert metrics.counters() == [
+        ("api_bytes_received", (("encoding", "wire"),), 1_234_567),
+        ("api_requests", (("status", "200"),), 2),
+    ]
+
+
+def test_spans():
+    metrics = Metrics()
+    metrics.record("api_fetch_body", 0.25, connection="new")
+    metrics.record("api_fetch_body", 0.75, connection="new")
+    with pytest.raises(RuntimeError):
+        with metrics.span("api_get"):
+            raise RuntimeError
+    ((name, labels, summary), (name_raising, _, summary_raising)) = metrics.spans()
+    assert (name, labels) == ("api_fetch_body", (("connection", "new"),))
+    assert (summary.count, summary.total, summary.maximum, summary.last, summary.mean) == (
+        2,
+        1.0,
+        0.75,
+        0.75,
+        0.5,
+    )
+    assert (name_raising, summary_raising.count) == ("api_get", 1)
+
+
+def test_to_prometheus():
+    metrics = Metrics()
+    metrics.record("api_fetch_body", 0.25, connection="new")
+    metrics.record("api_fetch_body", 0.5, connection="reused")
+    metrics.count("api_bytes_received", 12_345_678, encoding="wire")
+    metrics.count("api_bytes_received", 1, encoding="identity")
+    metrics.count("api_errors", error='Bad "quoted"\nerror')
+    assert metrics.to_prometheus().splitlines() == [
+        "# TYPE luz_metronomo_api_fetch_body_seconds summary",
+        'luz_metronomo_api_fetch_body_seconds_count{connection="new"} 1',
+        'luz_metronomo_api_fetch_body_seconds_sum{connection="new"} 0.250000',
+        'luz_metronomo_api_fetch_body_seconds_count{connection="reused"} 1',
+        'luz_metronomo_api_fetch_body_seconds_sum{connection="reused"} 0.500000',
+        "# TYPE luz_metronomo_api_fetch_body_seconds_max gauge",
+        'luz_metronomo_api_fetch_body_seconds_max{connection="new"} 0.250000',
+        'luz_metronomo_api_fetch_body_seconds_max{connection="reused"} 0.500000',
+        "# TYPE luz_metronomo_api_bytes_received_total counter",
+        'luz_metronomo_api_bytes_received_total{encoding="identity"} 1',
+        'luz_metronomo_api_bytes_received_total{encoding="wire"} 12345678',
+        "# TYPE luz_metronomo_api_errors_total counter",
+        'luz_metronomo_api_errors_total{error="Bad \\"quoted\\"\\nerror"} 1',
+    ]
+    metrics.clear()
+    assert metrics.to_prometheus() == ""
+
+
+def test_counters_keep_increasing_past_a_million():
+    metrics = Metrics()
+    values: list[int] = []
+    for _ in range(20):
+        metrics.count("api_bytes_received", 123_457)
+        (line,) = [
+            line for line in metrics.to_prometheus().splitlines() if not line.startswith("#")
+        ]
+        values.append(int(line.rsplit(" ", 1)[1]))
+    assert values == [123_457 * amount for amount in range(1, 21)]
+
+
+def test_write_prometheus(tmp_path: Path):
+    metrics = Metrics()
+    metrics.count("api_requests", status=200)
+    path: Path = tmp_path / "metrics" / "luz_metronomo.prom"
+    metrics.write_prometheus(path)
+    assert path.read_text() == metrics.to_prometheus()
+    assert [path.name for path in path.parent.iterdir()] == [path.name]
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.price_point import PricePoint
+from luz_metronomo.planner import Load, LoadPlanner, Plan
+from luz_metronomo.tariff import TariffCalendar
+
+DATE_FROM = datetime(2024, 1, 2, tzinfo=timezone(timedelta(hours=1)))
+
+
+def price_list(values: list[float], interval: timedelta = timedelta(hours=1)) -> PriceList:
+    return PriceList(
+        "test",
+        DATE_FROM,
+        [
+            PricePoint(value=value, datetime=DATE_FROM + index * interval)
+            for index, value in enumerate(values)
+        ],
+    )
+
+
+def plan(values: list[float], *loads: Load, **parameters) -> Plan:
+    return LoadPlanner(price_list(values), TariffCalendar(), **parameters).plan(loads)
+
+
+def test_whole_duration():
+    (placement,) = plan([50, 10, 20, 90], Load("load", timedelta(hours=2), power=2.0)).placements
+    assert (placement.index_from, placement.index_to) == (1, 3)
+    assert placement.date_to == DATE_FROM + timedelta(hours=3)
+    assert placement.mean_price == pytest.approx(15.0)
+    # NOTE: 2h at 2kW, at 15€/MWh
+    assert placement.cost == pytest.approx(0.06)
+
+
+def test_partial_last_point_is_charged_for_the_fraction_used():
+    (placement,) = plan(
+        [10, 10, 10, 200, 40, 40, 40, 40], Load("load", timedelta(hours=3.25), power=1.0)
+    ).placements
+    # NOTE: Rounding the duration up to 4h would have picked the last four points instead
+    assert (placement.index_from, placement.index_to) == (0, 4)
+    assert placement.date_to == DATE_FROM + timedelta(hours=3, minutes=15)
+    assert placement.mean_price == pytest.approx((30 + 0.25 * 200) / 3.25)
+    assert placement.cost == pytest.approx((30 + 0.25 * 200) / 1000)
+
+
+def test_partial_last_point_is_reserved_as_a_whole():
+    placements = plan(
+        [10, 10, 10, 10],
+        Load("first", timedelta(hours=1.5), power=1.0),
+        Load("second", timedelta(hours=1.5), power=1.0),
+        max_power=1.0,
+    ).placements
+    assert [(placement.index_from, placement.index_to) for placement in placements] == [
+        (0, 2),
+        (2, 4),
+    ]
+
+
+def test_duration_shorter_than_a_point():
+    (placement,) = plan([30, 20, 40], Load("load", timedelta(minutes=15), power=4.0)).placements
+    assert (placement.index_from, placement.index_to) == (1, 2)
+    assert placement.mean_price == pytest.approx(20.0)
+    assert placement.cost == pytest.approx(0.02)
+
+
+def test_lower_bound_and_unplaced_loads():
+    result: Plan = plan(
+        [10, 50, 50, 10],
+        Load("first", timedelta(hours=1), power=1.0, exclusive=True),
+        Load("second", timedelta(hours=1), power=1.0, exclusive=True),
+        Load("too long", timedelta(hours=5), power=1.0),
+    )
+    assert sorted(placement.load.name for placement in result.placements) == ["first", "second"]
+    assert [placement.index_from for placement in result.placements] == [0, 3]
+    assert [load.name for load in result.unplaced] == ["too long"]
+    assert result.cost == pytest.approx(result.lower_bound) == pytest.approx(0.02)
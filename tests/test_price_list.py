@@ -0,0 +1,268 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.price_point import PricePoint
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+
+LAST_UPDATE = datetime(2024, 3, 1, 20, 15, tzinfo=TIMEZONE_SPAIN)
+
+
+def spanish_datetimes(
+    date_from: datetime, amount: int, interval: timedelta = timedelta(hours=1)
+) -> list[datetime]:
+    """
+    Consecutive Spanish datetimes, stepping in absolute time across daylight saving time changes.
+    """
+    timestamp: int = int(date_from.replace(tzinfo=TIMEZONE_SPAIN).timestamp())
+    step: int = int(interval.total_seconds())
+    return [
+        datetime.fromtimestamp(timestamp + index * step, TIMEZONE_SPAIN) for index in range(amount)
+    ]
+
+
+def price_list(datetimes: list[datetime], values: list[float] | None = None) -> PriceList:
+    if values is None:
+        values = [float(index) for index in range(len(datetimes))]
+    return PriceList(
+        "test",
+        LAST_UPDATE,
+        [
+            PricePoint(value=value, datetime=the_datetime)
+            for the_datetime, value in zip(datetimes, values)
+        ],
+    )
+
+
+def test_columns():
+    datetimes: list[datetime] = spanish_datetimes(datetime(2024, 3, 1), 3)
+    prices: PriceList = price_list(datetimes, [1.5, 2.5, 3.5])
+    assert list(prices.timestamps) == [int(the_datetime.timestamp()) for the_datetime in datetimes]
+    assert list(prices.offsets) == [3600] * 3
+    assert list(prices.values) == [1.5, 2.5, 3.5]
+    for column, typecode in ((prices.timestamps, "q"), (prices.offsets, "i"), (prices.values, "d")):
+        assert column.format == typecode
+        assert column.readonly
+    assert prices.interval == 3600
+
+
+def test_price_points_are_built_on_access():
+    datetimes: list[datetime] = spanish_datetimes(datetime(2024, 3, 1), 3)
+    prices: PriceList = price_list(datetimes)
+    assert len(prices.price_points) == 3
+    assert prices.price_points[1] == PricePoint(value=1.0, datetime=datetimes[1])
+    assert prices.price_points[-1].datetime == datetimes[-1]
+    assert list(prices.price_points[1:]) == [
+        PricePoint(value=1.0, datetime=datetimes[1]),
+        PricePoint(value=2.0, datetime=datetimes[2]),
+    ]
+
+
+def test_slices_share_the_columns():
+    prices: PriceList = price_list(spanish_datetimes(datetime(2024, 3, 1), 24))
+    sliced: PriceList = prices[6:12]
+    assert len(sliced) == 6
+    assert list(sliced.values) == [float(index) for index in range(6, 12)]
+    assert sliced.values.obj is prices.values.obj
+    assert (sliced.title, sliced.last_update, sliced.interval) == (
+        prices.title,
+        prices.last_update,
+        prices.interval,
+    )
+    with pytest.raises(TypeError):
+        prices[0]  # type: ignore[call-overload]
+
+
+def test_from_columns_keeps_memory_views():
+    prices: PriceList = price_list(spanish_datetimes(datetime(2024, 3, 1), 4))
+    rebuilt: PriceList = PriceList.from_columns(
+        prices.title, prices.last_update, prices.timestamps, prices.offsets, prices.values
+    )
+    assert rebuilt == prices
+    assert rebuilt.values.obj is prices.values.obj
+
+    with pytest.raises(ValueError):
+        PriceList.from_columns("test", LAST_UPDATE, [0, 3600], [0], [1.0, 2.0])
+
+
+@pytest.mark.parametrize(
+    "timestamps, interval",
+    [
+        ([], PriceList.DEFAULT_INTERVAL),
+        ([0], PriceList.DEFAULT_INTERVAL),
+        ([0, 900, 1800], 900),
+        # NOTE: Gaps don't make the interval any longer
+        ([0, 900, 7200, 8100], 900),
+        ([0, 3600, 3600, 7200], 3600),
+    ],
+)
+def test_interval_inferred_from_the_gaps(timestamps: list[int], interval: int):
+    prices: PriceList = PriceList.from_columns(
+        "test", LAST_UPDATE, timestamps, [0] * len(timestamps), [0.0] * len(timestamps)
+    )
+    assert prices.interval == interval
+
+
+def test_interval_given():
+    prices: PriceList = PriceList.from_columns("test", LAST_UPDATE, [0], [0], [1.0], interval=900)
+    assert prices.interval == 900
+    assert prices[:].interval == 900
+
+
+def test_empty_list():
+    prices: PriceList = PriceList("test", LAST_UPDATE)
+    assert len(prices) == 0
+    assert list(prices.price_points) == []
+    assert len(prices[1:]) == 0
+
+
+@pytest.mark.parametrize("day, hours", [(datetime(2024, 3, 31), 23), (datetime(2024, 10, 27), 25)])
+def test_daylight_saving_time_days_keep_their_offsets(day: datetime, hours: int):
+    datetimes: list[datetime] = spanish_datetimes(day, hours)
+    prices: PriceList = price_list(datetimes)
+    # NOTE: Ambiguous datetimes of different timezones never compare equal, so they are compared
+    # as (timestamp, offset)
+    assert [
+        (prices.datetime_at(index).timestamp(), prices.datetime_at(index).utcoffset())
+        for index in range(len(prices))
+    ] == [(the_datetime.timestamp(), the_datetime.utcoffset()) for the_datetime in datetimes]
+    assert len(set(prices.offsets)) == 2
+    assert prices.interval == 3600
+
+
+def test_equality():
+    datetimes: list[datetime] = spanish_datetimes(datetime(2024, 3, 1), 3)
+    assert price_list(datetimes) == price_list(datetimes)
+    assert price_list(datetimes) != price_list(datetimes, [0.0, 1.0, 2.5])
+    assert price_list(datetimes) != price_list(datetimes[:2])
+    assert price_list(datetimes) != "test"
+
+
+def test_index_of_exact_datetimes():
+    datetimes: list[datetime] = spanish_datetimes(datetime(2024, 3, 1), 4)
+    prices: PriceList = price_list(datetimes)
+    assert [prices.index_of(the_datetime) for the_datetime in datetimes] == [0, 1, 2, 3]
+    assert prices.index_of(datetimes[1] + timedelta(minutes=30)) is None
+    assert prices.index_of(datetimes[0] - timedelta(hours=1)) is None
+    assert prices.index_of(datetimes[-1] + timedelta(hours=1)) is None
+
+
+@pytest.mark.parametrize(
+    "delta, index",
+    [
+        (timedelta(minutes=-1), None),
+        (timedelta(), 0),
+        (timedelta(minutes=59, seconds=59), 0),
+        (timedelta(hours=1), 1),
+        (timedelta(hours=3, minutes=59), 3),
+        (timedelta(hours=4), None),
+    ],
+)
+def test_index_at_datetimes_within_points(delta: timedelta, index: int | None):
+    datetimes: list[datetime] = spanish_datetimes(datetime(2024, 3, 1), 4)
+    assert price_list(datetimes).index_at(datetimes[0] + delta) == index
+
+
+def test_lookups_across_gaps():
+    datetimes: list[datetime] = spanish_datetimes(datetime(2024, 3, 1), 6)
+    # NOTE: The points at 02:00 and 03:00 are missing
+    prices: PriceList = price_list(datetimes[:2] + datetimes[4:])
+    assert prices.index_at(datetimes[1] + timedelta(minutes=30)) == 1
+    assert prices.index_at(datetimes[2]) is None
+    assert prices.index_at(datetimes[3] + timedelta(minutes=30)) is None
+    assert prices.index_at(datetimes[4]) == 2
+    # NOTE: Points may be given a longer interval than that of the list
+    assert prices.index_at(datetimes[3], timedelta(hours=3)) == 1
+
+
+def test_lookups_in_other_timezones():
+    datetimes: list[datetime] = spanish_datetimes(datetime(2024, 3, 1), 4)
+    prices: PriceList = price_list(datetimes)
+    assert prices.index_of(datetime(2024, 3, 1, 1, tzinfo=timezone.utc)) == 2
+    assert prices.index_at(datetime(2024, 2, 29, 23, 30, tzinfo=timezone.utc)) == 0
+
+
+def test_price_point_at():
+    datetimes: list[datetime] = spanish_datetimes(datetime(2024, 3, 1), 24, timedelta(minutes=15))
+    prices: PriceList = price_list(datetimes)
+    assert prices.price_point_at(datetimes[5] + timedelta(minutes=10)) == PricePoint(
+        value=5.0, datetime=datetimes[5]
+    )
+    assert prices.price_point_at(datetimes[-1] + timedelta(minutes=15)) is None
+    assert price_list([]).price_point_at(datetimes[0]) is None
+
+
+@pytest.mark.parametrize("day, hours", [(datetime(2024, 3, 31), 23), (datetime(2024, 10, 27), 25)])
+def test_lookups_on_daylight_saving_time_days(day: datetime, hours: int):
+    datetimes: list[datetime] = spanish_datetimes(day, hours + 1)
+    prices: PriceList = price_list(datetimes)
+    assert [prices.index_of(the_datetime) for the_datetime in datetimes] == list(range(hours + 1))
+    # NOTE: 02:00 is skipped on the day clocks are set forward, and repeated on the day they are
+    # set back
+    assert prices.index_at(day.replace(hour=3, minute=30, tzinfo=TIMEZONE_SPAIN)) == (
+        2 if hours == 23 else 4
+    )
+    if hours == 25:
+        assert [
+            prices.index_at(day.replace(hour=2, minute=30, tzinfo=TIMEZONE_SPAIN, fold=fold))
+            for fold in (0, 1)
+        ] == [2, 3]
+    assert prices.index_at(day.replace(hour=23, minute=30, tzinfo=TIMEZONE_SPAIN)) == hours - 1
+
+
+def test_between():
+    datetimes: list[datetime] = spanish_datetimes(datetime(2024, 3, 1), 24)
+    prices: PriceList = price_list(datetimes)
+    minute = timedelta(minutes=1)
+    for date_from, date_to in (
+        (datetimes[2], datetimes[5]),
+        (datetimes[2] - minute, datetimes[5] + minute),
+    ):
+        assert list(prices.between(date_from, date_to).values) == [2.0, 3.0, 4.0, 5.0]
+    assert len(prices.between(datetimes[-1] + minute, datetimes[-1] + 2 * minute)) == 0
+    assert prices.between(datetimes[2], datetimes[5]).values.obj is prices.values.obj
+
+
+def test_roll_up_averages_each_local_hour():
+    datetimes: list[datetime] = spanish_datetimes(
+        datetime(2024, 3, 1, 0, 30), 15, timedelta(minutes=15)
+    )
+    rolled_up: PriceList = price_list(datetimes).roll_up(3600)
+    assert rolled_up.title == "test" and rolled_up.last_update == LAST_UPDATE
+    assert rolled_up.interval == 3600
+    # NOTE: Periods partly covered by the list are averaged over the points it holds
+    assert [point.datetime for point in rolled_up.price_points] == spanish_datetimes(
+        datetime(2024, 3, 1), 5
+    )
+    assert list(rolled_up.values) == [0.5, 3.5, 7.5, 11.5, 14.0]
+
+
+def test_roll_up_aligns_days_on_local_midnight():
+    datetimes: list[datetime] = spanish_datetimes(datetime(2024, 3, 1), 48)
+    rolled_up: PriceList = price_list(datetimes).roll_up(86400)
+    assert [point.datetime for point in rolled_up.price_points] == [
+        datetime(2024, 3, 1, tzinfo=TIMEZONE_SPAIN),
+        datetime(2024, 3, 2, tzinfo=TIMEZONE_SPAIN),
+    ]
+    assert list(rolled_up.values) == [11.5, 35.5]
+
+
+def test_roll_up_keeps_coarser_lists():
+    prices: PriceList = price_list(spanish_datetimes(datetime(2024, 3, 1), 24))
+    assert prices.roll_up(3600) is prices
+    assert prices.roll_up(900) is prices
+
+
+@pytest.mark.parametrize("day, hours", [(datetime(2024, 3, 31), 23), (datetime(2024, 10, 27), 25)])
+def test_roll_up_on_daylight_saving_time_days(day: datetime, hours: int):
+    datetimes: list[datetime] = spanish_datetimes(day, hours * 4, timedelta(minutes=15))
+    rolled_up: PriceList = price_list(datetimes).roll_up(3600)
+    # NOTE: The hour repeated when clocks are set back remains two periods, one per offset
+    assert [
+        (point.datetime.timestamp(), point.datetime.utcoffset()) for point in rolled_up.price_points
+    ] == [
+        (the_datetime.timestamp(), the_datetime.utcoffset())
+        for the_datetime in spanish_datetimes(day, hours)
+    ]
+    assert list(rolled_up.values) == [index * 4 + 1.5 for index in range(hours)]
@@ -0,0 +1,149 @@
+from datetime import date, datetime, time, timedelta, timezone
+from random import Random
+
+import pytest
+
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.price_point import PricePoint
+from luz_metronomo.scheduler import MAX_SLEEP, RefreshScheduler, is_published
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+
+TODAY = date(2024, 3, 1)
+TOMORROW = date(2024, 3, 2)
+
+
+def local(day: date, hour: int, minute: int = 0) -> datetime:
+    return datetime.combine(day, time(hour, minute), TIMEZONE_SPAIN)
+
+
+def scheduler(**kwargs) -> RefreshScheduler:
+    return RefreshScheduler(
+        **(
+            dict(
+                publication_time=time(20, 15),
+                publication_window=timedelta(hours=2),
+                backoff_jitter=0.0,
+                random=Random(0),
+            )
+            | kwargs
+        )
+    )
+
+
+def test_is_published():
+    last_update = local(TODAY, 20, 30)
+    point = PricePoint(value=1.0, datetime=local(TOMORROW, 0))
+    assert is_published([]) is False
+    assert is_published([PriceList("a", last_update), PriceList("b", last_update)]) is False
+    assert is_published([PriceList("a", last_update), PriceList("b", last_update, [point])])
+
+
+def test_rollover():
+    refresh_scheduler: RefreshScheduler = scheduler()
+    assert refresh_scheduler.rollover(local(TODAY, 23, 59)) is None
+    assert refresh_scheduler.rollover(local(TODAY, 23, 59)) is None
+    assert refresh_scheduler.rollover(local(TOMORROW, 0)) == TODAY
+    assert refresh_scheduler.rollover(local(TOMORROW, 0, 1)) is None
+    # NOTE: Days are Spanish ones, whichever the timezone of the given datetime
+    assert refresh_scheduler.rollover(datetime(2024, 3, 2, 22, 30, tzinfo=timezone.utc)) is None
+    assert refresh_scheduler.rollover(datetime(2024, 3, 2, 23, 30, tzinfo=timezone.utc)) == TOMORROW
+
+
+@pytest.mark.parametrize(
+    "now, day",
+    [
+        (local(TODAY, 12), None),
+        (local(TODAY, 20, 14), None),
+        (local(TODAY, 20, 15), TOMORROW),
+        (local(TODAY, 22, 14), TOMORROW),
+        (local(TODAY, 22, 15), None),
+    ],
+)
+def test_poll_due_within_the_window(now: datetime, day: date | None):
+    assert scheduler().poll_due(now) == day
+
+
+def test_poll_disabled():
+    refresh_scheduler: RefreshScheduler = scheduler(poll=False)
+    assert refresh_scheduler.poll_due(local(TODAY, 20, 30)) is None
+    assert refresh_scheduler.next_wakeup(local(TODAY, 20, 30)) == local(TOMORROW, 0)
+
+
+def test_backoff_between_unsuccessful_polls():
+    refresh_scheduler: RefreshScheduler = scheduler(backoff_factor=60.0, backoff_max=300.0)
+    assert [refresh_scheduler.backoff(attempts) for attempts in range(5)] == [
+        60.0,
+        120.0,
+        240.0,
+        300.0,
+        300.0,
+    ]
+
+    now: datetime = local(TODAY, 20, 15)
+    for delay in (60.0, 120.0, 240.0, 300.0):
+        assert refresh_scheduler.poll_due(now) == TOMORROW
+        refresh_scheduler.record_poll(now, TOMORROW, published=False)
+        assert refresh_scheduler.poll_due(now + timedelta(seconds=delay - 1)) is None
+        assert refresh_scheduler.next_wakeup(now) == now + timedelta(seconds=delay)
+        now += timedelta(seconds=delay)
+
+
+def test_backoff_jitter():
+    refresh_scheduler: RefreshScheduler = scheduler(backoff_jitter=30.0)
+    delays: list[float] = [refresh_scheduler.backoff(0) for _ in range(100)]
+    assert all(60.0 <= delay <= 90.0 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_no_polls_once_published():
+    refresh_scheduler: RefreshScheduler = scheduler()
+    refresh_scheduler.rollover(local(TODAY, 20, 15))
+    refresh_scheduler.record_poll(local(TODAY, 20, 15), TOMORROW, published=False)
+    assert refresh_scheduler.is_published(TOMORROW) is False
+    refresh_scheduler.record_poll(local(TODAY, 20, 16), TOMORROW, published=True)
+    assert refresh_scheduler.is_published(TODAY) and refresh_scheduler.is_published(TOMORROW)
+    assert refresh_scheduler.is_published(TOMORROW + timedelta(days=1)) is False
+    assert refresh_scheduler.poll_due(local(TODAY, 21)) is None
+    assert refresh_scheduler.next_wakeup(local(TODAY, 21)) == local(TOMORROW, 0)
+
+    # NOTE: The following day polls for the day after it, without any backoff left
+    assert refresh_scheduler.rollover(local(TOMORROW, 0)) == TODAY
+    assert refresh_scheduler.poll_due(local(TOMORROW, 20, 15)) == TOMORROW + timedelta(days=1)
+
+
+def test_rollover_resets_the_backoff():
+    refresh_scheduler: RefreshScheduler = scheduler(publication_window=timedelta(hours=4))
+    refresh_scheduler.rollover(local(TODAY, 23))
+    refresh_scheduler.record_poll(local(TODAY, 23, 59), TOMORROW, published=False)
+    refresh_scheduler.rollover(local(TOMORROW, 0, 5))
+    assert refresh_scheduler.poll_due(local(TOMORROW, 20, 15)) == TOMORROW + timedelta(days=1)
+
+
+@pytest.mark.parametrize(
+    "now, wakeup",
+    [
+        (local(TODAY, 12), local(TODAY, 20, 15)),
+        (local(TODAY, 20, 30), local(TODAY, 20, 30)),
+        (local(TODAY, 23), local(TOMORROW, 0)),
+    ],
+)
+def test_next_wakeup(now: datetime, wakeup: datetime):
+    assert scheduler().next_wakeup(now) == wakeup
+
+
+def test_sleep_duration_is_bounded():
+    refresh_scheduler: RefreshScheduler = scheduler()
+    assert refresh_scheduler.sleep_duration(local(TODAY, 12)) == MAX_SLEEP
+    assert refresh_scheduler.sleep_duration(local(TODAY, 20, 14)) == 60.0
+    assert refresh_scheduler.sleep_duration(local(TODAY, 20, 30)) == 0.0
+
+
+@pytest.mark.parametrize("day", [date(2024, 3, 31), date(2024, 10, 27)])
+def test_rollover_on_daylight_saving_time_days(day: date):
+    refresh_scheduler: RefreshScheduler = scheduler()
+    assert refresh_scheduler.rollover(local(day, 0)) is None
+    # NOTE: Days that last 23 or 25 hours still roll over at midnight
+    now: datetime = local(day, 23, 58)
+    assert refresh_scheduler.sleep_duration(now) == 120.0
+    assert refresh_scheduler.rollover(now) is None
+    assert refresh_scheduler.rollover(now + timedelta(minutes=2)) == day
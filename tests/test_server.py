@@ -0,0 +1,80 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Iterator
+
+import pytest
+
+from luz_metronomo import server as server_module
+from luz_metronomo.server import Faults, StandInServer, TokenBucket
+
+QUERY: str = "?start_date=2024-03-01T00:00:00&end_date=2024-03-01T23:59:00&time_trunc=hour"
+
+
+class Clock:
+    def __init__(self):
+        # NOTE: Buckets are created at the actual time, which must not be ahead of the clock
+        self.now: float = time.monotonic() + 1.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(server_module.time, "monotonic", clock)
+    return clock
+
+
+def take_all(bucket: TokenBucket, amount: int) -> list[bool]:
+    return [bucket.take() for _ in range(amount)]
+
+
+def test_bucket_allows_bursts_of_rate_requests(clock: Clock):
+    bucket = TokenBucket(3.0)
+    assert take_all(bucket, 4) == [True, True, True, False]
+    clock.now += 0.5
+    assert take_all(bucket, 2) == [True, False]
+    # NOTE: Idle time doesn't let bursts grow past the rate
+    clock.now += 60.0
+    assert take_all(bucket, 4) == [True, True, True, False]
+
+
+@pytest.mark.parametrize("rate, wait", [(0.5, 2.0), (0.1, 10.0)])
+def test_bucket_below_one_request_per_second(clock: Clock, rate: float, wait: float):
+    bucket = TokenBucket(rate)
+    assert take_all(bucket, 2) == [True, False]
+    clock.now += wait / 2
+    assert bucket.take() is False
+    clock.now += wait / 2
+    assert take_all(bucket, 2) == [True, False]
+    clock.now += 10 * wait
+    assert take_all(bucket, 2) == [True, False]
+
+
+def test_bucket_of_zero_rate(clock: Clock):
+    bucket = TokenBucket(0.0)
+    assert bucket.take() is True
+    clock.now += 3600.0
+    assert bucket.take() is False
+
+
+@pytest.fixture
+def throttled_server() -> Iterator[StandInServer]:
+    server = StandInServer(("127.0.0.1", 0), Faults(throttle_rate=0.5))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_server_throttles_requests(throttled_server: StandInServer):
+    with urllib.request.urlopen(throttled_server.url + QUERY, timeout=10) as response:
+        assert response.status == 200
+    with pytest.raises(urllib.error.HTTPError) as e:
+        urllib.request.urlopen(throttled_server.url + QUERY, timeout=10)
+    assert e.value.code == 429
+    assert e.value.headers["Retry-After"] == "1"
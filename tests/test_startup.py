@@ -0,0 +1,118 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from luz_metronomo.util.startup import (
+    HEADLESS_FORBIDDEN_MODULES,
+    STARTUP_BUDGETS,
+    STARTUP_MODULES,
+    StartupProfile,
+    check_startup_budget,
+    parse_import_times,
+    profile_startup,
+)
+
+ROOT: Path = Path(__file__).resolve().parent.parent
+
+HEADLESS_COMMANDS: dict[str, list[str]] = {
+    "export": ["export", "--date-from", "2024-03-01", "--date-to", "2024-03-02", "-o", "-"],
+    "stats": ["stats", "--date-from", "2024-03-01", "--date-to", "2024-03-02", "--json"],
+    "plan": ["plan", "--date-from", "2024-03-01", "-l", "name=dishwasher,duration=2,power=1.8"],
+}
+
+# NOTE: Runs a command against the stand-in server, and writes the modules it imported
+RUN_COMMAND: str = """
+import json
+import sys
+import threading
+
+from luz_metronomo.server import Faults, StandInServer
+
+server = StandInServer(("127.0.0.1", 0), Faults())
+threading.Thread(target=server.serve_forever, daemon=True).start()
+with open(sys.argv[1], "w") as f:
+    json.dump({"api": {"url": server.url, "cache": {"enable": False}}, "store": {"enable": False}}, f)
+
+from luz_metronomo.__main__ import main
+
+status = main(["luz-metronomo", "-c", sys.argv[1], *sys.argv[3:]])
+with open(sys.argv[2], "w") as f:
+    json.dump({"status": status, "modules": sorted(sys.modules)}, f)
+"""
+
+
+@pytest.fixture(autouse=True)
+def python_path(monkeypatch: pytest.MonkeyPatch):
+    # NOTE: Profiles are taken in fresh interpreters, which must find the modules of the tree
+    monkeypatch.setenv("PYTHONPATH", str(ROOT))
+
+
+@pytest.mark.parametrize("command", list(STARTUP_MODULES))
+def test_startup_within_budget(command: str | None):
+    profile: StartupProfile = profile_startup(STARTUP_MODULES[command])
+    assert profile.import_times
+    assert check_startup_budget(command, profile) == []
+
+
+@pytest.mark.parametrize("command", list(HEADLESS_COMMANDS))
+def test_headless_command_never_imports_the_user_interface(command: str, tmp_path: Path):
+    path_configuration: Path = tmp_path / "configuration.json"
+    path_result: Path = tmp_path / "result.json"
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            RUN_COMMAND,
+            str(path_configuration),
+            str(path_result),
+            *HEADLESS_COMMANDS[command],
+        ],
+        capture_output=True,
+        check=True,
+        cwd=tmp_path,
+        timeout=60,
+    )
+    result = json.loads(path_result.read_text())
+    assert result["status"] == 0
+    assert [
+        module
+        for module in result["modules"]
+        if module.split(".", 1)[0] in HEADLESS_FORBIDDEN_MODULES
+    ] == []
+
+
+def test_budget_violations():
+    profile = StartupProfile(
+        import_times=parse_import_times(
+            [
+                "import time: self [us] | cumulative | imported package",
+                "import time:    700000 |     700000 | luz_metronomo.export",
+            ]
+        ),
+        modules=["luz_metronomo.export", "rich", "rich.console"],
+    )
+    assert check_startup_budget("export", profile) == [
+        f"import time 700.0ms over budget ({STARTUP_BUDGETS['export'].import_time / 1000:.1f}ms)",
+        "headless command imports rich",
+        "headless command imports rich.console",
+    ]
+    # NOTE: The user interface may import anything
+    assert check_startup_budget(None, profile) == []
+
+
+def test_parse_import_times():
+    import_times = parse_import_times(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   _io",
+            "import time:        80 |        200 | io",
+            "unrelated line",
+        ]
+    )
+    assert [
+        (import_time.module, import_time.self_time, import_time.cumulative_time, import_time.depth)
+        for import_time in import_times
+    ] == [("_io", 120, 120, 1), ("io", 80, 200, 0)]
@@ -0,0 +1,242 @@
+import math
+import random
+import statistics
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.price_point import PricePoint
+from luz_metronomo.entity.statistics_grouping import StatisticsGrouping
+from luz_metronomo.entity.tariff_period import TariffPeriod
+from luz_metronomo.statistics import (
+    SUMMARY_COLUMNS,
+    Aggregate,
+    PercentileSketch,
+    PriceStatistics,
+    RunningStats,
+    summary,
+)
+from luz_metronomo.tariff import TariffCalendar
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+
+LAST_UPDATE = datetime(2024, 3, 1, 20, 15, tzinfo=TIMEZONE_SPAIN)
+
+
+def random_values(amount: int, seed: int = 0) -> list[float]:
+    generator = random.Random(seed)
+    # NOTE: Large offset and small spread, which naive variance formulas get wrong
+    return [round(1e6 + generator.uniform(0, 100), 2) for _ in range(amount)]
+
+
+def assert_stats(stats: RunningStats, values: list[float]):
+    assert stats.count == len(values)
+    assert stats.minimum == min(values)
+    assert stats.maximum == max(values)
+    assert stats.mean == pytest.approx(statistics.fmean(values), rel=1e-12)
+    assert stats.variance == pytest.approx(statistics.pvariance(values), rel=1e-6)
+
+
+def price_list(day_from: date, days: int, values: list[float] | None = None) -> PriceList:
+    """
+    Hourly list over the given (Spanish) days, whose values default to the hour of the points.
+    """
+    timestamp_from: int = int(datetime.combine(day_from, time(), TIMEZONE_SPAIN).timestamp())
+    timestamp_to: int = int(
+        datetime.combine(day_from + timedelta(days=days), time(), TIMEZONE_SPAIN).timestamp()
+    )
+    datetimes: list[datetime] = [
+        datetime.fromtimestamp(timestamp, TIMEZONE_SPAIN)
+        for timestamp in range(timestamp_from, timestamp_to, 3600)
+    ]
+    if values is None:
+        values = [float(the_datetime.hour) for the_datetime in datetimes]
+    return PriceList(
+        "test",
+        LAST_UPDATE,
+        [
+            PricePoint(value=value, datetime=the_datetime)
+            for the_datetime, value in zip(datetimes, values)
+        ],
+    )
+
+
+def test_running_stats_add():
+    values: list[float] = random_values(1000)
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    assert_stats(stats, values)
+    assert_stats(RunningStats.of(values), values)
+
+
+@pytest.mark.parametrize("cuts", [(0,), (1,), (500,), (999,), (1000,), (10, 20, 20, 700)])
+def test_running_stats_merge_of_partial_statistics(cuts: tuple[int, ...]):
+    values: list[float] = random_values(1000, seed=len(cuts))
+    bounds: list[int] = [0, *cuts, len(values)]
+    merged = RunningStats()
+    for start, end in zip(bounds, bounds[1:]):
+        merged.merge(RunningStats.of(values[start:end]))
+    assert_stats(merged, values)
+
+
+def test_running_stats_merge_empty():
+    stats: RunningStats = RunningStats.of([1.0, 2.0, 3.0])
+    stats.merge(RunningStats())
+    assert_stats(stats, [1.0, 2.0, 3.0])
+
+    empty = RunningStats()
+    empty.merge(RunningStats())
+    assert (empty.count, empty.variance, empty.stddev) == (0, 0.0, 0.0)
+    assert RunningStats.of([]) == RunningStats()
+
+
+def test_running_stats_single_value():
+    stats: RunningStats = RunningStats.of([42.5])
+    assert (stats.minimum, stats.mean, stats.maximum, stats.variance) == (42.5, 42.5, 42.5, 0.0)
+
+
+def nearest_rank(values: list[float], fraction: float) -> float:
+    return sorted(values)[max(1, math.ceil(fraction * len(values))) - 1]
+
+
+def test_sketch_quantiles():
+    values: list[float] = [round(value - 1e6, 2) for value in random_values(997)]
+    sketch = PercentileSketch()
+    sketch.add_values(values)
+    fractions: list[float] = [0.0, 0.01, 0.1, 0.5, 0.9, 0.99, 1.0]
+    assert sketch.quantiles(fractions) == [
+        pytest.approx(nearest_rank(values, fraction)) for fraction in fractions
+    ]
+
+
+def test_sketch_merge_of_partial_sketches():
+    values: list[float] = [round(value - 1e6, 2) for value in random_values(500)]
+    whole = PercentileSketch()
+    whole.add_values(values)
+    merged = PercentileSketch()
+    for start in range(0, len(values), 128):
+        part = PercentileSketch()
+        part.add_values(values[start : start + 128])
+        merged.merge(part)
+    assert merged.counts == whole.counts
+    merged.merge(PercentileSketch())
+    assert merged.quantiles([0.5]) == whole.quantiles([0.5])
+
+
+def test_sketch_empty_and_resolution():
+    assert PercentileSketch().quantiles([0.1, 0.9]) == [None, None]
+    with pytest.raises(ValueError):
+        PercentileSketch().merge(PercentileSketch(resolution=0.1))
+    sketch = PercentileSketch(resolution=0.5)
+    sketch.add_values([1.1, 1.2, 2.9])
+    assert sketch.quantiles([0.0, 1.0]) == [1.0, 3.0]
+
+
+def test_summary():
+    aggregate = Aggregate()
+    assert summary(aggregate) == dict.fromkeys(SUMMARY_COLUMNS) | {"count": 0}
+    aggregate.add_values([1.0, 2.0, 3.0, 4.0])
+    assert summary(aggregate) == {
+        "count": 4,
+        "min": 1.0,
+        "mean": 2.5,
+        "max": 4.0,
+        "stddev": pytest.approx(math.sqrt(1.25)),
+        "p10": 1.0,
+        "p50": 2.0,
+        "p90": 4.0,
+    }
+
+
+def assert_same_statistics(actual: PriceStatistics, expected: PriceStatistics):
+    for grouping in StatisticsGrouping:
+        actual_groups = list(actual.groups(grouping))
+        expected_groups = list(expected.groups(grouping))
+        assert [label for label, _ in actual_groups] == [label for label, _ in expected_groups]
+        for (_, actual_aggregate), (_, expected_aggregate) in zip(actual_groups, expected_groups):
+            assert actual_aggregate.stats.count == expected_aggregate.stats.count
+            assert actual_aggregate.stats.mean == pytest.approx(expected_aggregate.stats.mean)
+            assert actual_aggregate.stats.m2 == pytest.approx(expected_aggregate.stats.m2)
+            assert actual_aggregate.sketch.counts == expected_aggregate.sketch.counts
+
+
+def test_update_only_processes_appended_points():
+    whole: PriceList = price_list(date(2024, 2, 26), 10, random_values(240))
+    expected = PriceStatistics(TariffCalendar())
+    assert expected.update(whole) == 240
+    assert expected.update(whole) == 0
+
+    price_statistics = PriceStatistics(TariffCalendar())
+    # NOTE: Splits a day, whose aggregate is merged with the points of the rest of the day
+    assert price_statistics.update(whole[:100]) == 100
+    assert price_statistics.update(whole[:150]) == 50
+    assert price_statistics.update(whole) == 90
+    assert_same_statistics(price_statistics, expected)
+
+
+def test_update_starts_over_when_the_list_changes():
+    price_statistics = PriceStatistics(TariffCalendar())
+    price_statistics.update(price_list(date(2024, 3, 1), 2))
+    other: PriceList = price_list(date(2024, 3, 1), 2, [1.0] * 48)
+    assert price_statistics.update(other) == 48
+    assert price_statistics.overall.stats.count == 48
+    assert price_statistics.overall.stats.mean == 1.0
+    assert price_statistics.update(price_list(date(2024, 3, 10), 1)) == 24
+    assert list(dict(price_statistics.groups(StatisticsGrouping.Day))) == ["2024-03-10"]
+
+
+def test_add_chunks():
+    whole: PriceList = price_list(date(2024, 1, 29), 35, random_values(35 * 24))
+    expected = PriceStatistics(TariffCalendar())
+    expected.update(whole)
+    price_statistics = PriceStatistics(TariffCalendar())
+    for start in range(0, len(whole), 7 * 24 + 5):
+        price_statistics.add(whole[start : start + 7 * 24 + 5])
+    assert_same_statistics(price_statistics, expected)
+
+
+def test_groups():
+    price_statistics = PriceStatistics(TariffCalendar())
+    # NOTE: From Wednesday 2024-02-28 to Saturday 2024-03-02, over two weeks and two months
+    price_statistics.update(price_list(date(2024, 2, 28), 4))
+    groups = {grouping: dict(price_statistics.groups(grouping)) for grouping in StatisticsGrouping}
+    assert list(groups[StatisticsGrouping.Day]) == [
+        "2024-02-28",
+        "2024-02-29",
+        "2024-03-01",
+        "2024-03-02",
+    ]
+    assert list(groups[StatisticsGrouping.Week]) == ["2024-W09"]
+    assert list(groups[StatisticsGrouping.Month]) == ["2024-02", "2024-03"]
+    assert groups[StatisticsGrouping.Month]["2024-02"].stats.count == 48
+    assert list(groups[StatisticsGrouping.Period]) == ["valle", "llano", "punta"]
+    # NOTE: Workdays have 8 hours of “valle”, 6 of “llano” and 8 of “punta”, Saturday is “valle”
+    assert [aggregate.stats.count for aggregate in groups[StatisticsGrouping.Period].values()] == [
+        3 * 8 + 24,
+        3 * 8,
+        3 * 8,
+    ]
+    assert price_statistics.periods[TariffPeriod.Punta].stats.minimum == 10.0
+
+
+@pytest.mark.parametrize("day, hours", [(date(2024, 3, 31), 23), (date(2024, 10, 27), 25)])
+def test_daylight_saving_time_days(day: date, hours: int):
+    price_statistics = PriceStatistics(TariffCalendar())
+    price_statistics.update(price_list(day - timedelta(days=1), 3))
+    days: dict[str, Aggregate] = dict(price_statistics.groups(StatisticsGrouping.Day))
+    assert [aggregate.stats.count for aggregate in days.values()] == [24, hours, 24]
+    aggregate: Aggregate = days[day.isoformat()]
+    # NOTE: Values are the local hours, 02:00 is skipped or repeated
+    local_hours: list[float] = [float(hour) for hour in range(24) if hour != 2 or hours != 23]
+    if hours == 25:
+        local_hours.insert(2, 2.0)
+    assert_stats(aggregate.stats, local_hours)
+    assert price_statistics.overall.stats.count == 48 + hours
+
+
+def test_empty_list():
+    price_statistics = PriceStatistics(TariffCalendar())
+    assert price_statistics.update(PriceList("test", LAST_UPDATE)) == 0
+    assert price_statistics.overall.stats.count == 0
+    assert all(list(price_statistics.groups(grouping)) == [] for grouping in StatisticsGrouping)
@@ -0,0 +1,199 @@
+import sqlite3
+import threading
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+import pytest
+
+from luz_metronomo.api import decode_price_lists
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.store import SCHEMA_VERSION, PriceStore, StoreError, complete_days
+from luz_metronomo.util.payload import synthesise_raw_payload
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+
+LAST_UPDATE = datetime(2024, 3, 1, 20, 15, tzinfo=TIMEZONE_SPAIN)
+
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time(), TIMEZONE_SPAIN)
+
+
+def price_lists(
+    day_from: date,
+    day_to: date,
+    interval: timedelta = timedelta(hours=1),
+    last_update: datetime = LAST_UPDATE,
+) -> list[PriceList]:
+    """
+    Lists over the given (inclusive) days, as returned by the API: along with the point that
+    starts right after them.
+    """
+    return decode_price_lists(
+        synthesise_raw_payload(
+            day_start(day_from),
+            day_start(day_to).replace(hour=23, minute=59),
+            interval,
+            last_update,
+        ),
+        int(interval.total_seconds()),
+    )
+
+
+@pytest.fixture
+def store(tmp_path: Path):
+    store = PriceStore(tmp_path / "store" / "prices.sqlite3", "peninsular")
+    yield store
+    store.close()
+
+
+def test_read_what_was_ingested(store: PriceStore):
+    ingested: list[PriceList] = price_lists(date(2024, 3, 1), date(2024, 3, 2))
+    assert store.ingest(ingested) == sum(len(price_list) for price_list in ingested)
+
+    read: list[PriceList] = store.read(
+        day_start(date(2024, 3, 1)), day_start(date(2024, 3, 3)), 3600
+    )
+    assert [price_list.title for price_list in read] == [
+        price_list.title for price_list in ingested
+    ]
+    for price_list_read, price_list in zip(read, ingested):
+        assert price_list_read == price_list
+        assert price_list_read.interval == 3600
+
+
+def test_read_range_is_inclusive(store: PriceStore):
+    store.ingest(price_lists(date(2024, 3, 1), date(2024, 3, 1)))
+    date_from: datetime = day_start(date(2024, 3, 1)).replace(hour=6)
+    for date_to, amount_points in (
+        (date_from, 1),
+        (date_from.replace(hour=7), 2),
+        (date_from.replace(hour=7, minute=59), 2),
+    ):
+        read: list[PriceList] = store.read(date_from, date_to, 3600)
+        assert [len(price_list) for price_list in read] == [amount_points] * 2
+    assert store.read(day_start(date(2024, 3, 5)), day_start(date(2024, 3, 6)), 3600) == []
+
+
+def test_ingesting_again_changes_nothing(store: PriceStore):
+    store.ingest(price_lists(date(2024, 3, 1), date(2024, 3, 1)))
+    assert store.ingest(price_lists(date(2024, 3, 1), date(2024, 3, 1))) == 0
+    assert store.ingest([]) == 0
+
+
+def test_ingesting_updates_changed_points(store: PriceStore):
+    store.ingest(price_lists(date(2024, 3, 1), date(2024, 3, 1)))
+    (first, *_) = price_lists(
+        date(2024, 3, 1), date(2024, 3, 1), last_update=LAST_UPDATE.replace(hour=21)
+    )
+    values: list[float] = list(first.values)
+    values[3] += 1.0
+    changed = PriceList.from_columns(
+        first.title, first.last_update, first.timestamps, first.offsets, values, first.interval
+    )
+    assert store.ingest([changed]) == 1
+
+    (read, *_) = store.read(day_start(date(2024, 3, 1)), day_start(date(2024, 3, 2)), 3600)
+    assert read.values[3] == values[3]
+    assert read.last_update == changed.last_update
+    # NOTE: The last update of a list never goes back
+    store.ingest(price_lists(date(2024, 3, 1), date(2024, 3, 1)))
+    (read, *_) = store.read(day_start(date(2024, 3, 1)), day_start(date(2024, 3, 2)), 3600)
+    assert read.last_update == changed.last_update
+
+
+def test_series_are_kept_apart(store: PriceStore):
+    store.ingest(price_lists(date(2024, 3, 1), date(2024, 3, 1)))
+    store.ingest(price_lists(date(2024, 3, 1), date(2024, 3, 1), timedelta(minutes=15)))
+    date_from, date_to = day_start(date(2024, 3, 1)), day_start(date(2024, 3, 1)).replace(hour=23)
+    assert {len(price_list) for price_list in store.read(date_from, date_to, 3600)} == {24}
+    assert {len(price_list) for price_list in store.read(date_from, date_to, 900)} == {93}
+
+    other = PriceStore(store.path, "canarias")
+    try:
+        assert other.read(date_from, date_to, 3600) == []
+        assert other.missing_days(date(2024, 3, 1), date(2024, 3, 1), 3600) == [date(2024, 3, 1)]
+    finally:
+        other.close()
+
+
+def test_missing_days(store: PriceStore):
+    assert store.missing_days(date(2024, 3, 1), date(2024, 3, 3), 3600) == [
+        date(2024, 3, 1),
+        date(2024, 3, 2),
+        date(2024, 3, 3),
+    ]
+    store.ingest(price_lists(date(2024, 3, 1), date(2024, 3, 1)))
+    (partial, *_) = price_lists(date(2024, 3, 3), date(2024, 3, 3))
+    store.ingest([partial[:12]])
+    assert store.missing_days(date(2024, 3, 1), date(2024, 3, 3), 3600) == [
+        date(2024, 3, 2),
+        date(2024, 3, 3),
+    ]
+    assert store.missing_days(date(2024, 3, 1), date(2024, 3, 3), 900) == [
+        date(2024, 3, 1),
+        date(2024, 3, 2),
+        date(2024, 3, 3),
+    ]
+    assert store.missing_days(date(2024, 3, 3), date(2024, 3, 1), 3600) == []
+
+
+@pytest.mark.parametrize(
+    "day, interval, amount_points",
+    [
+        (date(2024, 3, 31), timedelta(hours=1), 23),
+        (date(2024, 10, 27), timedelta(hours=1), 25),
+        (date(2025, 10, 26), timedelta(minutes=15), 100),
+    ],
+)
+def test_daylight_saving_time_days(
+    store: PriceStore, day: date, interval: timedelta, amount_points: int
+):
+    (price_list, *_) = price_lists(day, day, interval)
+    # NOTE: The point that starts the next day doesn't complete it
+    assert complete_days(price_list) == [day]
+    assert complete_days(price_list[1:]) == []
+
+    store.ingest(price_lists(day, day, interval))
+    seconds: int = int(interval.total_seconds())
+    assert store.missing_days(day, day + timedelta(days=1), seconds) == [day + timedelta(days=1)]
+    read: list[PriceList] = store.read(
+        day_start(day), day_start(day + timedelta(days=1)) - timedelta(seconds=1), seconds
+    )
+    assert {len(price_list) for price_list in read} == {amount_points}
+
+
+def test_concurrent_use(store: PriceStore):
+    errors: list[Exception] = []
+
+    def use(day: date):
+        try:
+            store.ingest(price_lists(day, day))
+            store.read(day_start(day), day_start(day).replace(hour=23), 3600)
+        except Exception as e:
+            errors.append(e)
+
+    threads: list[threading.Thread] = [
+        threading.Thread(target=use, args=(date(2024, 3, 1) + timedelta(days=days),))
+        for days in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert store.missing_days(date(2024, 3, 1), date(2024, 3, 8), 3600) == []
+
+
+def test_newer_schema_is_refused(tmp_path: Path):
+    path: Path = tmp_path / "prices.sqlite3"
+    connection = sqlite3.connect(path)
+    connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    connection.close()
+    with pytest.raises(StoreError, match="Unsupported price store version"):
+        PriceStore(path, "peninsular").read(LAST_UPDATE, LAST_UPDATE, 3600)
+
+
+def test_unusable_path(tmp_path: Path):
+    (tmp_path / "file").write_text("")
+    with pytest.raises(StoreError, match="Unable to open"):
+        PriceStore(tmp_path / "file" / "prices.sqlite3", "peninsular").ingest([])
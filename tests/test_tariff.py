@@ -0,0 +1,113 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from luz_metronomo.entity.day_type import DayType
+from luz_metronomo.entity.tariff_period import TariffPeriod
+from luz_metronomo.tariff import TariffCalendar
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+
+# NOTE: A Tuesday, a Saturday, and Epiphany (a national holiday, on a Monday in 2025)
+WORKDAY = date(2024, 3, 5)
+WEEKEND = date(2024, 3, 9)
+NATIONAL_HOLIDAY = date(2025, 1, 6)
+
+
+def reference_period(calendar: TariffCalendar, the_datetime: datetime) -> TariffPeriod:
+    """
+    Period that applies at the given local datetime, straight from the definition of the tariff.
+    """
+    if calendar.day_type(the_datetime.date()) == DayType.Holiday:
+        return TariffPeriod.Valle
+    hour: int = the_datetime.hour
+    if hour < 8:
+        return TariffPeriod.Valle
+    if 10 <= hour < 14 or 18 <= hour < 22:
+        return TariffPeriod.Punta
+    return TariffPeriod.Llano
+
+
+@pytest.mark.parametrize(
+    "the_time, period",
+    [
+        (time(0, 0), TariffPeriod.Valle),
+        (time(7, 59), TariffPeriod.Valle),
+        (time(8, 0), TariffPeriod.Llano),
+        (time(9, 45), TariffPeriod.Llano),
+        (time(10, 0), TariffPeriod.Punta),
+        (time(13, 59), TariffPeriod.Punta),
+        (time(14, 0), TariffPeriod.Llano),
+        (time(18, 0), TariffPeriod.Punta),
+        (time(21, 59), TariffPeriod.Punta),
+        (time(22, 0), TariffPeriod.Llano),
+        (time(23, 59), TariffPeriod.Llano),
+    ],
+)
+def test_workday_periods(the_time: time, period: TariffPeriod):
+    assert TariffCalendar().period_at(datetime.combine(WORKDAY, the_time)) == period
+
+
+@pytest.mark.parametrize("day", [WEEKEND, NATIONAL_HOLIDAY, date(2024, 12, 25)])
+def test_holidays_are_valle_all_day(day: date):
+    calendar = TariffCalendar()
+    assert calendar.day_type(day) == DayType.Holiday
+    assert {
+        calendar.period_at(datetime.combine(day, time(hour, minute)))
+        for hour in range(24)
+        for minute in (0, 15, 30, 45)
+    } == {TariffPeriod.Valle}
+
+
+def test_holidays():
+    assert TariffCalendar().day_type(WORKDAY) == DayType.Workday
+    assert TariffCalendar(holidays=[WORKDAY]).day_type(WORKDAY) == DayType.Holiday
+    assert TariffCalendar(national_holidays=False).day_type(NATIONAL_HOLIDAY) == DayType.Workday
+    assert TariffCalendar(national_holidays=False).day_type(WEEKEND) == DayType.Holiday
+
+
+def test_classify_matches_the_definition_over_a_year():
+    calendar = TariffCalendar(holidays=[date(2024, 5, 15)])
+    # NOTE: Every quarter-hour of 2024, which includes both daylight saving time changes
+    timestamp_from: int = int(datetime(2024, 1, 1, tzinfo=TIMEZONE_SPAIN).timestamp())
+    timestamp_to: int = int(datetime(2025, 1, 1, tzinfo=TIMEZONE_SPAIN).timestamp())
+    datetimes: list[datetime] = [
+        datetime.fromtimestamp(timestamp, TIMEZONE_SPAIN)
+        for timestamp in range(timestamp_from, timestamp_to, 900)
+    ]
+    periods = calendar.classify(
+        (int(the_datetime.timestamp()) for the_datetime in datetimes),
+        (int(the_datetime.utcoffset().total_seconds()) for the_datetime in datetimes),
+    )
+    assert len(periods) == len(datetimes)
+    assert [TariffPeriod(period) for period in periods] == [
+        reference_period(calendar, the_datetime) for the_datetime in datetimes
+    ]
+    assert [calendar.period_at(the_datetime) for the_datetime in datetimes[::7]] == [
+        TariffPeriod(period) for period in periods[::7]
+    ]
+
+
+@pytest.mark.parametrize("day, hours", [(date(2024, 3, 31), 23), (date(2024, 10, 27), 25)])
+def test_classify_days_after_daylight_saving_time_changes(day: date, hours: int):
+    # NOTE: Clocks change on Sundays, the following Monday is a workday in the new offset
+    calendar = TariffCalendar()
+    date_from: datetime = datetime.combine(day, time(), TIMEZONE_SPAIN)
+    date_to: datetime = datetime.combine(day + timedelta(days=2), time(), TIMEZONE_SPAIN)
+    datetimes: list[datetime] = [
+        datetime.fromtimestamp(timestamp, TIMEZONE_SPAIN)
+        for timestamp in range(int(date_from.timestamp()), int(date_to.timestamp()), 3600)
+    ]
+    assert len(datetimes) == hours + 24
+    periods = calendar.classify(
+        (int(the_datetime.timestamp()) for the_datetime in datetimes),
+        (int(the_datetime.utcoffset().total_seconds()) for the_datetime in datetimes),
+    )
+    assert set(periods[:hours]) == {TariffPeriod.Valle}
+    assert [TariffPeriod(period) for period in periods[hours:]] == [
+        reference_period(calendar, the_datetime) for the_datetime in datetimes[hours:]
+    ]
+    assert TariffPeriod(periods[hours + 8]) == TariffPeriod.Llano
+
+
+def test_classify_nothing():
+    assert len(TariffCalendar().classify([], [])) == 0
@@ -0,0 +1,238 @@
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable, Iterator
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import pytest
+from textual.app import App, ComposeResult
+from textual.pilot import Pilot
+
+from luz_metronomo import textual as textual_module
+from luz_metronomo.configuration import Configuration
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.price_point import PricePoint
+from luz_metronomo.server import Faults, StandInServer
+from luz_metronomo.tariff import TariffCalendar
+from luz_metronomo.textual import (
+    TARIFF_PERIOD_TEXTS,
+    LuzMetronomoApp,
+    PriceListTable,
+    datetime_now_as_ymd,
+)
+from luz_metronomo.util.api import IncompleteFetchError
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+
+
+@pytest.fixture
+def server() -> Iterator[StandInServer]:
+    server = StandInServer(("127.0.0.1", 0), Faults())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def configuration(server: StandInServer, **data: Any) -> Configuration:
+    return Configuration.model_validate(
+        {"api": {"url": server.url, "cache": {"enable": False}}, "store": {"enable": False}} | data
+    )
+
+
+def run_app(app: LuzMetronomoApp, test: Callable[[Pilot], Awaitable[None]]):
+    async def run():
+        async with app.run_test() as pilot:
+            await pilot.pause()
+            await app.workers.wait_for_complete()
+            await test(pilot)
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("date_from", [None, datetime(2024, 3, 2)])
+def test_price_lists_are_shown_on_startup(server: StandInServer, date_from: datetime | None):
+    app = LuzMetronomoApp(configuration(server), date_from=date_from, days=2)
+
+    async def test(pilot: Pilot):
+        day: date = date_from.date() if date_from is not None else datetime_now_as_ymd().date()
+        assert app.price_lists and all(len(price_list) == 48 for price_list in app.price_lists)
+        assert all(
+            price_list.price_points[0].datetime.date() == day for price_list in app.price_lists
+        )
+
+    run_app(app, test)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        IncompleteFetchError([(datetime(2024, 3, 2), datetime(2024, 3, 2, 23, 59))]),
+        ConnectionResetError(),
+        ValueError("Undecodable response"),
+    ],
+)
+def test_poll_errors_keep_the_refreshes_going(
+    server: StandInServer, monkeypatch: pytest.MonkeyPatch, error: Exception
+):
+    async def get_price_lists_async(*args, **kwargs):
+        raise error
+
+    app = LuzMetronomoApp(configuration(server))
+
+    async def test(pilot: Pilot):
+        refresh_timer = app._refresh_timer
+        monkeypatch.setattr(textual_module, "get_price_lists_async", get_price_lists_async)
+        for attempts in (1, 2):
+            app.poll_publication(date(2024, 3, 2))
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            assert app.is_running
+            # NOTE: The failed poll is retried later on, like unpublished prices are
+            assert app._refresh_scheduler._attempts == attempts
+            assert app._refresh_timer is not None and app._refresh_timer is not refresh_timer
+            refresh_timer = app._refresh_timer
+
+    run_app(app, test)
+
+
+def test_tomorrow_is_only_prefetched_once_published(server: StandInServer, tmp_path: Path):
+    app = LuzMetronomoApp(
+        configuration(
+            server,
+            api={"url": server.url, "cache": {"disk-size": 0, "path": str(tmp_path)}},
+            **{"user-interface": {"prefetch-days": 1}},
+        )
+    )
+
+    async def test(pilot: Pilot):
+        assert app._prefetcher is not None
+        scheduled: list[list[tuple[datetime, datetime]]] = []
+        app._prefetcher.schedule = lambda date_ranges: scheduled.append(list(date_ranges))
+        # NOTE: A range far from the following day, which neighbours don't cover
+        date_from: datetime = datetime_now_as_ymd() - timedelta(days=10)
+        tomorrow: datetime = datetime_now_as_ymd() + timedelta(days=1)
+
+        app.prefetch_price_lists(date_from, 1)
+        app._refresh_scheduler.record_poll(datetime.now(TIMEZONE_SPAIN), tomorrow.date(), True)
+        app.prefetch_price_lists(date_from, 1)
+        neighbours: list[date] = [(date_from + timedelta(days=offset)).date() for offset in (1, -1)]
+        assert [
+            [date_range[0].date() for date_range in date_ranges] for date_ranges in scheduled
+        ] == [neighbours, neighbours + [tomorrow.date()]]
+
+    run_app(app, test)
+
+
+class TableApp(App):
+    def __init__(self, table: PriceListTable):
+        super().__init__()
+        self.table: PriceListTable = table
+
+    def compose(self) -> ComposeResult:
+        yield self.table
+
+
+def hourly_list(date_from: datetime, values: list[float]) -> PriceList:
+    return PriceList(
+        "PVPC",
+        date_from - timedelta(hours=4),
+        [PricePoint(value, date_from + timedelta(hours=hour)) for hour, value in enumerate(values)],
+    )
+
+
+def run_table(table: PriceListTable, test: Callable[[Pilot], Awaitable[None]]):
+    async def run():
+        async with TableApp(table).run_test(size=(60, 10)) as pilot:
+            await pilot.pause()
+            await test(pilot)
+
+    asyncio.run(run())
+
+
+def line(table: PriceListTable, y: int) -> list[str]:
+    return table.render_line(y).text.split()
+
+
+def test_price_list_table_rows():
+    date_from: datetime = datetime(2024, 3, 1, tzinfo=TIMEZONE_SPAIN)
+    calendar = TariffCalendar()
+    table = PriceListTable(calendar, hourly_list(date_from, [0.1 * hour for hour in range(24)]))
+
+    async def test(pilot: Pilot):
+        assert line(table, 0) == ["period", "time", "rate"]
+        for row in range(8):
+            the_datetime: datetime = date_from + timedelta(hours=row)
+            assert line(table, row + 1) == [
+                TARIFF_PERIOD_TEXTS[calendar.period_at(the_datetime)].plain,
+                the_datetime.strftime("%H:%M"),
+                f"{0.1 * row:.2f}",
+            ]
+
+        table.sort("rate", reverse=True)
+        await pilot.pause()
+        assert line(table, 1)[1:] == ["23:00", "2.30"]
+        table.move_cursor(23)
+        await pilot.pause()
+        assert table.cursor_row == 23 and table.scroll_offset.y > 0
+        assert line(table, table.size.height - 1)[1:] == ["00:00", "0.00"]
+
+    run_table(table, test)
+
+
+@pytest.mark.parametrize("column", PriceListTable.COLUMNS)
+@pytest.mark.parametrize("reverse", [False, True])
+def test_price_list_table_row_of(column: str, reverse: bool):
+    date_from: datetime = datetime(2024, 3, 1, tzinfo=TIMEZONE_SPAIN)
+    # NOTE: Lots of equal rates and periods, whose points are sorted by index
+    values: list[float] = [float(hour % 3) for hour in range(48)]
+    table = PriceListTable(TariffCalendar(), hourly_list(date_from, values))
+
+    async def test(pilot: Pilot):
+        table.sort(column, reverse)
+        rows: list[int] = [table.row_of(index) for index in range(len(values))]
+        assert sorted(rows) == list(range(len(values)))
+        assert [table.index_at(row) for row in rows] == list(range(len(values)))
+        if column == "rate":
+            assert [values[table.index_at(row)] for row in range(3)] == (
+                [2.0] * 3 if reverse else [0.0] * 3
+            )
+            assert [table.index_at(row) for row in range(3)] == (
+                [47, 44, 41] if reverse else [0, 3, 6]
+            )
+
+    run_table(table, test)
+
+
+def test_price_list_table_updates_invalidate_the_caches():
+    date_from: datetime = datetime(2024, 3, 1, tzinfo=TIMEZONE_SPAIN)
+    table = PriceListTable(TariffCalendar(), hourly_list(date_from, [1.0, 3.0, 2.0]))
+
+    async def test(pilot: Pilot):
+        table.sort("rate")
+        await pilot.pause()
+        assert [line(table, row)[1:] for row in (1, 2, 3)] == [
+            ["00:00", "1.00"],
+            ["02:00", "2.00"],
+            ["01:00", "3.00"],
+        ]
+
+        # NOTE: The rows, their order and the format of the times all change along with the list
+        table.update_price_list(hourly_list(date_from, [5.0, 4.0, 6.0] + [0.5] * 22))
+        await pilot.pause()
+        assert [line(table, row)[1:] for row in (1, 2, 3)] == [
+            ["2024-03-01", "03:00", "0.50"],
+            ["2024-03-01", "04:00", "0.50"],
+            ["2024-03-01", "05:00", "0.50"],
+        ]
+        assert table.row_of(1) == 22 and table.row_of(0) == 23 and table.row_of(2) == 24
+        assert line(table, 4)[1:] == ["2024-03-01", "06:00", "0.50"]
+        table.sort("time")
+        await pilot.pause()
+        assert [line(table, row)[1:] for row in (1, 2, 3)] == [
+            ["2024-03-01", "00:00", "5.00"],
+            ["2024-03-01", "01:00", "4.00"],
+            ["2024-03-01", "02:00", "6.00"],
+        ]
+
+    run_table(table, test)
@@ -0,0 +1,291 @@
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from luz_metronomo import cache as cache_module
+from luz_metronomo.cache import PriceCache
+from luz_metronomo.configuration import Api as ApiConfig
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.price_point import PricePoint
+from luz_metronomo.metrics import METRICS
+from luz_metronomo.server import Faults, StandInServer
+from luz_metronomo.util.api import (
+    _cache_key,
+    get_cached_price_lists,
+    get_price_lists,
+    get_price_lists_async,
+    merge_price_lists,
+    split_date_range,
+)
+from luz_metronomo.util.configuration import api_object, async_api_object
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN, spanish_day_range
+
+
+class Server(StandInServer):
+    """
+    Stand-in server that counts the requests it responds to, and whose prices may be yet to be
+    published.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Faults())
+        self.published: bool = True
+        self.requests: int = 0
+
+    def response_body(self, fields: dict[str, list[str]]) -> tuple[bytes, datetime]:
+        self.requests += 1
+        body, last_modified = super().response_body(fields)
+        if self.published:
+            return body, last_modified
+        payload: dict[str, Any] = json.loads(body)
+        for item in payload["included"]:
+            item["attributes"]["values"] = []
+        return json.dumps(payload).encode("utf-8"), last_modified
+
+
+@pytest.fixture
+def server() -> Iterator[Server]:
+    server = Server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> PriceCache:
+    return PriceCache(memory_size=8, disk_size=8, ttl=900.0, path=tmp_path / "cache")
+
+
+def local(day: int, hour: int = 0, minute: int = 0) -> datetime:
+    return datetime(2024, 3, day, hour, minute, tzinfo=TIMEZONE_SPAIN)
+
+
+def hourly(
+    title: str, last_update: datetime, date_from: datetime, hours: int, value: float
+) -> PriceList:
+    return PriceList(
+        title,
+        last_update,
+        [PricePoint(value, date_from + timedelta(hours=hour)) for hour in range(hours)],
+    )
+
+
+def api_config(server: Server) -> ApiConfig:
+    return ApiConfig.model_validate({"url": server.url})
+
+
+def fetch(server: Server, cache: PriceCache, date_from: datetime, date_to: datetime):
+    api = api_object(api_config(server))
+    try:
+        return list(get_price_lists(api_config(server), date_from, date_to, api=api, cache=cache))
+    finally:
+        api.close()
+
+
+def fetch_async(
+    server: Server, cache: PriceCache, date_from: datetime, date_to: datetime
+) -> list[PriceList]:
+    async def run() -> list[PriceList]:
+        api = async_api_object(api_config(server))
+        try:
+            return await get_price_lists_async(
+                api_config(server), date_from, date_to, api=api, cache=cache
+            )
+        finally:
+            await api.close()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("fetch", [fetch, fetch_async])
+def test_unpublished_prices_are_not_cached(server: Server, cache: PriceCache, fetch):
+    date_from, date_to = spanish_day_range(date(2024, 3, 2), date(2024, 3, 2))
+    server.published = False
+    for requests in (1, 2):
+        price_lists: list[PriceList] = fetch(server, cache, date_from, date_to)
+        assert price_lists and not any(len(price_list) for price_list in price_lists)
+        assert server.requests == requests
+    cache_key = _cache_key(api_object(api_config(server)), date_from, date_to)
+    assert cache.get_stale(cache_key) is None
+    assert (
+        get_cached_price_lists(
+            api_config(server), date_from, date_to, api_object(api_config(server)), cache
+        )
+        is None
+    )
+
+    server.published = True
+    assert all(len(price_list) == 24 for price_list in fetch(server, cache, date_from, date_to))
+    assert all(len(price_list) == 24 for price_list in fetch(server, cache, date_from, date_to))
+    assert server.requests == 3
+    cached = get_cached_price_lists(
+        api_config(server), date_from, date_to, api_object(api_config(server)), cache
+    )
+    assert cached is not None and all(len(price_list) == 24 for price_list in cached)
+
+
+def test_cached_lists_without_prices_are_not_served(server: Server, cache: PriceCache):
+    date_from, date_to = spanish_day_range(date(2024, 3, 2), date(2024, 3, 2))
+    api = api_object(api_config(server))
+    # NOTE: E.g. entries written by former versions
+    empty_lists: list[PriceList] = [PriceList("PVPC", date_from), PriceList("Mercado", date_from)]
+    cache.set(_cache_key(api, date_from, date_to), empty_lists)
+    assert get_cached_price_lists(api_config(server), date_from, date_to, api, cache) is None
+
+
+@pytest.mark.parametrize(
+    "date_from, date_to, chunk, date_ranges",
+    [
+        (local(1), local(1, 23, 59), timedelta(days=1), [(local(1), local(1, 23, 59))]),
+        (
+            local(1),
+            local(3, 23, 59),
+            timedelta(days=2),
+            [(local(1), local(2, 23, 59)), (local(3), local(3, 23, 59))],
+        ),
+        (
+            local(1),
+            local(2, 12),
+            timedelta(days=1),
+            [(local(1), local(1, 23, 59)), (local(2), local(2, 12))],
+        ),
+        (local(1, 12), local(1, 12), timedelta(days=1), [(local(1, 12), local(1, 12))]),
+        (local(2), local(1, 23, 59), timedelta(days=1), []),
+    ],
+)
+def test_split_date_range(
+    date_from: datetime,
+    date_to: datetime,
+    chunk: timedelta,
+    date_ranges: list[tuple[datetime, datetime]],
+):
+    assert list(split_date_range(date_from, date_to, chunk)) == date_ranges
+
+
+def test_merge_price_lists_removes_the_duplicates_at_chunk_boundaries():
+    # NOTE: Each chunk also holds the point that starts right after it
+    first_chunk: list[PriceList] = [
+        hourly("PVPC", local(1, 20), local(1), 25, 1.0),
+        hourly("Mercado", local(1, 20), local(1), 25, 2.0),
+    ]
+    second_chunk: list[PriceList] = [
+        hourly("PVPC", local(2, 20), local(2), 25, 3.0),
+        hourly("Mercado", local(2, 20), local(2), 25, 4.0),
+    ]
+    merged: list[PriceList] = merge_price_lists(
+        second_chunk + first_chunk, local(1), local(2, 23, 59)
+    )
+    assert [price_list.title for price_list in merged] == ["PVPC", "Mercado"]
+    for price_list, (first_value, second_value) in zip(merged, [(1.0, 3.0), (2.0, 4.0)]):
+        assert price_list.last_update == local(2, 20)
+        assert [point.datetime for point in price_list.price_points] == [
+            local(1) + timedelta(hours=hour) for hour in range(48)
+        ]
+        # NOTE: The point shared by both chunks comes from the most recently updated one
+        assert list(price_list.values) == [first_value] * 24 + [second_value] * 24
+
+
+def test_merge_price_lists_keeps_the_points_within_the_range():
+    price_list: PriceList = hourly("PVPC", local(1, 20), local(1), 25, 1.0)
+    (merged,) = merge_price_lists([price_list], local(1, 6), local(1, 8, 59))
+    assert [point.datetime for point in merged.price_points] == [
+        local(1, 6),
+        local(1, 7),
+        local(1, 8),
+    ]
+    assert merged.interval == price_list.interval
+
+
+def test_merge_price_lists_without_lists():
+    assert merge_price_lists([], local(1), local(1, 23, 59)) == []
+
+
+@pytest.mark.parametrize("fetch", [fetch, fetch_async])
+def test_empty_date_range_has_no_price_lists(server: Server, cache: PriceCache, fetch):
+    assert fetch(server, cache, local(2), local(1, 23, 59)) == []
+    assert server.requests == 0
+
+
+@pytest.mark.parametrize("fetch", [fetch, fetch_async])
+def test_settled_days_are_served_without_the_network(
+    server: Server, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, fetch
+):
+    date_from, date_to = spanish_day_range(date(2024, 3, 2), date(2024, 3, 2))
+    cache = PriceCache(memory_size=8, disk_size=8, ttl=900.0, path=tmp_path / "cache")
+    price_lists: list[PriceList] = fetch(server, cache, date_from, date_to)
+    # NOTE: Long after the entries would have expired, from memory then from disk
+    now: float = time.time() + 365 * 24 * 3600.0
+    monkeypatch.setattr(cache_module.time, "time", lambda: now)
+    assert fetch(server, cache, date_from, date_to) == price_lists
+    disk_cache = PriceCache(memory_size=8, disk_size=8, ttl=900.0, path=tmp_path / "cache")
+    assert fetch(server, disk_cache, date_from, date_to) == price_lists
+    assert server.requests == 1
+
+
+def counters(name: str) -> dict[str, float]:
+    return {
+        ",".join(f"{label}={value}" for label, value in labels): count
+        for counter, labels, count in METRICS.counters()
+        if counter == name
+    }
+
+
+@pytest.mark.parametrize("validators", [True, False])
+@pytest.mark.parametrize("fetch", [fetch, fetch_async])
+def test_stale_entries_are_revalidated(
+    server: Server, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, fetch, validators: bool
+):
+    # NOTE: Without validators, an identical body revalidates the entry as well
+    server.validators = validators
+
+    def statuses(unchanged: int) -> dict[str, float]:
+        if validators:
+            return {"status=200": 1, "status=304": unchanged}
+        return {"status=200": 1 + unchanged}
+
+    today: date = datetime.now(TIMEZONE_SPAIN).date()
+    date_from, date_to = spanish_day_range(today, today)
+    # NOTE: Ahead of the times at which the disk entries are written
+    now: float = time.time() + 1.0
+    monkeypatch.setattr(cache_module.time, "time", lambda: now)
+    METRICS.clear()
+
+    def disk_cache() -> PriceCache:
+        return PriceCache(memory_size=8, disk_size=8, ttl=900.0, path=tmp_path / "cache")
+
+    cache: PriceCache = disk_cache()
+    price_lists: list[PriceList] = fetch(server, cache, date_from, date_to)
+    now += 900.0
+    assert fetch(server, cache, date_from, date_to) == price_lists
+    assert server.requests == 2
+    assert counters("api_revalidations") == {"result=unchanged": 1}
+    assert counters("api_requests") == statuses(unchanged=1)
+    # NOTE: Fresh again once revalidated, in memory and on disk
+    assert fetch(server, cache, date_from, date_to) == price_lists
+    assert fetch(server, disk_cache(), date_from, date_to) == price_lists
+    assert server.requests == 2
+
+    # NOTE: Expired entries on disk are revalidated as well
+    now += 900.0
+    assert fetch(server, disk_cache(), date_from, date_to) == price_lists
+    assert server.requests == 3
+    assert counters("api_revalidations") == {"result=unchanged": 2}
+    assert counters("api_requests") == statuses(unchanged=2)
+    assert fetch(server, disk_cache(), date_from, date_to) == price_lists
+    assert server.requests == 3
+
+    server.last_update += timedelta(hours=1)
+    now += 900.0
+    updated_lists: list[PriceList] = fetch(server, cache, date_from, date_to)
+    assert all(price_list.last_update == server.last_update for price_list in updated_lists)
+    assert counters("api_revalidations") == {"result=unchanged": 2, "result=modified": 1}
+    assert fetch(server, cache, date_from, date_to) == updated_lists
+    assert server.requests == 4
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from luz_metronomo.entity.price_list import PriceList
+from luz_metronomo.entity.price_point import PricePoint
+from luz_metronomo.entity.tariff_period import TariffPeriod
+from luz_metronomo.tariff import TariffCalendar
+from luz_metronomo.util.timezone import TIMEZONE_SPAIN
+from luz_metronomo.window import WindowFinder
+
+DATE_FROM = datetime(2024, 1, 2, tzinfo=timezone(timedelta(hours=1)))
+
+
+def window_finder(
+    values: list[float],
+    interval: timedelta = timedelta(hours=1),
+    skip: frozenset[int] = frozenset(),
+) -> WindowFinder:
+    return WindowFinder(
+        PriceList(
+            "test",
+            DATE_FROM,
+            [
+                PricePoint(value=value, datetime=DATE_FROM + index * interval)
+                for index, value in enumerate(values)
+                if index not in skip
+            ],
+        ),
+        TariffCalendar(),
+    )
+
+
+@pytest.mark.parametrize(
+    "duration, interval, extent",
+    [
+        (timedelta(hours=2), timedelta(hours=1), (2, 2.0)),
+        (timedelta(hours=2, minutes=15), timedelta(hours=1), (3, 2.25)),
+        (timedelta(minutes=1), timedelta(hours=1), (1, 1 / 60)),
+        (timedelta(hours=1), timedelta(minutes=15), (4, 4.0)),
+        (timedelta(minutes=20), timedelta(minutes=15), (2, 4 / 3)),
+        (timedelta(), timedelta(hours=1), (1, 1.0)),
+    ],
+)
+def test_extent(duration: timedelta, interval: timedelta, extent: tuple[int, float]):
+    length, points = window_finder([0.0, 0.0], interval).extent(duration)
+    assert length == extent[0]
+    assert points == pytest.approx(extent[1])
+
+
+def test_cheapest_whole_duration():
+    window = window_finder([50, 10, 20, 90, 5, 5]).cheapest(timedelta(hours=2))
+    assert window is not None
+    assert (window.index_from, window.index_to) == (4, 6)
+    assert window.date_from == DATE_FROM + timedelta(hours=4)
+    assert window.date_to == DATE_FROM + timedelta(hours=6)
+    assert window.mean == pytest.approx(5.0)
+
+
+def test_cheapest_partial_last_point():
+    window = window_finder([10, 10, 10, 200, 40, 40, 40, 40]).cheapest(timedelta(hours=3.25))
+    assert window is not None
+    # NOTE: Rounding the duration up to 4h would have picked the last four points instead
+    assert (window.index_from, window.index_to) == (0, 4)
+    assert window.date_to == DATE_FROM + timedelta(hours=3, minutes=15)
+    assert window.mean == pytest.approx((30 + 0.25 * 200) / 3.25)
+
+
+def test_cheapest_within_date_range():
+    finder: WindowFinder = window_finder([1, 1, 50, 60, 70, 1])
+    window = finder.cheapest(
+        timedelta(hours=2),
+        date_from=DATE_FROM + timedelta(hours=1),
+        date_to=DATE_FROM + timedelta(hours=5),
+    )
+    assert window is not None
+    assert (window.index_from, window.index_to) == (1, 3)
+    assert finder.cheapest(timedelta(hours=2), date_from=DATE_FROM + timedelta(hours=5)) is None
+
+
+def test_windows_never_span_gaps():
+    # NOTE: The point at 02:00 is missing
+    finder: WindowFinder = window_finder([50, 1, 0, 1, 50], skip=frozenset({2}))
+    window = finder.cheapest(timedelta(hours=2))
+    assert window is not None
+    assert window.date_from in (DATE_FROM, DATE_FROM + timedelta(hours=3))
+    assert window.mean == pytest.approx(25.5)
+
+
+def test_windows_within_periods():
+    # NOTE: 2024-01-02 is a workday, “valle” until 08:00 and “llano” from 08:00 to 10:00
+    finder: WindowFinder = window_finder([90.0] * 8 + [1.0, 1.0] + [90.0] * 14)
+    window = finder.cheapest(timedelta(hours=2), periods=[TariffPeriod.Valle])
+    assert window is not None
+    assert window.index_to <= 8
+    window = finder.cheapest(timedelta(hours=2), periods=[TariffPeriod.Llano])
+    assert window is not None
+    assert (window.index_from, window.index_to) == (8, 10)
+
+
+def test_cheapest_windows_never_overlap():
+    windows = window_finder([9, 1, 2, 1, 9, 9, 3, 3, 9]).cheapest_windows(timedelta(hours=2), 3)
+    assert [(window.index_from, window.index_to) for window in windows] == [(1, 3), (6, 8), (3, 5)]
+    assert [window.mean for window in windows] == sorted(window.mean for window in windows)
+
+
+def test_cheapest_windows_ties_go_to_the_earliest_start():
+    windows = window_finder([1.0] * 6).cheapest_windows(timedelta(hours=1), 3)
+    assert [window.index_from for window in windows] == [0, 1, 2]
+
+
+def test_cheapest_windows_amount():
+    finder: WindowFinder = window_finder([5, 4, 3, 2, 1])
+    windows = finder.cheapest_windows(timedelta(hours=1), 10)
+    assert [window.index_from for window in windows] == [4, 3, 2, 1, 0]
+    assert finder.cheapest_windows(timedelta(hours=1), 0) == []
+    assert finder.cheapest_windows(timedelta(hours=6), 1) == []
+
+
+def test_empty_list():
+    finder: WindowFinder = window_finder([])
+    assert finder.cheapest(timedelta(hours=1)) is None
+    assert finder.cheapest_windows(timedelta(hours=1), 3) == []
+    assert finder.cheapest_per_day(timedelta(hours=1)) == []
+
+
+@pytest.mark.parametrize("day, hours", [(datetime(2024, 3, 31), 23), (datetime(2024, 10, 27), 25)])
+def test_cheapest_per_day_over_daylight_saving_time_changes(day: datetime, hours: int):
+    # NOTE: Points of the local days before, of and after the change, cheapest at the last hour
+    day_from: datetime = (day - timedelta(days=1)).replace(tzinfo=TIMEZONE_SPAIN)
+    timestamp_from: int = int(day_from.timestamp())
+    timestamp_to: int = int((day + timedelta(days=2)).replace(tzinfo=TIMEZONE_SPAIN).timestamp())
+    datetimes: list[datetime] = [
+        datetime.fromtimestamp(timestamp, TIMEZONE_SPAIN)
+        for timestamp in range(timestamp_from, timestamp_to, 3600)
+    ]
+    finder = WindowFinder(
+        PriceList(
+            "test",
+            day_from,
+            [
+                PricePoint(value=1.0 if the_datetime.hour == 23 else 50.0, datetime=the_datetime)
+                for the_datetime in datetimes
+            ],
+        ),
+        TariffCalendar(),
+    )
+    assert sum(the_datetime.date() == day.date() for the_datetime in datetimes) == hours
+
+    windows = finder.cheapest_per_day(timedelta(hours=1))
+    assert [window.date_from.date() for window in windows] == [
+        (day + timedelta(days=days)).date() for days in (-1, 0, 1)
+    ]
+    assert all(window.date_from.hour == 23 and window.mean == 1.0 for window in windows)